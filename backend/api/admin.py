@@ -5,67 +5,179 @@ from .model.healthtip import HealthTip
 from .model.dailytip import DailyTip
 from .model.unanswered import Unanswered
 from .model.cache import CachedAnswer
+from .model.archive import ArchivedSession
+from .model.schedulerlease import SchedulerLease
+from .model.taskrun import TaskRun
+from .model.unansweredcluster import UnansweredCluster
 import csv
-from django.http import HttpResponse
+from itertools import chain
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Count, Q
+from django.urls import reverse
+from django.utils.html import format_html
+from django.http import StreamingHttpResponse
+from django.utils.functional import cached_property
 # Register your models here.
 
+EXPORT_CHUNK_SIZE = 2000
+EXACT_COUNT_BELOW = 10000
+
+
+class EstimatedCountPaginator(Paginator):
+    """Uses the planner's row estimate for unfiltered changelists of large PostgreSQL tables.
+
+    An exact COUNT(*) has to visit every row; filtered lists (search, filters,
+    date drill-down) and small tables still get the exact figure.
+    """
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        connection = connections[qs.db]
+        if connection.vendor == "postgresql" and not qs.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [qs.model._meta.db_table])
+                row = cursor.fetchone()
+            if row and row[0] >= EXACT_COUNT_BELOW:
+                return row[0]
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False  # skip the second, unfiltered COUNT(*) on filtered pages
+
+
+class Echo:
+    """Pseudo-buffer for csv.writer: ``write`` hands the formatted line back instead of storing it."""
+    def write(self, value):
+        return value
+
+
+def stream_csv(filename, header, rows):
+    """CSV download produced row by row, so large exports never sit in memory."""
+    writer = csv.writer(Echo())
+    response = StreamingHttpResponse(
+        chain([writer.writerow(header)], (writer.writerow(row) for row in rows)),
+        content_type="text/csv",
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+# Searches on a user go through the unique (indexed) email: "=" makes them exact matches.
+
 @admin.register(ChatSession)
-class ChatSessionAdmin(admin.ModelAdmin):
-    list_display = ('user', 'title')
-    search_fields = ('user','title')
-    list_filter = ('title', 'user')
+class ChatSessionAdmin(LargeTableAdmin):
+    list_display = ('title', 'user', 'message_count', 'last_message_at', 'is_active')
+    list_select_related = ('user',)
+    search_fields = ('=user__email', 'title')
+    list_filter = ('is_active',)
+    date_hierarchy = 'created_at'
+    autocomplete_fields = ('user',)
+
+    def get_queryset(self, request):
+        # __str__ shows the user's email; also covers the session autocomplete on History
+        return super().get_queryset(request).select_related('user')
 
 @admin.register(History)
-class HistoryAdmin(admin.ModelAdmin):
-    list_display = ('session', 'sender','message')
-    search_fields = ('session','sender')
-    list_filter = ('sender', 'message')
+class HistoryAdmin(LargeTableAdmin):
+    list_display = ('id', 'session', 'sender', 'body', 'timestamp')
+    list_select_related = ('session__user', 'answer')
+    # No free-text search over messages; find a user's messages by email
+    search_fields = ('=session__user__email',)
+    list_filter = ('sender',)
+    date_hierarchy = 'timestamp'
+    ordering = ('-id',)  # primary key index; the model's timestamp ordering has no index of its own
+    autocomplete_fields = ('session',)
+    raw_id_fields = ('answer',)
 
 @admin.register(HealthTip)
 class HealthTipAdmin(admin.ModelAdmin):
-    list_display = ('title', 'body')
+    list_display = ('title', 'source', 'body', 'last_used')
     search_fields = ('title', 'body')
-    list_filter = ('title', 'body')
+    list_filter = ('source',)
+    date_hierarchy = 'fetched_at'
 
 @admin.register(DailyTip)
 class DailyTipAdmin(admin.ModelAdmin):
     list_display = ('tip', 'date')
-    search_fields = ('tip', 'date')
-    list_filter = ('tip', 'date')
+    list_select_related = ('tip',)
+    search_fields = ('tip__title',)
+    date_hierarchy = 'date'
+    autocomplete_fields = ('tip',)
 
 @admin.register(Unanswered)
-class UnansweredAdmin(admin.ModelAdmin):
-    list_display = ('user', 'question', 'answer', 'is_answered')
-    search_fields = ('user', 'question', 'answer')
-    list_filter = ('is_answered', 'user')
+class UnansweredAdmin(LargeTableAdmin):
+    list_display = ('user', 'question', 'answer', 'is_answered', 'cluster', 'created_at')
+    list_select_related = ('user', 'cluster')
+    search_fields = ('=user__email', 'question')
+    list_filter = ('is_answered',)
+    raw_id_fields = ('cluster',)
+    date_hierarchy = 'created_at'
+    autocomplete_fields = ('user',)
     def export_to_csv(self, request, queryset):
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = 'attachment; filename="unanswered_export.csv"'
+        # Use "Select all" in the changelist to export every matching row
+        rows = queryset.order_by().values_list("question", "answer").iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        return stream_csv("unanswered_export.csv", ["Question", "Answer"], rows)
 
-        writer = csv.writer(response)
-        writer.writerow(["Question", "Answer"])  # header
-
-        qs = queryset if queryset.exists() else Unanswered.objects.filter(is_answered=True)
-        for item in qs:
-            writer.writerow([item.question, item.answer])
-
-        return response
-
-    export_to_csv.short_description = "📥 Export selected (or all answered) to CSV"
+    export_to_csv.short_description = "📥 Export selected to CSV"
     actions = [export_to_csv]
 
 @admin.register(CachedAnswer)
-class CachedAnswerAdmin(admin.ModelAdmin):
+class CachedAnswerAdmin(LargeTableAdmin):
     list_display = ('user', 'query_text', 'answer', 'expires_at')
-    search_fields = ('user', 'query_text', 'answer')
-    list_filter = ('expires_at', 'user')
+    list_select_related = ('user',)
+    search_fields = ('=user__email', 'query_text')
+    date_hierarchy = 'expires_at'
+    autocomplete_fields = ('user',)
     def export_to_csv(self, request, queryset):
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = 'attachment; filename="cached_answer_export.csv"'
-        writer = csv.writer(response)
-        writer.writerow(["User", "Query Text", "Answer", "Expires At"])
-        for item in queryset:
-            writer.writerow([item.user, item.query_text, item.answer, item.expires_at])
-        return response
+        # The user's email comes from the same joined query, not one query per row
+        rows = (
+            queryset.order_by()
+            .values_list("user__email", "query_text", "answer", "expires_at")
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+        return stream_csv("cached_answer_export.csv", ["User", "Query Text", "Answer", "Expires At"], rows)
     export_to_csv.short_description = "📥 Export selected to CSV"
     actions = [export_to_csv]
+
+@admin.register(ArchivedSession)
+class ArchivedSessionAdmin(admin.ModelAdmin):
+    list_display = ('session', 'message_count', 'codec', 'created_at')
+    list_select_related = ('session__user',)
+    exclude = ('blob',)
+    raw_id_fields = ('session',)
+
+@admin.register(SchedulerLease)
+class SchedulerLeaseAdmin(admin.ModelAdmin):
+    list_display = ('name', 'holder', 'acquired_at', 'renewed_at', 'expires_at')
+    readonly_fields = ('name', 'holder', 'acquired_at', 'renewed_at', 'expires_at')
+
+@admin.register(TaskRun)
+class TaskRunAdmin(admin.ModelAdmin):
+    list_display = ('key', 'task', 'status', 'attempts', 'updated_at')
+    list_filter = ('task', 'status')
+    search_fields = ('key',)
+
+@admin.register(UnansweredCluster)
+class UnansweredClusterAdmin(admin.ModelAdmin):
+    """Biggest gaps first: clusters ranked by open questions, then by all-time size."""
+    list_display = ('label', 'open_questions', 'size', 'last_seen_at', 'questions_link')
+    search_fields = ('label',)
+    date_hierarchy = 'last_seen_at'
+    exclude = ('centroid',)
+    readonly_fields = ('size', 'last_seen_at')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            open_count=Count('questions', filter=Q(questions__is_answered=False)),
+        ).order_by('-open_count', '-size')
+
+    @admin.display(description='Open questions', ordering='open_count')
+    def open_questions(self, obj):
+        return obj.open_count
+
+    @admin.display(description='Questions')
+    def questions_link(self, obj):
+        url = reverse('admin:api_unanswered_changelist') + f'?cluster__id__exact={obj.id}'
+        return format_html('<a href="{}">View</a>', url)
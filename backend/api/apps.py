@@ -6,6 +6,8 @@ class ApiConfig(AppConfig):
     name = 'api'
 
     def ready(self):
-        from . import tasks
-        if not tasks.scheduler.running:  
-            tasks.scheduler.start()
\ No newline at end of file
+        from .utils import tip_payload  # noqa: F401  (connects the daily tip cache invalidation)
+        # Every server process joins the election; only the lease holder runs the jobs
+        from .scheduler import should_autostart, start_scheduler
+        if should_autostart():
+            start_scheduler()
\ No newline at end of file
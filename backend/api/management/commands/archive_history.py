@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from api.utils.archive import ARCHIVE_AFTER_DAYS, BATCH_SIZE, archive_inactive_sessions
+
+class Command(BaseCommand):
+    help = "Move messages of inactive chat sessions into compressed archive blobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS,
+                            help="Archive sessions idle for at least this many days")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument("--limit", type=int, default=None, help="Stop after this many sessions")
+
+    def handle(self, *args, **options):
+        sessions, messages = archive_inactive_sessions(
+            days=options["days"], batch_size=options["batch_size"], limit=options["limit"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Archived {messages} messages from {sessions} sessions"))
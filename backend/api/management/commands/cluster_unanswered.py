@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.utils.clustering import BATCH_SIZE, SIMILARITY, ClusteringBusy, cluster_unanswered
+
+class Command(BaseCommand):
+    help = "Group unanswered questions into clusters of near-identical questions by embedding similarity"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument("--threshold", type=float, default=SIMILARITY,
+                            help="Minimum cosine similarity to join an existing cluster")
+        parser.add_argument("--limit", type=int, default=None, help="Stop after this many questions")
+        parser.add_argument("--rebuild", action="store_true",
+                            help="Drop all clusters and re-cluster the questions still stored")
+
+    def handle(self, *args, **options):
+        try:
+            stats = cluster_unanswered(
+                batch_size=options["batch_size"], threshold=options["threshold"], limit=options["limit"],
+                progress=lambda totals: self.stdout.write(f"clustered {totals['questions']} questions"),
+                rebuild=options["rebuild"],
+            )
+        except ClusteringBusy as e:
+            raise CommandError(f"{e}; try again when the running job has finished")
+        self.stdout.write(self.style.SUCCESS(
+            f"Clustered {stats['questions']} questions: {stats['new_clusters']} new clusters, "
+            f"{stats['updated_clusters']} existing clusters grew"
+        ))
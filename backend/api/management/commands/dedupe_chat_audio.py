@@ -0,0 +1,58 @@
+import os
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from api.model.history import History
+from api.utils.audio import DIGEST_RE, audio_name, hash_upload
+
+
+class Command(BaseCommand):
+    help = "Move stored chat audio to content-addressed names so identical clips share one file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--delete-originals", action="store_true",
+                            help="Delete the old files once no message references them")
+
+    def handle(self, *args, **options):
+        legacy = (
+            History.objects.exclude(audio="").exclude(audio__isnull=True)
+            .only("id", "audio").order_by("id")
+        )
+        moved, stored, old_names, batch = 0, 0, set(), []
+        for message in legacy.iterator(chunk_size=options["batch_size"]):
+            name = message.audio.name
+            if DIGEST_RE.match(os.path.splitext(os.path.basename(name))[0]):
+                continue
+            if not default_storage.exists(name):
+                self.stdout.write(self.style.WARNING(f"missing file for message {message.id}: {name}"))
+                continue
+            with default_storage.open(name, "rb") as f:
+                target = audio_name(hash_upload(f), name)
+                if not default_storage.exists(target):
+                    f.seek(0)
+                    target = default_storage.save(target, f)
+                    stored += 1
+            message.audio = target
+            batch.append(message)
+            old_names.add(name)
+            if len(batch) >= options["batch_size"]:
+                History.objects.bulk_update(batch, ["audio"])
+                moved += len(batch)
+                batch = []
+        if batch:
+            History.objects.bulk_update(batch, ["audio"])
+            moved += len(batch)
+
+        deleted = 0
+        if options["delete_originals"]:
+            still_used = set(History.objects.filter(audio__in=old_names).values_list("audio", flat=True))
+            for name in old_names - still_used:
+                default_storage.delete(name)
+                deleted += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Re-pointed {moved} messages to {stored} new content-addressed files"
+            + (f", deleted {deleted} originals" if options["delete_originals"] else "")
+        ))
@@ -0,0 +1,67 @@
+import datetime
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.model.dailytip import DailyTip
+from api.model.history import History
+from api.model.session import ChatSession
+from api.model.unanswered import Unanswered
+
+
+def hot_queries():
+    """The chat hot-path queries, shaped exactly as the views issue them."""
+    today = datetime.date.today()
+    return {
+        "history latest page": History.objects.filter(session_id=1).order_by("-timestamp", "-id")[:51],
+        "chat turn recent messages": (
+            History.objects.filter(session_id=1, session__user_id=1)
+            .select_related("session")
+            .order_by("-timestamp", "-id")[:5]
+        ),
+        "session list latest page": ChatSession.objects.filter(user_id=1).order_by("-updated_at", "-id")[:31],
+        "answered questions export": Unanswered.objects.answered().order_by("created_at", "id"),
+        "daily tips for today": DailyTip.objects.filter(date=today).select_related("tip").order_by("slot")[:3],
+    }
+
+
+# SQLite: "SCAN api_history" (no index); PostgreSQL: "Seq Scan on api_history"
+SEQ_SCAN_PATTERNS = {
+    "sqlite": re.compile(r"\bSCAN (\w+)\b(?! USING)"),
+    "postgresql": re.compile(r"Seq Scan on (\w+)"),
+}
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the chat hot-path queries and fail if any falls back to a sequential scan"
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        pattern = SEQ_SCAN_PATTERNS.get(vendor)
+        if pattern is None:
+            raise CommandError(f"Unsupported database backend: {vendor}")
+
+        failures = []
+        with transaction.atomic():
+            if vendor == "postgresql":
+                # Small tables make the planner prefer seq scans regardless of indexes;
+                # with seq scans disabled one only shows up when no index can serve the query.
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+
+            for name, queryset in hot_queries().items():
+                plan = queryset.explain()
+                scanned = sorted(set(pattern.findall(plan)))
+                if options["verbosity"] > 1:
+                    self.stdout.write(plan)
+                if scanned:
+                    failures.append(name)
+                    self.stdout.write(self.style.ERROR(f"✗ {name}: sequential scan on {', '.join(scanned)}"))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f"✓ {name}"))
+                if "TEMP B-TREE" in plan:
+                    self.stdout.write(self.style.WARNING(f"  {name}: sort is not served by an index"))
+
+        if failures:
+            raise CommandError(f"{len(failures)} hot queries use sequential scans: {', '.join(failures)}")
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from api.utils.exports import (
+    CHUNK_SIZE, DELETE_BATCH_SIZE, EXPORT_DIR, FORMATS, RETENTION_DAYS, SINKS, export_answered, purge_unanswered,
+)
+
+class Command(BaseCommand):
+    help = "Stream answered questions to exports/ and delete old unanswered-question rows in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", action="append", choices=sorted(SINKS), dest="formats",
+                            help=f"Output format, repeatable (default: {','.join(FORMATS)}; CSV is always written)")
+        parser.add_argument("--output-dir", default=EXPORT_DIR)
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+        parser.add_argument("--days", type=int, default=RETENTION_DAYS,
+                            help="Delete questions older than this many days")
+        parser.add_argument("--batch-size", type=int, default=DELETE_BATCH_SIZE)
+        parser.add_argument("--no-purge", action="store_true", help="Export only")
+
+    def handle(self, *args, **options):
+        def progress(stage, done):
+            self.stdout.write(f"\r{stage} {done} rows", ending="")
+            self.stdout.flush()
+
+        paths, exported = export_answered(
+            options["output_dir"], options["formats"], options["chunk_size"], progress=progress,
+        )
+        self.stdout.write("")
+        deleted = 0
+        if not options["no_purge"]:
+            deleted = purge_unanswered(options["days"], options["batch_size"], progress=progress)
+            self.stdout.write("")
+        self.stdout.write(self.style.SUCCESS(
+            f"Exported {exported} rows to {', '.join(paths)}; deleted {deleted} old records"
+        ))
@@ -2,7 +2,7 @@ from django.core.management.base import BaseCommand
 from api.utils.utils import fetch_daily_health_tip
 
 class Command(BaseCommand):
-    help = "Fetches today's health tip from MyHealthfinder → CDC → AdviceSlip"
+    help = "Prefetches a week of health tips (MyHealthfinder, CDC, AdviceSlip) and assigns today's"
 
     def handle(self, *args, **kwargs):
         tip = fetch_daily_health_tip()
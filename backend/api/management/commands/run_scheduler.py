@@ -0,0 +1,24 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from api.scheduler import LeaderScheduler, Lease
+
+
+class Command(BaseCommand):
+    help = "Join the scheduler election and run the periodic jobs while holding the lease"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--holder", default=None, help="Lease holder name (default: host:pid:random)")
+
+    def handle(self, *args, **options):
+        scheduler = LeaderScheduler(lease=Lease(holder=options["holder"]))
+        stopped = threading.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: stopped.set())
+
+        self.stdout.write(f"Scheduler {scheduler.lease.holder} started; waiting for the lease")
+        scheduler.start()
+        stopped.wait()
+        scheduler.stop()
+        self.stdout.write(self.style.SUCCESS(f"Scheduler {scheduler.lease.holder} stopped, lease released"))
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_cachedanswer'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chatsession',
+            index=models.Index(fields=['user', 'updated_at', 'id'], name='chatsession_user_upd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dailytip',
+            index=models.Index(fields=['date'], name='dailytip_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='history',
+            index=models.Index(fields=['session', 'timestamp', 'id'], name='history_session_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='unanswered',
+            index=models.Index(fields=['is_answered', 'created_at'], name='unanswered_answered_ts_idx'),
+        ),
+    ]
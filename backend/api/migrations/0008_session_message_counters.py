@@ -0,0 +1,38 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:30
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    ChatSession = apps.get_model('api', 'ChatSession')
+    History = apps.get_model('api', 'History')
+    per_session = History.objects.filter(session=OuterRef('pk')).order_by().values('session')
+    ChatSession.objects.update(
+        message_count=Coalesce(
+            Subquery(per_session.annotate(n=Count('id')).values('n'), output_field=IntegerField()), 0
+        ),
+        last_message_at=Subquery(per_session.annotate(last=Max('timestamp')).values('last')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_chat_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatsession',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatsession',
+            name='message_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:32
+
+import hashlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+BATCH_SIZE = 2000
+
+
+def move_duplicate_answers(apps, schema_editor):
+    """Point bot messages whose text is repeated across rows at a catalog entry."""
+    AnswerCatalog = apps.get_model('api', 'AnswerCatalog')
+    History = apps.get_model('api', 'History')
+    repeated = (
+        History.objects.filter(sender='bot', answer__isnull=True).exclude(message='')
+        .values('message').annotate(n=Count('id')).filter(n__gt=1).values_list('message', flat=True)
+    )
+    # Materialized first: SQLite cannot update the rows a GROUP BY cursor is still reading
+    for body in list(repeated):
+        entry = AnswerCatalog(id=hashlib.sha256(body.encode('utf-8')).hexdigest(), body=body)
+        AnswerCatalog.objects.bulk_create([entry], ignore_conflicts=True)
+        rows = History.objects.filter(sender='bot', answer__isnull=True, message=body)
+        while True:
+            ids = list(rows.values_list('id', flat=True)[:BATCH_SIZE])
+            if not ids:
+                break
+            History.objects.filter(id__in=ids).update(answer_id=entry.id, message='')
+
+
+def restore_answer_text(apps, schema_editor):
+    AnswerCatalog = apps.get_model('api', 'AnswerCatalog')
+    History = apps.get_model('api', 'History')
+    for entry in AnswerCatalog.objects.iterator(chunk_size=100):
+        History.objects.filter(answer_id=entry.id).update(message=entry.body, answer_id=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_session_message_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnswerCatalog',
+            fields=[
+                ('id', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('body', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='history',
+            name='message',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='history',
+            name='answer',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='api.answercatalog'),
+        ),
+        migrations.RunPython(move_duplicate_answers, restore_answer_text),
+    ]
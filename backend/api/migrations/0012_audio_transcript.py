@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_audiojob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AudioTranscript',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('sha256', models.CharField(max_length=64)),
+                ('engine', models.CharField(max_length=100)),
+                ('text', models.TextField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('sha256', 'engine'), name='audiotranscript_sha_engine_uniq')],
+            },
+        ),
+    ]
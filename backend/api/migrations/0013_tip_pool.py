@@ -0,0 +1,50 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:48
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min
+
+
+def merge_duplicate_tips(apps, schema_editor):
+    """Keep the oldest row per (source, external_id); re-point its DailyTips and drop the rest."""
+    HealthTip = apps.get_model('api', 'HealthTip')
+    DailyTip = apps.get_model('api', 'DailyTip')
+    groups = (
+        HealthTip.objects.filter(external_id__isnull=False)
+        .values('source', 'external_id').annotate(n=Count('id'), keep=Min('id')).filter(n__gt=1)
+    )
+    for group in groups.iterator(chunk_size=100):
+        duplicates = HealthTip.objects.filter(
+            source=group['source'], external_id=group['external_id'],
+        ).exclude(id=group['keep'])
+        DailyTip.objects.filter(tip__in=duplicates).update(tip_id=group['keep'])
+        duplicates.delete()
+
+    # Two merged rows may have been scheduled on the same day
+    repeated = (
+        DailyTip.objects.values('tip_id', 'date').annotate(n=Count('id'), keep=Min('id')).filter(n__gt=1)
+    )
+    for row in repeated.iterator(chunk_size=100):
+        DailyTip.objects.filter(tip_id=row['tip_id'], date=row['date']).exclude(id=row['keep']).delete()
+
+    for row in DailyTip.objects.values('tip_id').annotate(last=Max('date')).iterator(chunk_size=500):
+        HealthTip.objects.filter(id=row['tip_id']).update(last_used=row['last'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_audio_transcript'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='healthtip',
+            name='last_used',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(merge_duplicate_tips, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='healthtip',
+            constraint=models.UniqueConstraint(fields=('source', 'external_id'), name='healthtip_source_external_uniq'),
+        ),
+    ]
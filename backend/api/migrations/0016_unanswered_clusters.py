@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-19 08:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_task_run'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnansweredCluster',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('label', models.TextField()),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('centroid', models.BinaryField()),
+                ('last_seen_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-size'], name='unansweredcluster_size_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='unanswered',
+            name='cluster',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='questions', to='api.unansweredcluster'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-19 08:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_unanswered_clusters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='unanswered',
+            name='unanswered_answered_ts_idx',
+        ),
+        migrations.AddIndex(
+            model_name='unanswered',
+            index=models.Index(condition=models.Q(('is_answered', True)), fields=['created_at', 'id'], name='unanswered_answered_ts_idx'),
+        ),
+    ]
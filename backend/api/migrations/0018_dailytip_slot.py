@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:12
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def number_slots(apps, schema_editor):
+    """Number each day's existing tips 0, 1, 2, … in the order they were assigned."""
+    DailyTip = apps.get_model('api', 'DailyTip')
+    days = DailyTip.objects.values('date').annotate(n=Count('id')).filter(n__gt=1)
+    for row in days.iterator(chunk_size=500):
+        tips = list(DailyTip.objects.filter(date=row['date']).order_by('id'))
+        for slot, tip in enumerate(tips):
+            tip.slot = slot
+        DailyTip.objects.bulk_update(tips, ['slot'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_unanswered_answered_partial_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailytip',
+            name='slot',
+            field=models.PositiveSmallIntegerField(default=0),
+            preserve_default=False,
+        ),
+        migrations.RunPython(number_slots, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='dailytip',
+            constraint=models.UniqueConstraint(fields=('date', 'slot'), name='dailytip_date_slot_uniq'),
+        ),
+    ]
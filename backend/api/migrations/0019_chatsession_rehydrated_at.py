@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 08:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_dailytip_slot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatsession',
+            name='rehydrated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
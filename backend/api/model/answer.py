@@ -0,0 +1,35 @@
+import hashlib
+
+from django.db import models
+
+
+def answer_key(body: str) -> str:
+    """Stable content id for an answer body."""
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+class AnswerCatalogQuerySet(models.QuerySet):
+    def intern(self, body: str) -> "AnswerCatalog":
+        """Return the catalog entry for ``body``, inserting it if it is new (no read)."""
+        entry = AnswerCatalog(id=answer_key(body), body=body)
+        self.bulk_create([entry], ignore_conflicts=True)
+        return entry
+
+    def bodies(self, ids) -> dict[str, str]:
+        """Side-load answer bodies for a page of messages in one query."""
+        ids = {i for i in ids if i}
+        if not ids:
+            return {}
+        return dict(self.filter(pk__in=ids).values_list("id", "body"))
+
+
+class AnswerCatalog(models.Model):
+    """Deduplicated dataset answers; bot messages reference these instead of copying the text."""
+    id = models.CharField(max_length=64, primary_key=True)  # sha256 of body
+    body = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = AnswerCatalogQuerySet.as_manager()
+
+    def __str__(self):
+        return self.body[:50]
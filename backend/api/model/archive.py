@@ -0,0 +1,13 @@
+from django.db import models
+from backend.basemodel import TimeBaseModel
+from .session import ChatSession
+
+class ArchivedSession(TimeBaseModel):
+    """Cold storage for an inactive session: all of its messages in one compressed blob."""
+    session = models.OneToOneField(ChatSession, on_delete=models.CASCADE, primary_key=True, related_name='archive')
+    codec = models.CharField(max_length=10, default='gzip')
+    blob = models.BinaryField()
+    message_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Archive of session {self.session_id} ({self.message_count} messages)"
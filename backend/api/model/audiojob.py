@@ -0,0 +1,25 @@
+import uuid
+from django.db import models
+from django.conf import settings
+from backend.basemodel import TimeBaseModel
+from .session import ChatSession
+from .history import History
+
+class AudioJob(TimeBaseModel):
+    """A voice message queued for transcription + answer on the Celery worker."""
+    PENDING, RUNNING, DONE, FAILED = 'pending', 'running', 'done', 'failed'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed')]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='audio_jobs')
+    session = models.ForeignKey(ChatSession, on_delete=models.CASCADE, related_name='audio_jobs')
+    message = models.ForeignKey(History, on_delete=models.CASCADE, related_name='+')  # user message holding the audio
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    transcript = models.TextField(blank=True)
+    label = models.CharField(max_length=50, blank=True)
+    answer = models.TextField(blank=True)
+    error = models.TextField(blank=True)
+    error_status = models.PositiveSmallIntegerField(null=True, blank=True)  # HTTP status the sync view would return
+
+    def __str__(self):
+        return f"Audio job {self.id} ({self.status})"
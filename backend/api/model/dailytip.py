@@ -6,6 +6,16 @@ from django.db import models
 class DailyTip(TimeBaseModel):
     tip = models.ForeignKey("HealthTip", on_delete=models.CASCADE)
     date = models.DateField() 
+    slot = models.PositiveSmallIntegerField()  # position among the day's tips
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['date'], name='dailytip_date_idx'),
+        ]
+        constraints = [
+            # Concurrent assignments for the same day cannot add more than one tip per slot
+            models.UniqueConstraint(fields=['date', 'slot'], name='dailytip_date_slot_uniq'),
+        ]
 
     def __str__(self):
         return f"{self.date}: {self.tip}"
@@ -8,6 +8,13 @@ class HealthTip(TimeBaseModel):
     body = models.TextField()
     published_at = models.DateTimeField(null=True, blank=True)
     fetched_at = models.DateTimeField(auto_now_add=True)
+    last_used = models.DateField(null=True, blank=True)  # latest date it is (or was) shown as a daily tip
+
+    class Meta:
+        constraints = [
+            # Lets the prefetch job upsert instead of re-inserting the same topic
+            models.UniqueConstraint(fields=['source', 'external_id'], name='healthtip_source_external_uniq'),
+        ]
 
     def __str__(self):
         return (self.title or self.body[:50]).strip()
\ No newline at end of file
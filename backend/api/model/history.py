@@ -1,17 +1,28 @@
 from backend.basemodel import TimeBaseModel
 from django.db import models
 from .session import ChatSession
+from .answer import AnswerCatalog
 
 class History(TimeBaseModel):
     session = models.ForeignKey(ChatSession, on_delete=models.CASCADE, related_name='messages')
     sender = models.CharField(max_length=10, choices=[('user', 'User'), ('bot', 'Bot')])
-    message = models.TextField()
+    message = models.TextField(blank=True)  # empty when ``answer`` is set
+    # Bot replies from the dataset reference the catalog instead of copying the text
+    answer = models.ForeignKey(AnswerCatalog, null=True, blank=True, on_delete=models.PROTECT, related_name='+')
     timestamp = models.DateTimeField(auto_now_add=True)
     audio = models.FileField(upload_to='chat_audio/', null=True, blank=True)    
 
 
     class Meta:
         ordering = ['timestamp']
+        indexes = [
+            # Per-session history in (timestamp, id) keyset order
+            models.Index(fields=['session', 'timestamp', 'id'], name='history_session_ts_idx'),
+        ]
+
+    @property
+    def body(self) -> str:
+        return self.answer.body if self.answer_id else self.message
 
     def __str__(self):
-        return f"{self.sender}: {self.message[:20]}..."
\ No newline at end of file
+        return f"{self.sender}: {self.body[:20]}..."
\ No newline at end of file
@@ -0,0 +1,13 @@
+from django.db import models
+
+
+class SchedulerLease(models.Model):
+    """Who currently runs the periodic jobs; a holder keeps the lease by renewing it before ``expires_at``."""
+    name = models.CharField(max_length=50, primary_key=True)
+    holder = models.CharField(max_length=200)
+    acquired_at = models.DateTimeField()
+    renewed_at = models.DateTimeField()
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name}: {self.holder} until {self.expires_at:%Y-%m-%d %H:%M:%S}"
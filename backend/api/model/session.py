@@ -1,28 +1,46 @@
 from django.db import models
 from django.conf import settings
+from django.db.models import Case, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce, Concat, Length, Substr
+from django.db.models.lookups import GreaterThan
 from backend.basemodel import TimeBaseModel
 
 class ChatSession(TimeBaseModel):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='chat_sessions')
     title = models.CharField(max_length=255, default="New Chat")
-    is_active = models.BooleanField(default=True)
+    is_active = models.BooleanField(default=True)  # False while the messages are archived
+    # Denormalized, maintained with F() updates on the chat-turn write path
+    message_count = models.PositiveIntegerField(default=0)
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    # Set when archived messages are restored; holds off re-archival without moving updated_at
+    rehydrated_at = models.DateTimeField(null=True, blank=True)
+
     class Meta:
         ordering = ['-updated_at']
+        indexes = [
+            # A user's sessions in (updated_at, id) keyset order
+            models.Index(fields=['user', 'updated_at', 'id'], name='chatsession_user_upd_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} ({getattr(self.user, 'email', 'Unknown')})"
 
-    @property
-    def message_count(self):
-        return self.messages.count()
-
     def update_title_from_first_message(self):
-        """Update the title based on the first user message"""
-        first_message = self.messages.filter(sender='user').exclude(message='').first()
-        if first_message and first_message.message:
-            # Truncate to 50 characters and add ellipsis if needed
-            title = first_message.message[:50]
-            if len(first_message.message) > 50:
-                title += "..."
-            self.title = title
-            self.save() 
\ No newline at end of file
+        """Update the title based on the first user message (single UPDATE)"""
+        from .history import History
+
+        first_message = Subquery(
+            History.objects.filter(session=OuterRef('pk'), sender='user')
+            .exclude(message='')
+            .order_by('timestamp', 'id')
+            .values('message')[:1]
+        )
+        # Truncate to 50 characters and add ellipsis if needed
+        ChatSession.objects.filter(pk=self.pk).update(
+            title=Case(
+                When(GreaterThan(Length(first_message), 50),
+                     then=Concat(Substr(first_message, 1, 50), Value("..."), output_field=models.CharField())),
+                default=Coalesce(first_message, 'title'),
+                output_field=models.CharField(),
+            )
+        )
@@ -0,0 +1,16 @@
+from django.db import models
+from backend.basemodel import TimeBaseModel
+
+class TaskRun(TimeBaseModel):
+    """One run of a periodic Celery task, keyed by its idempotency key (e.g. ``send_health_tips:2025-01-31``)."""
+    RUNNING, DONE, FAILED = 'running', 'done', 'failed'
+    STATUS_CHOICES = [(RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed')]
+
+    key = models.CharField(max_length=200, primary_key=True)
+    task = models.CharField(max_length=200)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=RUNNING)
+    attempts = models.PositiveIntegerField(default=1)
+    result = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"{self.key} ({self.status})"
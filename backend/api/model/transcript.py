@@ -0,0 +1,16 @@
+from django.db import models
+from backend.basemodel import TimeBaseModel
+
+class AudioTranscript(TimeBaseModel):
+    """Transcript of an audio clip, keyed by content hash and the STT engine version that produced it."""
+    sha256 = models.CharField(max_length=64)
+    engine = models.CharField(max_length=100)
+    text = models.TextField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['sha256', 'engine'], name='audiotranscript_sha_engine_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.engine}): {self.text[:30]}"
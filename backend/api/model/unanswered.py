@@ -1,15 +1,32 @@
 from backend.basemodel import TimeBaseModel
 from django.db import models
 from django.conf import settings
+from .unansweredcluster import UnansweredCluster
+
+class UnansweredQuerySet(models.QuerySet):
+    def answered(self, value: bool = True):
+        return self.filter(is_answered=value)
+
 
 class Unanswered(TimeBaseModel):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='unanswered')
     question = models.TextField()
     answer = models.TextField()
     is_answered = models.BooleanField(default=False)
+    # Set by the clustering job; null until the question has been embedded
+    cluster = models.ForeignKey(UnansweredCluster, null=True, blank=True, on_delete=models.SET_NULL,
+                                related_name='questions')
+
+    objects = UnansweredQuerySet.as_manager()
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Only answered questions are exported, oldest first; the partial
+            # index leaves the (much larger) open backlog out
+            models.Index(fields=['created_at', 'id'], condition=models.Q(is_answered=True),
+                         name='unanswered_answered_ts_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.email} - {self.question[:50]}"
\ No newline at end of file
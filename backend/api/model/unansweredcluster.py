@@ -0,0 +1,22 @@
+import numpy as np
+from django.db import models
+from backend.basemodel import TimeBaseModel
+
+class UnansweredCluster(TimeBaseModel):
+    """Near-identical unanswered questions, grouped by embedding similarity (see ``api.utils.clustering``)."""
+    label = models.TextField()  # first question seen; stands for the whole cluster
+    size = models.PositiveIntegerField(default=0)  # questions ever assigned, including purged ones
+    centroid = models.BinaryField()  # unit-length float32 mean of the members' embeddings
+    last_seen_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-size'], name='unansweredcluster_size_idx'),
+        ]
+
+    @property
+    def vector(self) -> np.ndarray:
+        return np.frombuffer(bytes(self.centroid), dtype=np.float32)
+
+    def __str__(self):
+        return f"{self.label[:50]} ({self.size})"
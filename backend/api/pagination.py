@@ -0,0 +1,88 @@
+# api/pagination.py
+"""Keyset (cursor) pagination on a ``(timestamp field, id)`` pair.
+
+Pages are selected with ``WHERE (ts, id) < cursor`` style predicates instead of
+OFFSET, so the cost of any page - including the default "latest" page - is
+independent of how many rows the user has. Cursors are opaque, URL-safe
+strings encoding the boundary row's ``(ts, id)``.
+
+Query parameters:
+    limit   page size (default/max per endpoint)
+    before  return rows older than this cursor
+    after   return rows newer than this cursor
+"""
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+
+def encode_cursor(ts: datetime, pk: int) -> str:
+    raw = f"{ts.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        ts, pk = base64.urlsafe_b64decode(padded).decode().rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise ValidationError({"cursor": "Invalid cursor."})
+
+
+def _parse_limit(value, default: int, maximum: int) -> int:
+    if value in (None, ""):
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValidationError({"limit": "Must be an integer."})
+    return max(1, min(limit, maximum))
+
+
+def keyset_page(queryset, params, ts_field: str, default_limit: int = 50, max_limit: int = 100,
+                newest_first: bool = True, values: tuple = ()) -> dict:
+    """Return one page of ``queryset`` plus cursors for the neighbouring pages.
+
+    ``before`` / ``after`` are ``None`` when there are no older / newer rows.
+    ``newest_first`` controls display order only (sessions list newest first,
+    messages read oldest first); without a cursor the page always holds the
+    most recent rows. ``values`` must include ``ts_field`` and ``"id"``.
+    """
+    limit = _parse_limit(params.get("limit"), default_limit, max_limit)
+    before, after = params.get("before"), params.get("after")
+    if before and after:
+        raise ValidationError({"cursor": "Use either 'before' or 'after', not both."})
+
+    desc = (f"-{ts_field}", "-id")
+    asc = (ts_field, "id")
+
+    # One limit + 1 fetch tells whether the page's own direction goes on; the
+    # other direction is an indexed EXISTS probe from the cursor, if there is one
+    if after:
+        ts, pk = decode_cursor(after)
+        rows = list(
+            queryset.filter(Q(**{f"{ts_field}__gt": ts}) | Q(**{ts_field: ts, "id__gt": pk}))
+            .order_by(*asc).values(*values)[:limit + 1]
+        )
+        has_newer, rows = len(rows) > limit, rows[:limit]
+        has_older = queryset.filter(Q(**{f"{ts_field}__lt": ts}) | Q(**{ts_field: ts, "id__lte": pk})).exists()
+        rows.reverse()  # → newest first
+    else:
+        qs, has_newer = queryset, False
+        if before:
+            ts, pk = decode_cursor(before)
+            qs = qs.filter(Q(**{f"{ts_field}__lt": ts}) | Q(**{ts_field: ts, "id__lt": pk}))
+            has_newer = queryset.filter(Q(**{f"{ts_field}__gt": ts}) | Q(**{ts_field: ts, "id__gte": pk})).exists()
+        rows = list(qs.order_by(*desc).values(*values)[:limit + 1])
+        has_older, rows = len(rows) > limit, rows[:limit]
+
+    # rows are newest first here
+    newest, oldest = (rows[0], rows[-1]) if rows else (None, None)
+    return {
+        "results": rows if newest_first else rows[::-1],
+        "before": encode_cursor(oldest[ts_field], oldest["id"]) if oldest and has_older else None,
+        "after": encode_cursor(newest[ts_field], newest["id"]) if newest and has_newer else None,
+    }
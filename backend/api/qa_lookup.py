@@ -1,95 +1,134 @@
 # nlp/services/qa_lookup.py
 import re
+import numpy as np
 import pandas as pd
-import joblib
 from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.feature_extraction.text import TfidfVectorizer
+from nlp.service.pipeline import AnswerPipeline, AnswerRequest, Stage, StageResult
+from api.utils.utils import (
+    QueryFeatures,
+    TOKEN_RE,
+    vectorizer as tfidf_vectorizer,
+)
 
 # Load data & models
 df = pd.read_csv("api/dataset/train_augmented.csv")
-qa_dict = (
-    df.groupby("qtype")[["Question", "Answer"]]
-    .apply(lambda x: x.to_dict("records"))
-    .to_dict()
-)
-classifier = joblib.load("api/svm_model.pkl")
-tfidf_vectorizer: TfidfVectorizer = joblib.load("api/tfidf_vectorizer.pkl")
+
+# Candidate questions are vectorized once at import; every tier below only
+# slices rows out of this matrix instead of re-transforming its candidates.
+question_matrix = tfidf_vectorizer.transform(df["Question"].fillna("").astype(str))
+question_tokens = [set(TOKEN_RE.findall(str(q).lower())) for q in df["Question"]]
+label_rows = {label: np.asarray(idx) for label, idx in df.groupby("qtype").indices.items()}
+unique_rows = np.flatnonzero(~df.duplicated(subset=["Question", "Answer"]).to_numpy())
+label_unique_rows = {
+    label: np.intersect1d(rows, unique_rows) for label, rows in label_rows.items()
+}
 
 # Config
 # Balance precision and recall for paraphrases while avoiding hallucinations
 TFIDF_THRESHOLD = 0.62
 TOP_K = 5              # number of candidates to re-rank
 
-def rerank_candidates(query: str, candidates: list[dict], query_vec):
-    """Re-rank TF-IDF candidates using keyword overlap."""
-    candidate_questions = [c["Question"] for c in candidates]
-    candidate_answers = [c["Answer"] for c in candidates]
+def rerank_rows(features: QueryFeatures, rows) -> tuple[float, str | None]:
+    """Re-rank dataset rows against the query using TF-IDF + keyword overlap.
 
-    tfidf_matrix = tfidf_vectorizer.transform(candidate_questions)
-    scores = cosine_similarity(query_vec, tfidf_matrix).flatten()
+    Returns ``(score, answer)`` for the best candidate, whether or not it
+    clears ``TFIDF_THRESHOLD``.
+    """
+    if len(rows) == 0:
+        return 0.0, None
+    scores = cosine_similarity(features.vector, question_matrix[rows]).flatten()
 
     # Take top K matches
     top_idx = scores.argsort()[-TOP_K:][::-1]
-    top_candidates = [(scores[i], candidate_answers[i], candidate_questions[i]) for i in top_idx]
 
     # Add keyword overlap boost
-    query_tokens = set(re.findall(r"\b[a-zA-Z]{4,}\b", query.lower()))
     best_score, best_answer = 0, None
-    for s, ans, q in top_candidates:
-        q_tokens = set(re.findall(r"\b[a-zA-Z]{4,}\b", q.lower()))
-        overlap = len(query_tokens & q_tokens)
-        final_score = s + (0.05 * overlap)  # small boost for keyword overlap
+    for i in top_idx:
+        overlap = len(features.tokens & question_tokens[rows[i]])
+        final_score = scores[i] + (0.05 * overlap)  # small boost for keyword overlap
         if final_score > best_score:
-            best_score, best_answer = final_score, ans
+            best_score, best_answer = final_score, df["Answer"].iat[rows[i]]
+
+    return float(best_score), best_answer
+
+def history_rows(history: list | None):
+    """Rows mentioning keywords from the last user message in ``history``."""
+    if not history:
+        return None
+    last_user = None
+    for msg in reversed(history):
+        if msg.get("sender") == "user":
+            last_user = msg.get("message")
+            break
+    if not last_user:
+        return None
+    tokens = TOKEN_RE.findall(last_user.lower())
+    if not tokens:
+        return None
+    pattern = "|".join(re.escape(t) for t in set(tokens[:6]))
+    mask = df["Question"].str.contains(pattern, case=False, na=False) | df["Answer"].str.contains(pattern, case=False, na=False)
+    return np.flatnonzero(mask.to_numpy())
+
+# ---- Pipeline stages ----
+def _features(request: AnswerRequest) -> QueryFeatures:
+    if request.features is None:
+        request.features = QueryFeatures(request.raw_query, request.context)
+    return request.features
 
-    return best_answer if best_score >= TFIDF_THRESHOLD else None
+def label_tier(request: AnswerRequest) -> StageResult | None:
+    """Primary: search within predicted label."""
+    rows = label_rows.get(request.label)
+    if rows is None:
+        return None
+    score, answer = rerank_rows(_features(request), rows)
+    return StageResult(answer, score)
 
-def get_answer(query: str, label: str = None, context: str = None, history: list = None) -> str | None:
+def label_unique_tier(request: AnswerRequest) -> StageResult | None:
+    """Secondary: same label, duplicates removed so top-K holds distinct questions."""
+    rows = label_unique_rows.get(request.label)
+    if rows is None:
+        return None
+    score, answer = rerank_rows(_features(request), rows)
+    return StageResult(answer, score)
+
+def cross_label_tier(request: AnswerRequest) -> StageResult | None:
+    """Cross-label fallback: search across the entire dataset."""
+    score, answer = rerank_rows(_features(request), unique_rows)
+    return StageResult(answer, score)
+
+def history_tier(request: AnswerRequest) -> StageResult | None:
+    """Last resort: history-based keyword match."""
+    rows = history_rows(request.history)
+    if rows is None:
+        return None
+    score, answer = rerank_rows(_features(request), rows)
+    return StageResult(answer, score)
+
+TFIDF_STAGES = [
+    Stage("tfidf_label", label_tier, cost_ms=5, min_confidence=TFIDF_THRESHOLD,
+          accept_confidence=TFIDF_THRESHOLD),
+    Stage("tfidf_label_unique", label_unique_tier, cost_ms=5, min_confidence=TFIDF_THRESHOLD,
+          accept_confidence=TFIDF_THRESHOLD),
+    Stage("tfidf_cross_label", cross_label_tier, cost_ms=40, min_confidence=TFIDF_THRESHOLD,
+          accept_confidence=TFIDF_THRESHOLD),
+    Stage("tfidf_history", history_tier, cost_ms=80, min_confidence=TFIDF_THRESHOLD,
+          accept_confidence=TFIDF_THRESHOLD),
+]
+
+# Any answer that clears the threshold is accepted, matching the original tier order
+pipeline = AnswerPipeline(TFIDF_STAGES, accept_confidence=TFIDF_THRESHOLD)
+
+def get_answer(query: str, label: str = None, context: str = None, history: list = None,
+               features: QueryFeatures | None = None) -> str | None:
     """
     Lookup an answer for the given query using SVM/TF-IDF similarity.
     Returns None if no confident match is found.
+
+    Pass the request's ``features`` to reuse the vector already computed for
+    classification; otherwise one is built from ``query`` and ``context``.
     """
-    query_text = (context + "\nUser: " + query) if context else query
-    query_vec = tfidf_vectorizer.transform([query_text])
-
-    if label and label in qa_dict:
-        # Primary: search within predicted label
-        candidates = qa_dict[label]
-        best = rerank_candidates(query, candidates, query_vec)
-        if best:
-            return best
-
-        # Secondary: allow nearby candidates within the same label dataframe (duplicates removed)
-        label_df = df[df["qtype"] == label]
-        if not label_df.empty:
-            fallback_candidates = label_df[["Question", "Answer"]].drop_duplicates().to_dict("records")
-            best = rerank_candidates(query, fallback_candidates, query_vec)
-            if best:
-                return best
-
-    # Cross-label fallback: search across the entire dataset if label-specific search failed
-    all_candidates = df[["Question", "Answer"]].drop_duplicates().to_dict("records")
-    best = rerank_candidates(query, all_candidates, query_vec)
-    if best:
-        return best
-
-    # Last resort: history-based keyword match
-    if history:
-        last_user = None
-        for msg in reversed(history):
-            if msg.get("sender") == "user":
-                last_user = msg.get("message")
-                break
-        if last_user:
-            tokens = re.findall(r"\b[a-zA-Z]{4,}\b", last_user.lower())
-            if tokens:
-                pattern = "|".join(re.escape(t) for t in set(tokens[:6]))
-                mask = df["Question"].str.contains(pattern, case=False, na=False) | df["Answer"].str.contains(pattern, case=False, na=False)
-                cand = df[mask]
-                if not cand.empty:
-                    hist_candidates = cand[["Question", "Answer"]].to_dict("records")
-                    best = rerank_candidates(query, hist_candidates, query_vec)
-                    if best:
-                        return best
-
-    return None
+    request = AnswerRequest(
+        query=query, raw_query=query, label=label, context=context,
+        history=history, features=features,
+    )
+    return pipeline.run(request).answer
@@ -0,0 +1,211 @@
+# api/scheduler.py
+"""Periodic jobs, run by exactly one process at a time.
+
+Every process that starts the scheduler runs a small elector thread. It tries
+to take or renew a row in ``SchedulerLease`` every ``SCHEDULER_HEARTBEAT``
+seconds; the lease lasts ``SCHEDULER_LEASE_TTL`` seconds, so when the leader
+dies another process takes over within one TTL. Only the lease holder runs an
+APScheduler instance, which enqueues the Celery tasks (it is the only
+dispatcher; there is no ``celery beat``); everyone else stays idle. Jobs also
+check the lease just before running, so a leader that lost it (e.g. after a
+long pause) does not run them a second time.
+
+Lease times come from each host's clock; keep the TTL well above any expected
+clock skew between hosts.
+"""
+import atexit
+import logging
+import os
+import socket
+import sys
+import threading
+import uuid
+from datetime import timedelta
+from functools import wraps
+
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.cron import CronTrigger
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+from django.utils import timezone
+
+from . import tasks
+from .model.schedulerlease import SchedulerLease
+
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = "periodic-jobs"
+LEASE_TTL = getattr(settings, "SCHEDULER_LEASE_TTL", 60)
+HEARTBEAT = getattr(settings, "SCHEDULER_HEARTBEAT", 15)
+
+
+def dispatch(task, prefix: str, hourly: bool = False):
+    """Enqueue ``task`` with the idempotency key of the period it is sent in."""
+    def send():
+        return task.delay(idempotency_key=tasks.run_key(prefix, hourly))
+    send.__name__ = f"dispatch_{prefix}"
+    return send
+
+
+def default_jobs():
+    # The leader only enqueues; Celery workers on the routed queues do the work
+    return [
+        (dispatch(tasks.send_health_tips, "send_health_tips"), CronTrigger(hour=8, minute=0), "send_health_tips"),
+        (dispatch(tasks.export_unanswered, "export_unanswered"),
+         CronTrigger(day_of_week="sun", hour=0, minute=0), "export_unanswered"),
+        (dispatch(tasks.archive_history, "archive_history"), CronTrigger(hour=3, minute=0), "archive_history"),
+        (dispatch(tasks.cluster_unanswered_questions, "cluster_unanswered", hourly=True),
+         CronTrigger(minute=15), "cluster_unanswered_questions"),
+    ]
+
+
+class Lease:
+    """A named, expiring lock row; ``acquire`` both takes a free lease and renews our own."""
+
+    def __init__(self, name: str = LEASE_NAME, ttl: float = LEASE_TTL, holder: str | None = None):
+        self.name = name
+        self.ttl = ttl
+        self.holder = holder or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def acquire(self) -> bool:
+        now = timezone.now()
+        expires = now + timedelta(seconds=self.ttl)
+        renewed = SchedulerLease.objects.filter(name=self.name, holder=self.holder).update(
+            renewed_at=now, expires_at=expires,
+        )
+        if renewed:
+            return True
+        taken = SchedulerLease.objects.filter(name=self.name, expires_at__lt=now).update(
+            holder=self.holder, acquired_at=now, renewed_at=now, expires_at=expires,
+        )
+        if taken:
+            return True
+        _, created = SchedulerLease.objects.get_or_create(name=self.name, defaults={
+            "holder": self.holder, "acquired_at": now, "renewed_at": now, "expires_at": expires,
+        })
+        return created
+
+    def held(self) -> bool:
+        return SchedulerLease.objects.filter(
+            name=self.name, holder=self.holder, expires_at__gt=timezone.now(),
+        ).exists()
+
+    def release(self):
+        SchedulerLease.objects.filter(name=self.name, holder=self.holder).update(expires_at=timezone.now())
+
+
+class LeaderScheduler:
+    """Runs ``jobs`` in this process only while it holds the lease."""
+
+    def __init__(self, jobs=None, lease: Lease | None = None, heartbeat: float = HEARTBEAT):
+        self.jobs = jobs
+        self.lease = lease or Lease()
+        self.heartbeat = heartbeat
+        self.scheduler = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self.scheduler is not None
+
+    def _guard(self, func, job_id):
+        @wraps(func)
+        def run(*args, **kwargs):
+            close_old_connections()
+            try:
+                if not self.lease.held():
+                    logger.warning("skipping %s: scheduler lease lost", job_id)
+                    return None
+                return func(*args, **kwargs)
+            finally:
+                close_old_connections()
+        return run
+
+    def _lead(self):
+        self.scheduler = BackgroundScheduler()
+        for func, trigger, job_id in (self.jobs if self.jobs is not None else default_jobs()):
+            self.scheduler.add_job(self._guard(func, job_id), trigger, id=job_id, max_instances=1, coalesce=True)
+        self.scheduler.start()
+        logger.info("scheduler lease taken by %s", self.lease.holder)
+
+    def _follow(self):
+        if self.scheduler is not None:
+            self.scheduler.shutdown(wait=False)
+            self.scheduler = None
+            logger.warning("scheduler lease lost by %s", self.lease.holder)
+
+    def tick(self):
+        """One election round: take or renew the lease and start or stop the jobs to match."""
+        try:
+            leader = self.lease.acquire()
+        except DatabaseError as e:
+            # Can't prove we still hold it, so stop running jobs
+            logger.warning("scheduler lease check failed: %s", e)
+            leader = False
+        finally:
+            close_old_connections()
+        if leader and self.scheduler is None:
+            self._lead()
+        elif not leader:
+            self._follow()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.tick()
+            self._stop.wait(self.heartbeat)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="scheduler-elector", daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def stop(self):
+        """Stop the elector and hand the lease over immediately."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.heartbeat + 5)
+            self._thread = None
+        if self.scheduler is not None:
+            self.scheduler.shutdown(wait=False)
+            self.scheduler = None
+            try:
+                self.lease.release()
+            except DatabaseError:
+                pass
+
+
+_scheduler: LeaderScheduler | None = None
+
+
+# Web servers that may join the election when SCHEDULER_AUTOSTART is on
+SERVER_PROGRAMS = {"gunicorn", "uvicorn", "daphne"}
+
+
+def should_autostart() -> bool:
+    """Opt-in: with SCHEDULER_AUTOSTART, web servers join the election.
+
+    Celery workers and beat, management commands, shells, ``python -c`` and
+    test runners never do; ``manage.py run_scheduler`` is the usual way to
+    run the jobs.
+    """
+    if not getattr(settings, "SCHEDULER_AUTOSTART", False):
+        return False
+    program = os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else ""
+    if program == "__main__.py":  # python -m gunicorn
+        program = os.path.basename(os.path.dirname(sys.argv[0]))
+    if program == "manage.py":
+        # The autoreloader's parent process only watches files; its child serves
+        return sys.argv[1:2] == ["runserver"] and (
+            os.environ.get("RUN_MAIN") == "true" or "--noreload" in sys.argv
+        )
+    return program in SERVER_PROGRAMS
+
+
+def start_scheduler() -> LeaderScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = LeaderScheduler()
+        _scheduler.start()
+    return _scheduler
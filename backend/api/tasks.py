@@ -1,39 +1,146 @@
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
-import csv
-import os
-from django.utils import timezone
-from django.conf import settings
+from celery import shared_task
+from celery.exceptions import SoftTimeLimitExceeded
+import logging
 from datetime import timedelta
-from .model.unanswered import Unanswered
+from django.db import DatabaseError
+from django.db.models import Q
+from django.utils import timezone
+from .utils.exports import export_answered, purge_unanswered
+from .utils.taskruns import task_run
 from .utils.utils import fetch_daily_health_tip
+from .utils.archive import archive_inactive_sessions
+from .model.audiojob import AudioJob
+from .utils.audio import AudioDecodeError, AudioRejected, audio_digest, decode_upload
+from .utils.stt import STTError
+from .utils.voice import answer_voice_message, cached_transcript, stt_error, transcribe_cached
+
+logger = logging.getLogger(__name__)
+
+# Periodic tasks take an idempotency key, fixed by the scheduler when it dispatches
+# them (one run per period); called without one, the current period is used.
+# They are routed to their own queues (see CELERY_TASK_ROUTES).
+
+def run_key(prefix: str, hourly: bool = False) -> str:
+    """Idempotency key for this day's (or this hour's) run of a periodic task."""
+    if hourly:
+        return f"{prefix}:{timezone.now():%Y-%m-%dT%H}"
+    return f"{prefix}:{timezone.localdate()}"
 
 
-def send_health_tips():
-    fetch_daily_health_tip(force_refresh=True)
+@shared_task(bind=True, acks_late=True, max_retries=3, default_retry_delay=300,
+             soft_time_limit=120, time_limit=180)
+def send_health_tips(self, idempotency_key=None):
+    key = idempotency_key or run_key("send_health_tips")
+    with task_run(key, self.name, stale_after=self.time_limit) as claimed:
+        if not claimed:
+            return f"skipped: {key} already ran"
+        if not fetch_daily_health_tip(force_refresh=True):
+            # Nothing fetched and nothing left in the pool; try again later
+            raise self.retry()
     return "✅ Daily health tips sent"
 
 
-def export_unanswered():
-    today_str = timezone.now().strftime("%Y-%m-%d")
-    export_filename = f"unanswered_export_{today_str}.csv"
-    export_path = os.path.join(settings.BASE_DIR, "exports", export_filename)
+@shared_task(bind=True, acks_late=True, autoretry_for=(OSError, DatabaseError),
+             retry_backoff=60, max_retries=3, soft_time_limit=30 * 60, time_limit=35 * 60)
+def export_unanswered(self, idempotency_key=None):
+    key = idempotency_key or run_key("export_unanswered")
+    with task_run(key, self.name, stale_after=self.time_limit) as claimed:
+        if not claimed:
+            return f"skipped: {key} already ran"
+        return _export_unanswered(self)
+
+
+def _export_unanswered(task):
+    def progress(stage, done):
+        logger.info("unanswered %s: %d rows", stage, done)
+        if task.request.id and not task.request.is_eager:
+            task.update_state(state="PROGRESS", meta={"stage": stage, "rows": done})
+
+    paths, exported = export_answered(progress=progress)
+    deleted = purge_unanswered(progress=progress)
+    return f"✅ Export complete → {', '.join(paths)} ({exported} rows), deleted {deleted} old records"
+
+@shared_task(bind=True, acks_late=True, autoretry_for=(DatabaseError,), retry_backoff=60, max_retries=3,
+             soft_time_limit=60 * 60, time_limit=65 * 60)
+def archive_history(self, idempotency_key=None):
+    key = idempotency_key or run_key("archive_history")
+    with task_run(key, self.name, stale_after=self.time_limit) as claimed:
+        if not claimed:
+            return f"skipped: {key} already ran"
+        sessions, messages = archive_inactive_sessions()
+    return f"✅ Archived {messages} messages from {sessions} inactive sessions"
+
+@shared_task(bind=True, acks_late=True, autoretry_for=(DatabaseError,), retry_backoff=60, max_retries=3,
+             soft_time_limit=30 * 60, time_limit=35 * 60)
+def cluster_unanswered_questions(self, idempotency_key=None):
+    from .utils.clustering import ClusteringBusy, cluster_unanswered  # faiss + the embedding model, index worker only
+    key = idempotency_key or run_key("cluster_unanswered", hourly=True)
+    with task_run(key, self.name, stale_after=self.time_limit) as claimed:
+        if not claimed:
+            return f"skipped: {key} already ran"
+        try:
+            stats = cluster_unanswered()
+        except ClusteringBusy:
+            # e.g. ``manage.py cluster_unanswered --rebuild``; it clusters everything pending
+            return f"skipped: {key}, clustering already running"
+    return f"✅ Clustered {stats['questions']} questions ({stats['new_clusters']} new clusters)"
 
-    os.makedirs(os.path.dirname(export_path), exist_ok=True)
+# A job left RUNNING this long was lost with its worker (acks_late redelivers it)
+AUDIO_JOB_STALE_AFTER = 6 * 60
 
-    with open(export_path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(["Question", "Answer"])  
-        for item in Unanswered.objects.filter(is_answered=True):
-            writer.writerow([item.question, item.answer])
 
-    cutoff = timezone.now() - timedelta(days=7)
-    deleted, _ = Unanswered.objects.filter(created_at__lt=cutoff).delete()
+@shared_task(bind=True, acks_late=True, autoretry_for=(DatabaseError,), retry_backoff=10, max_retries=3,
+             soft_time_limit=5 * 60, time_limit=AUDIO_JOB_STALE_AFTER)
+def transcribe_audio_job(self, job_id):
+    """Transcribe and answer a queued voice message, recording the outcome on the job."""
+    stale = timezone.now() - timedelta(seconds=AUDIO_JOB_STALE_AFTER)
+    claimable = Q(status=AudioJob.PENDING) | Q(status=AudioJob.RUNNING, updated_at__lt=stale)
+    if self.request.retries:
+        # A database error retried the task: its own attempt left the job RUNNING
+        claimable |= Q(status=AudioJob.RUNNING)
+    updated = AudioJob.objects.filter(claimable, pk=job_id).update(
+        status=AudioJob.RUNNING, updated_at=timezone.now(),
+    )
+    if not updated:
+        return  # already picked up (duplicate delivery), finished or gone
+    job = AudioJob.objects.select_related("message__session").get(pk=job_id)
 
-    return f"✅ Export complete → {export_path}, deleted {deleted} old records"
+    try:
+        digest = audio_digest(job.message.audio)
+        transcript = cached_transcript(digest)
+        if transcript is None:
+            with job.message.audio.open("rb") as audio:
+                pcm = decode_upload(audio)
+            transcript = transcribe_cached(digest, pcm)
+        result = answer_voice_message(job.message, transcript)
+    except AudioRejected as e:
+        job.status, job.error, job.error_status = AudioJob.FAILED, str(e), 413
+    except AudioDecodeError as e:
+        job.status, job.error, job.error_status = AudioJob.FAILED, f"Could not decode audio: {e}", 400
+    except STTError as e:
+        job.error_status, job.error = stt_error(e)
+        job.status = AudioJob.FAILED
+    except SoftTimeLimitExceeded:
+        job.status, job.error, job.error_status = AudioJob.FAILED, "Transcription timed out", 504
+    except DatabaseError as e:
+        if self.request.retries < self.max_retries:
+            raise  # autoretry_for
+        job.status, job.error, job.error_status = AudioJob.FAILED, f"Audio processing failed: {e}", 503
+    except Exception as e:
+        job.status, job.error, job.error_status = AudioJob.FAILED, f"Audio processing failed: {e}", 500
+    else:
+        job.status = AudioJob.DONE
+        job.transcript, job.label, job.answer = result["transcript"], result["label"], result["answer"]
+    job.save()
 
-scheduler = BackgroundScheduler()
 
-scheduler.add_job(send_health_tips, CronTrigger(hour=8, minute=0), id="send_health_tips")
-scheduler.add_job(export_unanswered, CronTrigger(day_of_week="sun", hour=0, minute=0), id="export_unanswered")
-scheduler.start()
+def enqueue_audio_job(job: AudioJob):
+    """Queue ``job`` for transcription; marks it FAILED when the broker cannot take it."""
+    try:
+        transcribe_audio_job.delay(str(job.id))
+    except Exception as e:
+        logger.exception("could not queue audio job %s", job.id)
+        job.status, job.error, job.error_status = AudioJob.FAILED, f"Could not queue transcription: {e}", 503
+        AudioJob.objects.filter(pk=job.pk, status=AudioJob.PENDING).update(
+            status=job.status, error=job.error, error_status=job.error_status, updated_at=timezone.now(),
+        )
@@ -0,0 +1,32 @@
+from itertools import count
+
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.tokens import AccessToken
+
+from nlp.service.pipeline import PipelineResult
+from api.utils.chat import TurnAnswer
+
+_emails = count(1)
+
+
+def make_user(**fields):
+    fields.setdefault("email", f"user{next(_emails)}@example.com")
+    return get_user_model().objects.create(first_name="Test", last_name="User", **fields)
+
+
+def bearer(user) -> dict:
+    """``headers=`` for a request to the JWT-authenticated views."""
+    return {"Authorization": f"Bearer {AccessToken.for_user(user)}"}
+
+
+def fake_classify(question, history):
+    return TurnAnswer(context_text=f"User: {question}", label="symptoms", features=None)
+
+
+def fake_retrieve(answer=None):
+    """A ``retrieve_answer`` replacement that answers every turn with ``answer`` (None = a miss)."""
+    def retrieve(turn, question, history):
+        turn.result = PipelineResult(answer=answer, confidence=1.0 if answer else 0.0,
+                                     stage="dataset_exact" if answer else None)
+        return turn
+    return retrieve
@@ -0,0 +1,61 @@
+import csv
+import io
+from datetime import timedelta
+
+from django.contrib import admin
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import path, reverse
+from django.utils import timezone
+
+from api.admin import CachedAnswerAdmin, UnansweredAdmin
+from api.model.cache import CachedAnswer
+from api.model.unanswered import Unanswered
+from .helpers import make_user
+
+# The project URLconf also loads the nlp app, which needs the embedding model
+urlpatterns = [path("admin/", admin.site.urls)]
+
+
+def read_csv(response) -> list[list[str]]:
+    return list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AdminExportTests(TestCase):
+    def setUp(self):
+        self.admin_user = make_user(is_staff=True, is_superuser=True)
+        self.request = RequestFactory().post("/")
+        self.request.user = self.admin_user
+        self.user = make_user()
+        for n in range(3):
+            Unanswered.objects.create(user=self.user, question=f"Q{n}?", answer=f"A{n}.")
+        expires = timezone.now() + timedelta(days=1)
+        CachedAnswer.objects.bulk_create(
+            CachedAnswer(user=make_user(), query_text=f"q{n}", answer=f"a{n}", expires_at=expires) for n in range(3)
+        )
+
+    def test_unanswered_export_streams_every_selected_row(self):
+        action = UnansweredAdmin(Unanswered, admin.site).export_to_csv
+        with self.assertNumQueries(1):
+            rows = read_csv(action(self.request, Unanswered.objects.all()))
+        self.assertEqual(rows[0], ["Question", "Answer"])
+        self.assertEqual(sorted(rows[1:]), [["Q0?", "A0."], ["Q1?", "A1."], ["Q2?", "A2."]])
+
+    def test_cached_answer_export_reads_emails_in_the_same_query(self):
+        action = CachedAnswerAdmin(CachedAnswer, admin.site).export_to_csv
+        with self.assertNumQueries(1):
+            response = action(self.request, CachedAnswer.objects.all())
+            rows = read_csv(response)
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="cached_answer_export.csv"')
+        self.assertEqual(rows[0], ["User", "Query Text", "Answer", "Expires At"])
+        emails = dict(CachedAnswer.objects.values_list("query_text", "user__email"))
+        self.assertEqual(sorted((r[0], r[1]) for r in rows[1:]), sorted((e, q) for q, e in emails.items()))
+
+    def test_export_action_from_the_changelist(self):
+        self.client.force_login(self.admin_user)
+        selected = Unanswered.objects.filter(question__in=["Q0?", "Q2?"]).values_list("pk", flat=True)
+        response = self.client.post(reverse("admin:api_unanswered_changelist"), {
+            "action": "export_to_csv", "_selected_action": [str(pk) for pk in selected],
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(read_csv(response)[1:]), [["Q0?", "A0."], ["Q2?", "A2."]])
@@ -0,0 +1,72 @@
+from django.contrib import admin
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import path, reverse
+from django.utils import timezone
+
+from api.admin import EstimatedCountPaginator
+from api.model.answer import AnswerCatalog
+from api.model.history import History
+from api.model.session import ChatSession
+from api.model.unanswered import Unanswered
+from .helpers import make_user
+
+# The project URLconf also loads the nlp app, which needs the embedding model
+urlpatterns = [path("admin/", admin.site.urls)]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AdminChangelistTests(TestCase):
+    def setUp(self):
+        self.client.force_login(make_user(is_staff=True, is_superuser=True))
+
+    def add_sessions(self, user, count):
+        for n in range(count):
+            session = ChatSession.objects.create(user=user, title=f"chat {n}")
+            History.objects.create(session=session, sender="user", message=f"question {n}")
+            History.objects.create(session=session, sender="bot", answer=AnswerCatalog.objects.intern(f"answer {n}"))
+            Unanswered.objects.create(user=user, question=f"question {n}", answer="")
+
+    def changelist_queries(self, model, **params):
+        url = reverse(f"admin:api_{model}_changelist")
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), response
+
+    def test_changelists_do_not_query_per_row(self):
+        user = make_user()
+        self.add_sessions(user, 2)
+        before = {m: self.changelist_queries(m)[0] for m in ("chatsession", "history", "unanswered")}
+        self.add_sessions(user, 5)
+        after = {m: self.changelist_queries(m)[0] for m in ("chatsession", "history", "unanswered")}
+        self.assertEqual(after, before)
+
+    def test_user_search_is_an_exact_email_match(self):
+        alice, alicia = make_user(email="alice@example.com"), make_user(email="alice@example.org")
+        self.add_sessions(alice, 1)
+        self.add_sessions(alicia, 2)
+        _, response = self.changelist_queries("history", q="alice@example.com")
+        self.assertEqual(response.context["cl"].result_count, 2)
+        _, response = self.changelist_queries("chatsession", q="alice@example")
+        self.assertEqual(response.context["cl"].result_count, 0)
+
+    def test_history_drills_down_by_date(self):
+        self.add_sessions(make_user(), 2)
+        today = timezone.localtime(History.objects.first().timestamp)
+        _, response = self.changelist_queries(
+            "history", timestamp__year=today.year, timestamp__month=today.month, timestamp__day=today.day,
+        )
+        self.assertEqual(response.context["cl"].result_count, 4)
+
+    def test_every_changelist_renders(self):
+        self.add_sessions(make_user(), 1)
+        for model in ("chatsession", "history", "healthtip", "dailytip", "unanswered", "cachedanswer",
+                      "archivedsession", "schedulerlease", "taskrun", "unansweredcluster"):
+            with self.subTest(model=model):
+                self.assertEqual(self.changelist_queries(model)[1].status_code, 200)
+
+    def test_estimated_count_falls_back_to_an_exact_count(self):
+        self.add_sessions(make_user(), 3)
+        self.assertEqual(EstimatedCountPaginator(History.objects.order_by("id"), 2).count, 6)
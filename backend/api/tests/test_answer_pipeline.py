@@ -0,0 +1,84 @@
+import dataclasses
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from nlp.service import services
+from nlp.service.pipeline import AnswerPipeline, AnswerRequest, Stage, StageResult
+
+
+def fixed(answer, confidence):
+    return lambda request: StageResult(answer, confidence) if answer else None
+
+
+class AnswerPipelineTests(SimpleTestCase):
+    def run_pipeline(self, stages, **kwargs):
+        return AnswerPipeline(stages, **kwargs).run(AnswerRequest(query="q", raw_query="q"))
+
+    def test_stage_accept_threshold_returns_early(self):
+        later = mock.Mock(return_value=StageResult("later", 0.99))
+        result = self.run_pipeline([
+            Stage("faiss", fixed("faiss answer", 0.65), min_confidence=0.6, accept_confidence=0.6),
+            Stage("later", later),
+        ], accept_confidence=0.8)
+        self.assertEqual((result.stage, result.answer), ("faiss", "faiss answer"))
+        later.assert_not_called()
+
+    def test_unaccepted_answer_is_not_replaced_across_scales(self):
+        result = self.run_pipeline([
+            Stage("first", fixed("first", 0.5)),
+            Stage("second", fixed("second", 0.7)),
+        ], accept_confidence=0.8)
+        self.assertEqual(result.stage, "first")
+
+    def test_later_accepted_answer_replaces_an_unaccepted_one(self):
+        result = self.run_pipeline([
+            Stage("first", fixed("first", 0.5)),
+            Stage("second", fixed("second", 0.3), accept_confidence=0.2),
+        ], accept_confidence=0.8)
+        self.assertEqual(result.stage, "second")
+
+    def test_below_min_confidence_is_a_miss(self):
+        result = self.run_pipeline([Stage("faiss", fixed("x", 0.5), min_confidence=0.6)])
+        self.assertIsNone(result.answer)
+        self.assertEqual(result.timings[0]["status"], "miss")
+
+    def test_budget_skips_expensive_stages(self):
+        result = self.run_pipeline([
+            Stage("slow", fixed("slow", 1.0), cost_ms=500),
+            Stage("cheap", fixed("cheap", 1.0), cost_ms=1),
+        ], budget_ms=10)
+        self.assertEqual([t["status"] for t in result.timings], ["skipped", "hit"])
+        self.assertEqual(result.answer, "cheap")
+
+
+class DefaultStagesTests(SimpleTestCase):
+    """The default stages keep the original early-return order."""
+
+    def answer(self, accept=0.8, **hits):
+        # Keep the real stage declarations (order and thresholds), fake what they find
+        stages = [
+            dataclasses.replace(stage, run=lambda request, name=stage.name: hits.get(name))
+            for stage in services.default_stages()
+        ]
+        return AnswerPipeline(stages, accept_confidence=accept).run(AnswerRequest(query="q", raw_query="q", label="x"))
+
+    def test_faiss_between_thresholds_is_accepted(self):
+        result = self.answer(faiss=StageResult("faiss", 0.65), smalltalk=StageResult("hi", 0.1))
+        self.assertEqual(result.stage, "faiss")
+
+    def test_fuzzy_match_returns_before_faiss(self):
+        result = self.answer(dataset_fuzzy=StageResult("fuzzy", 0.82), faiss=StageResult("faiss", 0.95))
+        self.assertEqual(result.stage, "dataset_fuzzy")
+
+    def test_faiss_below_threshold_falls_through(self):
+        result = self.answer(faiss=StageResult("faiss", 0.5), smalltalk=StageResult("hi", 0.1))
+        self.assertEqual(result.stage, "smalltalk")
+
+    def test_tfidf_tiers_are_not_in_the_chain(self):
+        self.assertEqual([stage.name for stage in services.default_stages()],
+                         ["dataset_exact", "dataset_fuzzy", "faiss", "smalltalk"])
+
+    def test_fuzzy_match_is_accepted_at_the_pipeline_confidence(self):
+        result = self.answer(accept=0.9, dataset_fuzzy=StageResult("fuzzy", 0.85), faiss=StageResult("faiss", 0.7))
+        self.assertEqual(result.stage, "faiss")
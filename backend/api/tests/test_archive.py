@@ -0,0 +1,101 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from api.model.answer import AnswerCatalog
+from api.model.archive import ArchivedSession
+from api.model.history import History
+from api.model.session import ChatSession
+from api.utils.archive import archive_inactive_sessions, archive_session, rehydrate_session
+from rest_framework.test import APIClient
+
+from .helpers import bearer, make_user
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.session = ChatSession.objects.create(user=self.user, title="malaria")
+        self.question = History.objects.create(session=self.session, sender="user", message="what is malaria")
+        self.reply = History.objects.create(
+            session=self.session, sender="bot", answer=AnswerCatalog.objects.intern("A disease.")
+        )
+
+    def age(self, session, days):
+        ChatSession.objects.filter(pk=session.pk).update(updated_at=timezone.now() - timedelta(days=days))
+
+    def test_round_trip_keeps_ids_timestamps_and_catalog_references(self):
+        before = list(History.objects.order_by("id").values("id", "sender", "message", "answer_id", "timestamp"))
+
+        self.assertEqual(archive_session(self.session.id), 2)
+        self.assertFalse(History.objects.exists())
+        self.session.refresh_from_db()
+        self.assertFalse(self.session.is_active)
+
+        self.assertEqual(rehydrate_session(self.session), 2)
+        after = list(History.objects.order_by("id").values("id", "sender", "message", "answer_id", "timestamp"))
+        self.assertEqual(after, before)
+        self.assertEqual(History.objects.get(sender="bot").body, "A disease.")
+        self.assertFalse(ArchivedSession.objects.exists())
+
+    def test_only_idle_sessions_are_archived(self):
+        recent = ChatSession.objects.create(user=self.user, title="recent")
+        History.objects.create(session=recent, sender="user", message="hi")
+        self.age(self.session, 120)
+
+        self.assertEqual(archive_inactive_sessions(days=90), (1, 2))
+        self.assertEqual(list(History.objects.values_list("session_id", flat=True)), [recent.id])
+
+    def test_rehydrated_session_is_not_archived_again(self):
+        self.age(self.session, 120)
+        archive_inactive_sessions(days=90)
+        rehydrate_session(ChatSession.objects.get(pk=self.session.pk))
+
+        self.assertEqual(archive_inactive_sessions(days=90), (0, 0))
+        self.assertEqual(History.objects.count(), 2)
+
+    @override_settings(ROOT_URLCONF="api.urls")
+    def test_opening_an_archived_session_restores_it(self):
+        archive_session(self.session.id)
+        updated_at = ChatSession.objects.get(pk=self.session.pk).updated_at
+        response = APIClient(headers=bearer(self.user)).get(reverse("chat-session-messages", args=[self.session.id]))
+
+        self.assertEqual([row["message"] for row in response.json()["results"]], ["what is malaria", "A disease."])
+        self.session.refresh_from_db()
+        self.assertTrue(self.session.is_active)
+        self.assertGreater(self.session.rehydrated_at, timezone.now() - timedelta(minutes=1))
+        # Reading is not activity in the session list: its keyset position stays put
+        self.assertEqual(self.session.updated_at, updated_at)
+
+
+class AnswerCatalogMigrationTests(TransactionTestCase):
+    before = [("api", "0008_session_message_counters")]
+    after = [("api", "0009_answer_catalog")]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_repeated_bot_answers_move_to_the_catalog(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        apps = executor.loader.project_state(self.before).apps
+        session = apps.get_model("api", "ChatSession").objects.create(user_id=make_user().pk, title="t")
+        History = apps.get_model("api", "History")
+        for body in ["Rest.", "Rest.", "Fluids.", "Fluids.", "Once."]:
+            History.objects.create(session=session, sender="bot", message=body)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+        History = executor.loader.project_state(self.after).apps.get_model("api", "History")
+
+        self.assertEqual(History.objects.filter(answer__isnull=False).count(), 4)
+        self.assertEqual(History.objects.get(answer__isnull=True).message, "Once.")
+        self.assertEqual(
+            sorted(History.objects.filter(answer__isnull=False).values_list("answer__body", flat=True)),
+            ["Fluids.", "Fluids.", "Rest.", "Rest."],
+        )
@@ -0,0 +1,80 @@
+import io
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+import wave
+
+import numpy as np
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+
+from api.utils.audio import (
+    MAX_UPLOAD_BYTES,
+    SAMPLE_RATE,
+    AudioDecodeError,
+    AudioRejected,
+    AudioUploadHandler,
+    decode_upload,
+)
+
+
+def wav_bytes(seconds: float, rate: int = SAMPLE_RATE) -> bytes:
+    t = np.arange(int(seconds * rate)) / rate
+    samples = (np.sin(2 * np.pi * 440 * t) * 8000).astype(np.int16)
+    out = io.BytesIO()
+    with wave.open(out, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(samples.tobytes())
+    return out.getvalue()
+
+
+@unittest.skipUnless(shutil.which("ffmpeg"), "ffmpeg is not installed")
+class DecodeUploadTests(SimpleTestCase):
+    def test_decodes_to_16khz_mono_pcm(self):
+        pcm = decode_upload(SimpleUploadedFile("note.wav", wav_bytes(0.5)))
+        self.assertEqual(pcm.dtype, np.int16)
+        self.assertAlmostEqual(len(pcm), SAMPLE_RATE // 2, delta=100)
+
+    def test_rejects_audio_over_the_duration_limit(self):
+        with self.assertRaises(AudioRejected):
+            decode_upload(SimpleUploadedFile("note.wav", wav_bytes(2)), max_seconds=1)
+
+    def test_rejects_uploads_over_the_size_limit(self):
+        upload = SimpleUploadedFile("note.wav", wav_bytes(1))
+        with self.assertRaises(AudioRejected):
+            decode_upload(upload, max_bytes=upload.size - 1)
+
+    def test_undecodable_upload(self):
+        with self.assertRaises(AudioDecodeError):
+            decode_upload(SimpleUploadedFile("note.wav", b"BAD" + os.urandom(2048)))
+
+
+@unittest.skipUnless(os.name == "posix", "needs a shell script as the ffmpeg stand-in")
+class NoisyDecoderTests(SimpleTestCase):
+    """A decoder that writes more to stderr than a pipe buffer holds must not hang."""
+
+    def setUp(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        self.binary = os.path.join(tmp, "ffmpeg")
+        with open(self.binary, "w") as f:
+            f.write("#!/bin/sh\nhead -c 1048576 /dev/zero | tr '\\0' x >&2\ncat\n")
+        os.chmod(self.binary, os.stat(self.binary).st_mode | stat.S_IEXEC)
+
+    def test_large_stderr_is_drained(self):
+        with override_settings(FFMPEG_BINARY=self.binary):
+            pcm = decode_upload(SimpleUploadedFile("note.raw", b"\x01\x00" * 1000))
+        self.assertEqual(len(pcm), 1000)
+
+
+class AudioUploadHandlerTests(SimpleTestCase):
+    def test_keeps_uploads_up_to_the_audio_limit_in_memory(self):
+        handler = AudioUploadHandler()
+        handler.handle_raw_input(None, {}, MAX_UPLOAD_BYTES, b"boundary")
+        self.assertTrue(handler.activated)
+        handler.handle_raw_input(None, {}, MAX_UPLOAD_BYTES + 1, b"boundary")
+        self.assertFalse(handler.activated)
@@ -0,0 +1,130 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import OperationalError as DatabaseOperationalError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from kombu.exceptions import OperationalError
+from rest_framework.test import APIClient
+
+from nlp.service.pipeline import PipelineResult
+from api.model.audiojob import AudioJob
+from api.model.history import History
+from api.model.session import ChatSession
+from api.model.transcript import AudioTranscript
+from api.tasks import transcribe_audio_job
+from api.utils.audio import hash_upload, store_audio
+from api.utils.stt import StubEngine
+from .helpers import bearer, make_user
+
+CLIP = b"RIFF-not-really-audio" * 64
+
+
+class MediaRootMixin:
+    def setUp(self):
+        super().setUp()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        settings = override_settings(MEDIA_ROOT=media)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+
+@mock.patch("api.utils.stt.ENGINE_CHAIN", ["stub"])
+@mock.patch("api.utils.chat.answer_question", return_value=PipelineResult(answer="A disease.", confidence=1.0))
+class TranscribeAudioJobTests(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        session = ChatSession.objects.create(user=self.user, title="voice")
+        upload = SimpleUploadedFile("note.ogg", CLIP)
+        digest = hash_upload(upload)
+        message = History.objects.create(session=session, sender="user", audio=store_audio(upload, digest))
+        # Heard before: the job answers from the cached transcript without decoding
+        AudioTranscript.objects.create(sha256=digest, engine=StubEngine.engine_version(), text="what is malaria")
+        self.job = AudioJob.objects.create(user=self.user, session=session, message=message)
+
+    def test_answers_the_voice_message(self, answer):
+        transcribe_audio_job.apply(args=[str(self.job.id)])
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.transcript, self.job.answer),
+                         (AudioJob.DONE, "what is malaria", "A disease."))
+        self.assertEqual(History.objects.filter(sender="bot").count(), 1)
+
+    def test_job_running_elsewhere_is_left_alone(self, answer):
+        AudioJob.objects.filter(pk=self.job.pk).update(status=AudioJob.RUNNING, updated_at=timezone.now())
+        transcribe_audio_job.apply(args=[str(self.job.id)])
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, AudioJob.RUNNING)
+        answer.assert_not_called()
+
+    def test_stale_running_job_is_reclaimed(self, answer):
+        AudioJob.objects.filter(pk=self.job.pk).update(
+            status=AudioJob.RUNNING, updated_at=timezone.now() - timedelta(hours=1),
+        )
+        transcribe_audio_job.apply(args=[str(self.job.id)])
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, AudioJob.DONE)
+
+    def test_failure_is_recorded_on_the_job(self, answer):
+        answer.side_effect = RuntimeError("index missing")
+        transcribe_audio_job.apply(args=[str(self.job.id)])
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.error_status), (AudioJob.FAILED, 500))
+        self.assertIn("index missing", self.job.error)
+
+    def test_database_error_is_retried(self, answer):
+        answer.side_effect = [DatabaseOperationalError("database is locked"), answer.return_value]
+        transcribe_audio_job.apply(args=[str(self.job.id)])
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.answer), (AudioJob.DONE, "A disease."))
+        self.assertEqual(answer.call_count, 2)
+
+    def test_database_error_fails_the_job_once_retries_run_out(self, answer):
+        answer.side_effect = DatabaseOperationalError("database is locked")
+        transcribe_audio_job.apply(args=[str(self.job.id)])
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.error_status), (AudioJob.FAILED, 503))
+        self.assertEqual(answer.call_count, transcribe_audio_job.max_retries + 1)
+
+
+@override_settings(ROOT_URLCONF="api.urls")
+class AudioJobQueueTests(MediaRootMixin, TransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.client = APIClient(headers=bearer(self.user))
+
+    def post(self):
+        return self.client.post(reverse("chat-audio"), {"audio": SimpleUploadedFile("note.ogg", CLIP), "async": "true"})
+
+    def test_queues_the_job(self):
+        with mock.patch("api.tasks.transcribe_audio_job.delay") as delay:
+            response = self.post()
+        self.assertEqual(response.status_code, 202)
+        delay.assert_called_once_with(response.data["job_id"])
+        status = self.client.get(response.data["status_url"].replace("/api", "", 1))
+        self.assertEqual(status.data["status"], AudioJob.PENDING)
+
+    def test_broker_failure_marks_the_job_failed(self):
+        with mock.patch("api.tasks.transcribe_audio_job.delay", side_effect=OperationalError("broker down")):
+            response = self.post()
+        self.assertEqual(response.status_code, 503)
+        job = AudioJob.objects.get()
+        self.assertEqual((job.status, job.error_status), (AudioJob.FAILED, 503))
+        # The stored voice message still counts towards the session
+        self.assertEqual(ChatSession.objects.get().message_count, 1)
+
+    def test_answered_voice_message_counts_both_messages(self):
+        with mock.patch("api.tasks.transcribe_audio_job.delay"):
+            response = self.post()
+        with mock.patch("api.utils.stt.ENGINE_CHAIN", ["stub"]), \
+                mock.patch("api.utils.chat.answer_question", return_value=PipelineResult(answer="A disease.")), \
+                mock.patch("api.tasks.audio_digest", return_value="d"), \
+                mock.patch("api.tasks.cached_transcript", return_value="what is malaria"):
+            transcribe_audio_job.apply(args=[response.data["job_id"]])
+        self.assertEqual(ChatSession.objects.get().message_count, History.objects.count())
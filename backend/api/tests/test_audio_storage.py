@@ -0,0 +1,101 @@
+import hashlib
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+import numpy as np
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from api.model.history import History
+from api.model.session import ChatSession
+from api.model.transcript import AudioTranscript
+from api.utils.audio import audio_digest, hash_upload, store_audio
+from api.utils.stt import Transcript
+from api.utils.voice import cached_transcript, transcribe_cached
+from .helpers import make_user
+
+CLIP = b"OggS-voice-note" * 100
+DIGEST = hashlib.sha256(CLIP).hexdigest()
+
+
+class MediaRootTestCase(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        settings = override_settings(MEDIA_ROOT=media)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+
+class ContentAddressedStorageTests(MediaRootTestCase):
+    def test_identical_clips_share_one_file(self):
+        first = store_audio(SimpleUploadedFile("a.OGG", CLIP))
+        self.assertEqual(first, f"chat_audio/{DIGEST[:2]}/{DIGEST}.ogg")
+        with mock.patch.object(default_storage, "save") as save:
+            self.assertEqual(store_audio(SimpleUploadedFile("b.ogg", CLIP)), first)
+        save.assert_not_called()
+        self.assertEqual(hash_upload(SimpleUploadedFile("c.ogg", CLIP)), DIGEST)
+
+    def test_digest_is_read_from_the_name_or_the_content(self):
+        session = ChatSession.objects.create(user=make_user())
+        stored = History.objects.create(
+            session=session, sender="user", audio=store_audio(SimpleUploadedFile("a.ogg", CLIP)),
+        )
+        legacy = History.objects.create(
+            session=session, sender="user", audio=default_storage.save("chat_audio/note_x1y2.ogg", ContentFile(CLIP)),
+        )
+        with mock.patch.object(type(stored.audio), "open") as read:
+            self.assertEqual(audio_digest(stored.audio), DIGEST)
+        read.assert_not_called()
+        self.assertEqual(audio_digest(legacy.audio), DIGEST)
+
+
+@mock.patch("api.utils.voice.engine_versions", return_value=["whisper:faster-whisper:base", "google"])
+class TranscriptCacheTests(TestCase):
+    def test_prefers_the_first_engine_in_the_chain(self, versions):
+        AudioTranscript.objects.create(sha256=DIGEST, engine="google", text="from google")
+        self.assertEqual(cached_transcript(DIGEST), "from google")
+        AudioTranscript.objects.create(sha256=DIGEST, engine="whisper:faster-whisper:base", text="from whisper")
+        self.assertEqual(cached_transcript(DIGEST), "from whisper")
+
+    def test_other_engine_versions_are_not_served(self, versions):
+        AudioTranscript.objects.create(sha256=DIGEST, engine="whisper:faster-whisper:large", text="stale")
+        self.assertIsNone(cached_transcript(DIGEST))
+
+    def test_transcribing_fills_the_cache(self, versions):
+        pcm = np.ones(16000, dtype=np.int16)
+        with mock.patch("api.utils.voice.transcribe", return_value=Transcript("what is malaria", "google")) as stt:
+            self.assertEqual(transcribe_cached(DIGEST, pcm), "what is malaria")
+            self.assertEqual(transcribe_cached(DIGEST, pcm), "what is malaria")
+        # A second transcription of the same clip (e.g. two jobs at once) keeps the one row
+        self.assertEqual(stt.call_count, 2)
+        self.assertEqual(AudioTranscript.objects.get().text, "what is malaria")
+        self.assertEqual(cached_transcript(DIGEST), "what is malaria")
+
+
+class DedupeChatAudioTests(MediaRootTestCase):
+    def test_repoints_legacy_files_to_shared_content_addressed_ones(self):
+        session = ChatSession.objects.create(user=make_user())
+        names = [default_storage.save(f"chat_audio/note_{i}.ogg", ContentFile(CLIP)) for i in range(2)]
+        other = default_storage.save("chat_audio/other.ogg", ContentFile(b"different"))
+        for name in names + [other]:
+            History.objects.create(session=session, sender="user", audio=name)
+
+        out = StringIO()
+        call_command("dedupe_chat_audio", "--delete-originals", stdout=out)
+        self.assertIn("Re-pointed 3 messages to 2 new content-addressed files, deleted 3 originals", out.getvalue())
+        audio = list(History.objects.order_by("id").values_list("audio", flat=True))
+        self.assertEqual(audio[0], f"chat_audio/{DIGEST[:2]}/{DIGEST}.ogg")
+        self.assertEqual(audio[0], audio[1])
+        self.assertFalse(any(default_storage.exists(name) for name in names + [other]))
+        self.assertTrue(all(default_storage.exists(name) for name in audio))
+
+        # A second run has nothing left to move
+        out = StringIO()
+        call_command("dedupe_chat_audio", stdout=out)
+        self.assertIn("Re-pointed 0 messages", out.getvalue())
@@ -0,0 +1,65 @@
+import json
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from api.model.history import History
+from api.model.session import ChatSession
+from api.utils.chat import RetrievalBusy
+from .helpers import bearer, fake_classify, fake_retrieve, make_user
+
+
+@override_settings(ROOT_URLCONF="api.urls")
+@mock.patch("api.utils.chat.classify_turn", fake_classify)
+@mock.patch("api.utils.chat.retrieve_answer", fake_retrieve("Rest and fluids."))
+class AsyncChatbotViewTests(TransactionTestCase):
+    def setUp(self):
+        self.user = make_user()
+
+    async def post(self, user=None, **data):
+        headers = bearer(user or self.user) if user is not False else {}
+        return await self.async_client.post(
+            reverse("chatbot-async"), json.dumps(data), content_type="application/json", headers=headers,
+        )
+
+    async def test_answers_and_persists_the_turn(self):
+        response = await self.post(question="how do I treat flu")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data["answer"], data["label"]), ("Rest and fluids.", "symptoms"))
+        session = await ChatSession.objects.aget(pk=data["session_id"])
+        self.assertEqual(session.message_count, 2)
+
+        response = await self.post(question="and for a cold", session_id=session.id)
+        self.assertEqual(response.json()["session_id"], session.id)
+        self.assertEqual(await History.objects.filter(session=session).acount(), 4)
+
+    async def test_requires_a_token(self):
+        response = await self.post(user=False, question="how do I treat flu")
+        self.assertEqual(response.status_code, 401)
+
+    async def test_rejects_bad_input(self):
+        self.assertEqual((await self.post(question="  ")).status_code, 400)
+        response = await self.async_client.post(
+            reverse("chatbot-async"), "not json", content_type="application/json", headers=bearer(self.user),
+        )
+        self.assertEqual(response.status_code, 400)
+
+    async def test_smalltalk_is_answered_without_a_session(self):
+        response = await self.post(question="hello")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(await ChatSession.objects.aexists())
+
+    async def test_busy_retrieval_pool(self):
+        with mock.patch("api.views.answer_turn_async", side_effect=RetrievalBusy()):
+            response = await self.post(question="how do I treat flu")
+        self.assertEqual(response.status_code, 503)
+
+    async def test_other_users_session_is_not_found(self):
+        other = await ChatSession.objects.acreate(user=await sync_to_async(make_user)(), title="theirs")
+        response = await self.post(question="how do I treat flu", session_id=other.id)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(await History.objects.acount(), 0)
+
@@ -0,0 +1,69 @@
+import asyncio
+import json
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.test import AsyncRequestFactory, TransactionTestCase, override_settings
+
+from api import views
+from api.model.history import History
+from api.model.session import ChatSession
+from api.model.unanswered import Unanswered
+from .helpers import bearer, fake_classify, fake_retrieve, make_user
+
+
+def parse(frames: str) -> list[tuple[str, dict]]:
+    events = []
+    for frame in filter(None, frames.split("\n\n")):
+        lines = dict(line.split(": ", 1) for line in frame.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+@override_settings(ROOT_URLCONF="api.urls")
+@mock.patch("api.views.classify_turn", fake_classify)
+class ChatbotStreamViewTests(TransactionTestCase):
+    def setUp(self):
+        self.user = make_user()
+
+    async def post(self, question, **data):
+        request = AsyncRequestFactory().post(
+            "/chatbot/stream/", json.dumps({"question": question, **data}),
+            content_type="application/json", headers=bearer(self.user),
+        )
+        return await views.ChatbotStreamView.as_view()(request)
+
+    async def test_streams_meta_answer_done_and_persists(self):
+        with mock.patch("api.views.retrieve_answer", fake_retrieve("Rest and fluids.")):
+            response = await self.post("how do I treat flu")
+            body = "".join([chunk.decode() async for chunk in response.streaming_content])
+
+        events = parse(body)
+        self.assertEqual([e for e, _ in events], ["meta", "answer", "done"])
+        self.assertEqual(events[1][1], {"answer": "Rest and fluids."})
+        session = await ChatSession.objects.aget()
+        self.assertEqual(events[0][1]["session_id"], session.id)
+        self.assertEqual(await History.objects.filter(session=session).acount(), 2)
+
+    async def test_turn_is_persisted_when_the_client_disconnects(self):
+        with mock.patch("api.views.retrieve_answer", fake_retrieve(None)):
+            response = await self.post("what is zzyzx fever")
+            stream = aiter(response.streaming_content)
+            first = await anext(stream)
+            await stream.aclose()  # client went away after the first event
+            await asyncio.gather(*views._running_turns)
+
+        self.assertIn("event: meta", first.decode())
+        self.assertEqual(await History.objects.acount(), 2)
+        self.assertTrue(await Unanswered.objects.filter(question="what is zzyzx fever").aexists())
+
+    async def test_busy_pool_reports_an_error_without_persisting(self):
+        async def busy(func, *args):
+            raise views.RetrievalBusy()
+
+        with mock.patch("api.views.run_in_retrieval_pool", busy):
+            response = await self.post("what is malaria")
+            body = "".join([chunk.decode() async for chunk in response.streaming_content])
+
+        self.assertEqual([e for e, _ in parse(body)], ["error"])
+        self.assertEqual(await sync_to_async(History.objects.count)(), 0)
@@ -0,0 +1,79 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from nlp.service.pipeline import PipelineResult
+from api.model.history import History
+from api.model.session import ChatSession
+from api.model.unanswered import Unanswered
+from api.utils.chat import UNANSWERED_REPLY
+from api.utils.chat_turn import finish_turn, start_turn
+from .helpers import bearer, make_user
+
+
+class ChatTurnTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+
+    def test_new_conversation_is_written_in_one_transaction(self):
+        turn = start_turn(self.user, None, "what is malaria")
+        self.assertIsNone(turn.session.pk)
+
+        with self.assertNumQueries(4):  # savepoint, session insert, bulk insert, release
+            finish_turn(turn, "A disease spread by mosquitoes.")
+
+        session = ChatSession.objects.get()
+        self.assertEqual((session.title, session.message_count), ("what is malaria", 2))
+        self.assertEqual(
+            list(session.messages.order_by("id").values_list("sender", "message")),
+            [("user", "what is malaria"), ("bot", "A disease spread by mosquitoes.")],
+        )
+
+    def test_miss_records_the_question_as_unanswered(self):
+        finish_turn(start_turn(self.user, None, "what is zzyzx fever"), UNANSWERED_REPLY, answered=False)
+        self.assertTrue(Unanswered.objects.filter(user=self.user, question="what is zzyzx fever").exists())
+
+    def test_follow_up_turn_sees_the_previous_messages(self):
+        finish_turn(start_turn(self.user, None, "what is malaria"), "A disease.")
+        session = ChatSession.objects.get()
+
+        turn = start_turn(self.user, session.id, "how is it treated")
+        self.assertEqual(
+            [(m["sender"], m["message"]) for m in turn.history],
+            [("user", "what is malaria"), ("bot", "A disease."), ("user", "how is it treated")],
+        )
+        finish_turn(turn, "With antimalarials.")
+        session.refresh_from_db()
+        self.assertEqual(session.message_count, 4)
+        self.assertEqual(History.objects.filter(session=session).count(), 4)
+
+
+@override_settings(ROOT_URLCONF="api.urls")
+class ChatbotAPIViewTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient(headers=bearer(self.user))
+
+    def ask(self, question, answer, **data):
+        result = PipelineResult(answer=answer, confidence=1.0 if answer else 0.0)
+        with mock.patch("api.utils.chat.answer_question", return_value=result):
+            return self.client.post(reverse("chatbot"), {"question": question, **data}, format="json")
+
+    def test_answers_and_persists_the_turn(self):
+        response = self.ask("what is malaria", "A disease spread by mosquitoes.")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["answer"], "A disease spread by mosquitoes.")
+        session = ChatSession.objects.get(id=response.data["session_id"])
+        self.assertEqual(session.messages.count(), 2)
+
+    def test_unanswered_question_gets_the_fallback_reply(self):
+        response = self.ask("what is zzyzx fever", None)
+        self.assertEqual(response.data["answer"], UNANSWERED_REPLY)
+        self.assertEqual(Unanswered.objects.count(), 1)
+
+    def test_other_users_session_is_not_found(self):
+        other = ChatSession.objects.create(user=make_user(), title="theirs")
+        response = self.ask("what is malaria", "A disease.", session_id=other.id)
+        self.assertEqual(response.status_code, 404)
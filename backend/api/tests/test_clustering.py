@@ -0,0 +1,93 @@
+import importlib.util
+import sys
+import types
+from io import StringIO
+from unittest import mock, skipUnless
+
+import numpy as np
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from api.model.unanswered import Unanswered
+from api.model.unansweredcluster import UnansweredCluster
+from api.scheduler import Lease
+from .helpers import make_user
+
+# Topic of each question -> a fixed embedding, so similar questions share a direction
+TOPICS = {"malaria": [1, 0, 0], "flu": [0, 1, 0], "sleep": [0, 0, 1]}
+
+
+def embed_text(texts):
+    return np.array([TOPICS[text.split()[-1].strip("?")] for text in texts], dtype=np.float32)
+
+
+@skipUnless(importlib.util.find_spec("faiss"), "needs faiss")
+class ClusteringTests(TestCase):
+    def setUp(self):
+        # The real embedder loads a sentence-transformer model
+        embedder = types.ModuleType("nlp.utils.embedder")
+        embedder.embed_text = embed_text
+        patcher = mock.patch.dict(sys.modules, {"nlp.utils.embedder": embedder})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = make_user()
+
+    def ask(self, *questions):
+        for question in questions:
+            Unanswered.objects.create(user=self.user, question=question, answer="")
+
+    def clusters(self):
+        return sorted(
+            (c.label, c.size, sorted(c.questions.values_list("question", flat=True)))
+            for c in UnansweredCluster.objects.all()
+        )
+
+    def test_similar_questions_share_a_cluster(self):
+        from api.utils.clustering import cluster_unanswered
+        self.ask("what is malaria?", "how do I sleep?", "symptoms of malaria?")
+        stats = cluster_unanswered(batch_size=2)
+        self.assertEqual((stats["questions"], stats["new_clusters"]), (3, 2))
+
+        # A later run extends the stored clusters
+        self.ask("cure for malaria?", "do I have flu?")
+        stats = cluster_unanswered()
+        self.assertEqual((stats["new_clusters"], stats["updated_clusters"]), (1, 1))
+        self.assertEqual(self.clusters(), [
+            ("do I have flu?", 1, ["do I have flu?"]),
+            ("how do I sleep?", 1, ["how do I sleep?"]),
+            ("what is malaria?", 3, ["cure for malaria?", "symptoms of malaria?", "what is malaria?"]),
+        ])
+        # The lock is released when the run ends
+        self.assertTrue(Lease(name="cluster-unanswered", holder="next").acquire())
+
+    def test_rebuild_reclusters_everything(self):
+        from api.utils.clustering import cluster_unanswered
+        self.ask("what is malaria?", "do I have flu?")
+        cluster_unanswered(threshold=2.0)  # nothing is similar enough: one cluster each
+        self.ask("symptoms of malaria?")
+        stats = cluster_unanswered(rebuild=True)
+        self.assertEqual((stats["questions"], stats["new_clusters"]), (3, 2))
+        self.assertEqual(UnansweredCluster.objects.count(), 2)
+
+    def test_a_second_run_is_refused(self):
+        from api.utils.clustering import LOCK_NAME, ClusteringBusy, cluster_unanswered
+        self.ask("what is malaria?")
+        Lease(name=LOCK_NAME, holder="task").acquire()
+        with self.assertRaises(ClusteringBusy):
+            cluster_unanswered(rebuild=True)
+        with self.assertRaises(CommandError):
+            call_command("cluster_unanswered", "--rebuild", stdout=StringIO())
+        self.assertEqual(Unanswered.objects.filter(cluster=None).count(), 1)
+
+        # Once the task has finished, the command runs
+        Lease(name=LOCK_NAME, holder="task").release()
+        out = StringIO()
+        call_command("cluster_unanswered", "--rebuild", stdout=out)
+        self.assertIn("Clustered 1 questions", out.getvalue())
+
+    def test_busy_task_is_skipped(self):
+        from api.tasks import cluster_unanswered_questions
+        from api.utils.clustering import LOCK_NAME
+        Lease(name=LOCK_NAME, holder="command").acquire()
+        result = cluster_unanswered_questions.apply(kwargs={"idempotency_key": "cluster:1"}).get()
+        self.assertEqual(result, "skipped: cluster:1, clustering already running")
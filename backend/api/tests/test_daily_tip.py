@@ -0,0 +1,93 @@
+import datetime
+import json
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from api.model.dailytip import DailyTip
+from api.model.healthtip import HealthTip
+from api.utils.tip_payload import get_daily_payload, refresh_daily_payload
+from api.utils.tip_pool import assign_daily_tips, upsert_tips
+from api.utils.tips import TipData
+
+
+def make_tip(n, **fields):
+    return HealthTip.objects.create(source="cdc", external_id=str(n), body=f"Tip {n}.", **fields)
+
+
+@override_settings(ROOT_URLCONF="api.urls")
+class DailyTipViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.today = datetime.date.today()
+        for n in range(3):
+            DailyTip.objects.create(tip=make_tip(n), date=self.today, slot=n)
+
+    def get(self, **headers):
+        return self.client.get(reverse("daily-tip"), headers=headers)
+
+    def test_serves_the_days_tips(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([t["tip"]["body"] for t in json.loads(response.content)], ["Tip 0.", "Tip 1.", "Tip 2."])
+        self.assertTrue(response["ETag"])
+        self.assertIn("max-age", response["Cache-Control"])
+
+    def test_conditional_get(self):
+        etag = self.get()["ETag"]
+        for header in (etag, f"W/{etag}", f'"stale", {etag}', "*"):
+            with self.subTest(header=header):
+                response = self.get(if_none_match=header)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response["ETag"], etag)
+                self.assertEqual(response.content, b"")
+        self.assertEqual(self.get(if_none_match='"stale"').status_code, 200)
+
+    def test_warm_cache_costs_no_queries(self):
+        self.get()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get().status_code, 200)
+
+    def test_edited_tip_is_served_at_once(self):
+        before = self.get()
+        tip = HealthTip.objects.get(external_id="1")
+        tip.body = "Rewritten."
+        with self.captureOnCommitCallbacks(execute=True):
+            tip.save()
+        after = self.get(if_none_match=before["ETag"])
+        self.assertEqual(after.status_code, 200)
+        self.assertIn(b"Rewritten.", after.content)
+        self.assertNotEqual(after["ETag"], before["ETag"])
+
+
+class DailyPayloadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.day = datetime.date(2026, 3, 1)
+
+    def test_missing_day_is_assigned_from_the_pool(self):
+        for n in range(4):
+            make_tip(n)
+        body = json.loads(get_daily_payload(self.day)["body"])
+        self.assertEqual(len(body), 3)
+        self.assertEqual(DailyTip.objects.filter(date=self.day).count(), 3)
+        self.assertEqual(get_daily_payload(self.day)["etag"], refresh_daily_payload(self.day)["etag"])
+
+    def test_assignment_drops_the_cached_payload(self):
+        get_daily_payload(self.day)  # nothing in the pool yet: an empty payload is cached
+        for n in range(3):
+            make_tip(n)
+        with self.captureOnCommitCallbacks(execute=True):
+            assign_daily_tips(self.day)
+        self.assertEqual(len(json.loads(get_daily_payload(self.day)["body"])), 3)
+
+    def test_upserted_text_drops_todays_payload(self):
+        today = datetime.date.today()
+        DailyTip.objects.create(tip=make_tip(0), date=today, slot=0)
+        get_daily_payload(today)
+        with self.captureOnCommitCallbacks(execute=True):
+            upsert_tips([TipData("cdc", "0", "", "Updated.")])
+        self.assertIn(b"Updated.", get_daily_payload(today)["body"])
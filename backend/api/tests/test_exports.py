@@ -0,0 +1,85 @@
+import csv
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from api.model.unanswered import Unanswered
+from api.utils.exports import CSVSink, JSONLSink, Sink, export_answered, purge_unanswered
+from .helpers import make_user
+
+
+class SinkTests(TestCase):
+    def test_sink_is_abstract(self):
+        with self.assertRaises(TypeError):
+            Sink("out.csv")
+
+        class Incomplete(Sink):
+            def write(self, rows):
+                pass
+
+        with self.assertRaises(TypeError):
+            Incomplete("out.csv")
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        user = make_user()
+        for n in range(5):
+            Unanswered.objects.create(user=user, question=f"Q{n}?", answer=f"A{n}.", is_answered=n % 2 == 0)
+
+    def test_streams_answered_questions_to_every_format(self):
+        paths, total = export_answered(self.directory, formats=["jsonl"], chunk_size=2)
+        self.assertEqual(total, 3)
+        self.assertEqual([os.path.splitext(p)[1] for p in paths], [".csv", ".gz"])
+        self.assertEqual([f for f in os.listdir(self.directory) if f.endswith(".part")], [])
+
+        with open(paths[0], newline="", encoding="utf-8") as f:
+            self.assertEqual(list(csv.reader(f)),
+                             [["Question", "Answer"], ["Q0?", "A0."], ["Q2?", "A2."], ["Q4?", "A4."]])
+        with gzip.open(paths[1], "rt", encoding="utf-8") as f:
+            self.assertEqual([json.loads(line)["question"] for line in f], ["Q0?", "Q2?", "Q4?"])
+
+    def test_progress_is_reported_per_chunk(self):
+        progress = mock.Mock()
+        export_answered(self.directory, formats=["csv"], chunk_size=2, progress=progress)
+        self.assertEqual(progress.call_args_list, [mock.call("exported", 2), mock.call("exported", 3)])
+
+    def test_failure_leaves_no_files(self):
+        with mock.patch.object(JSONLSink, "write", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                export_answered(self.directory, formats=["jsonl"])
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            export_answered(self.directory, formats=["xml"])
+
+    def test_csv_sink_replaces_the_file_on_close(self):
+        path = os.path.join(self.directory, "out.csv")
+        sink = CSVSink(path)
+        sink.write([(1, "Q?", "A.", timezone.now())])
+        self.assertFalse(os.path.exists(path))
+        sink.close()
+        self.assertTrue(os.path.exists(path))
+
+
+class PurgeTests(TestCase):
+    def test_deletes_old_questions_in_batches(self):
+        user = make_user()
+        for n in range(5):
+            Unanswered.objects.create(user=user, question=f"Q{n}?", answer="")
+        old = timezone.now() - timedelta(days=8)
+        Unanswered.objects.filter(question__in=["Q0?", "Q1?", "Q2?"]).update(created_at=old)
+        progress = mock.Mock()
+        self.assertEqual(purge_unanswered(days=7, batch_size=2, progress=progress), 3)
+        self.assertEqual(progress.call_args_list, [mock.call("deleted", 2), mock.call("deleted", 3)])
+        self.assertEqual(sorted(Unanswered.objects.values_list("question", flat=True)), ["Q3?", "Q4?"])
@@ -0,0 +1,22 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from api.model.unanswered import Unanswered
+from .helpers import make_user
+
+
+class HotQueryTests(TestCase):
+    def test_hot_queries_use_indexes(self):
+        out = StringIO()
+        call_command("explain_hot_queries", stdout=out)
+        self.assertNotIn("✗", out.getvalue())
+        self.assertIn("✓ answered questions export", out.getvalue())
+
+    def test_answered_filters_on_the_flag(self):
+        user = make_user()
+        Unanswered.objects.create(user=user, question="open", answer="")
+        Unanswered.objects.create(user=user, question="done", answer="yes", is_answered=True)
+        self.assertEqual(list(Unanswered.objects.answered().values_list("question", flat=True)), ["done"])
+        self.assertEqual(list(Unanswered.objects.answered(False).values_list("question", flat=True)), ["open"])
@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.model.history import History
+from api.model.session import ChatSession
+from api.pagination import decode_cursor, encode_cursor
+from .helpers import bearer, make_user
+
+
+@override_settings(ROOT_URLCONF="api.urls")
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient(headers=bearer(self.user))
+
+    def walk(self, url, direction="before", cursor=None, **params):
+        """Follow ``direction`` cursors to the end; returns the pages' result lists."""
+        pages = []
+        while True:
+            data = self.client.get(url, {**params, **({direction: cursor} if cursor else {})}).json()
+            pages.append(data["results"])
+            cursor = data[direction]
+            if cursor is None:
+                return pages
+
+    def test_sessions_page_newest_first_through_every_session(self):
+        sessions = ChatSession.objects.bulk_create(
+            ChatSession(user=self.user, title=f"s{i}") for i in range(7)
+        )
+        # Same timestamp for several rows: the id breaks the tie
+        now = timezone.now()
+        for i, session in enumerate(sessions):
+            ChatSession.objects.filter(pk=session.pk).update(updated_at=now - timedelta(minutes=i // 2))
+
+        pages = self.walk(reverse("chat-sessions"), limit=3)
+        self.assertEqual([len(p) for p in pages], [3, 3, 1])
+        ids = [row["id"] for page in pages for row in page]
+        self.assertEqual(sorted(ids), sorted(s.id for s in sessions))
+        self.assertEqual(len(set(ids)), 7)
+
+    def test_history_scrolls_back_oldest_first_within_a_page(self):
+        session = ChatSession.objects.create(user=self.user, title="t")
+        History.objects.bulk_create(
+            History(session=session, sender="user", message=f"m{i}") for i in range(5)
+        )
+        pages = self.walk(reverse("chat-session-messages", args=[session.id]), limit=2)
+        self.assertEqual(
+            [[row["message"] for row in page] for page in pages],
+            [["m3", "m4"], ["m1", "m2"], ["m0"]],
+        )
+
+    def test_cursors_only_point_where_there_are_rows(self):
+        session = ChatSession.objects.create(user=self.user, title="t")
+        History.objects.bulk_create(
+            History(session=session, sender="user", message=f"m{i}") for i in range(5)
+        )
+        url = reverse("chat-session-messages", args=[session.id])
+        latest = self.client.get(url, {"limit": 2}).json()
+        self.assertIsNone(latest["after"])
+        oldest = self.client.get(url, {"limit": 2, "before": latest["before"]}).json()
+        oldest = self.client.get(url, {"limit": 2, "before": oldest["before"]}).json()
+        self.assertEqual([row["message"] for row in oldest["results"]], ["m0"])
+        self.assertIsNone(oldest["before"])
+
+        # Back down from the oldest page to the newest
+        pages = self.walk(url, direction="after", cursor=oldest["after"], limit=2)
+        self.assertEqual([[row["message"] for row in page] for page in pages], [["m1", "m2"], ["m3", "m4"]])
+        newer = self.client.get(url, {"limit": 2, "after": oldest["after"]}).json()
+        self.assertIsNotNone(newer["before"])
+
+    def test_other_users_sessions_are_not_listed(self):
+        ChatSession.objects.create(user=make_user(), title="theirs")
+        self.assertEqual(self.client.get(reverse("chat-sessions")).json()["results"], [])
+
+    def test_invalid_cursor_is_a_bad_request(self):
+        response = self.client.get(reverse("chat-sessions"), {"before": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_round_trip(self):
+        ts = timezone.now()
+        self.assertEqual(decode_cursor(encode_cursor(ts, 42)), (ts, 42))
@@ -0,0 +1,114 @@
+import sys
+import types
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from api import tasks
+from api.model.taskrun import TaskRun
+from api.scheduler import default_jobs
+from api.utils.taskruns import claim, task_run
+
+
+class TaskRunTests(TestCase):
+    def test_a_key_runs_once(self):
+        self.assertTrue(claim("job:1", "job", stale_after=60))
+        self.assertFalse(claim("job:1", "job", stale_after=60))
+        TaskRun.objects.filter(key="job:1").update(status=TaskRun.DONE)
+        self.assertFalse(claim("job:1", "job", stale_after=60))
+
+    def test_failed_run_is_reclaimed(self):
+        with self.assertRaises(RuntimeError), task_run("job:1", "job") as claimed:
+            self.assertTrue(claimed)
+            raise RuntimeError("boom")
+        run = TaskRun.objects.get(key="job:1")
+        self.assertEqual(run.status, TaskRun.FAILED)
+        self.assertIn("boom", run.result)
+
+        with task_run("job:1", "job") as claimed:
+            self.assertTrue(claimed)
+        run.refresh_from_db()
+        self.assertEqual((run.status, run.attempts, run.result), (TaskRun.DONE, 2, ""))
+
+    def test_stale_run_is_reclaimed(self):
+        claim("job:1", "job", stale_after=60)
+        TaskRun.objects.update(updated_at=timezone.now() - timedelta(seconds=30))
+        self.assertFalse(claim("job:1", "job", stale_after=60))
+        TaskRun.objects.update(updated_at=timezone.now() - timedelta(seconds=90))
+        self.assertTrue(claim("job:1", "job", stale_after=60))
+
+    def test_skipped_run_leaves_the_owner_alone(self):
+        with task_run("job:1", "job") as first:
+            with task_run("job:1", "job") as second:
+                self.assertFalse(second)
+            self.assertEqual(TaskRun.objects.get().status, TaskRun.RUNNING)
+        self.assertTrue(first)
+        self.assertEqual(TaskRun.objects.get().status, TaskRun.DONE)
+
+
+class PeriodicTaskTests(TestCase):
+    def run_twice(self, task, key):
+        first = task.apply(kwargs={"idempotency_key": key}).get()
+        second = task.apply(kwargs={"idempotency_key": key}).get()
+        self.assertEqual(second, f"skipped: {key} already ran")
+        self.assertEqual(TaskRun.objects.get(key=key).status, TaskRun.DONE)
+        return first
+
+    @mock.patch("api.tasks.fetch_daily_health_tip", return_value=["Drink water."])
+    def test_send_health_tips(self, fetch):
+        self.assertEqual(self.run_twice(tasks.send_health_tips, "tips:1"), "✅ Daily health tips sent")
+        fetch.assert_called_once_with(force_refresh=True)
+
+    @mock.patch("api.tasks.fetch_daily_health_tip", return_value=[])
+    def test_send_health_tips_retries_when_nothing_was_fetched(self, fetch):
+        result = tasks.send_health_tips.apply(kwargs={"idempotency_key": "tips:1"})
+        self.assertFalse(result.successful())
+        # Every attempt could claim the key again
+        self.assertEqual(fetch.call_count, tasks.send_health_tips.max_retries + 1)
+        self.assertEqual(TaskRun.objects.get(key="tips:1").status, TaskRun.FAILED)
+
+    @mock.patch("api.tasks.purge_unanswered", return_value=2)
+    @mock.patch("api.tasks.export_answered", return_value=(["exports/answered.csv"], 5))
+    def test_export_unanswered(self, export, purge):
+        result = self.run_twice(tasks.export_unanswered, "export:1")
+        self.assertEqual(result, "✅ Export complete → exports/answered.csv (5 rows), deleted 2 old records")
+        export.assert_called_once()
+        purge.assert_called_once()
+
+    @mock.patch("api.tasks.archive_inactive_sessions", return_value=(1, 4))
+    def test_archive_history(self, archive):
+        self.assertEqual(self.run_twice(tasks.archive_history, "archive:1"),
+                         "✅ Archived 4 messages from 1 inactive sessions")
+        archive.assert_called_once_with()
+
+    def test_cluster_unanswered_questions(self):
+        # The real module needs faiss and the embedding model
+        cluster = mock.Mock(return_value={"questions": 7, "new_clusters": 2, "updated_clusters": 1})
+        fake = types.ModuleType("api.utils.clustering")
+        fake.cluster_unanswered = cluster
+        fake.ClusteringBusy = type("ClusteringBusy", (Exception,), {})
+        with mock.patch.dict(sys.modules, {"api.utils.clustering": fake}):
+            result = self.run_twice(tasks.cluster_unanswered_questions, "cluster:1")
+        self.assertEqual(result, "✅ Clustered 7 questions (2 new clusters)")
+        cluster.assert_called_once_with()
+
+
+class DispatchTests(TestCase):
+    def test_keys_are_fixed_at_dispatch(self):
+        jobs = {job_id: func for func, _, job_id in default_jobs()}
+        today = timezone.localdate()
+        expected = {
+            "send_health_tips": ("send_health_tips", f"send_health_tips:{today}"),
+            "export_unanswered": ("export_unanswered", f"export_unanswered:{today}"),
+            "archive_history": ("archive_history", f"archive_history:{today}"),
+            "cluster_unanswered_questions": (
+                "cluster_unanswered_questions", f"cluster_unanswered:{timezone.now():%Y-%m-%dT%H}",
+            ),
+        }
+        self.assertEqual(set(jobs), set(expected))
+        for job_id, (task_name, key) in expected.items():
+            with self.subTest(job=job_id), mock.patch.object(getattr(tasks, task_name), "delay") as delay:
+                jobs[job_id]()
+                delay.assert_called_once_with(idempotency_key=key)
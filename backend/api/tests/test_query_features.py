@@ -0,0 +1,31 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from api.utils import utils
+from api.utils.utils import QueryFeatures, classify_question
+
+
+class QueryFeaturesTests(SimpleTestCase):
+    def test_retrieval_text_appends_the_query_to_the_context(self):
+        features = QueryFeatures("and the treatment?", "User: what is malaria\nBot: A disease.")
+        self.assertEqual(features.text, "User: what is malaria\nBot: A disease.\nUser: and the treatment?")
+
+    def test_query_alone_without_context(self):
+        features = QueryFeatures("what is malaria")
+        self.assertEqual(features.text, "what is malaria")
+        self.assertIs(features.label_vector, features.vector)
+
+    def test_each_text_is_vectorized_once(self):
+        features = QueryFeatures("what causes it", "User: what is malaria")
+        with mock.patch.object(utils, "vectorizer", wraps=utils.vectorizer) as vectorizer:
+            features.vector, features.vector, features.label_vector, features.label_vector
+        self.assertEqual(
+            [c.args[0] for c in vectorizer.transform.call_args_list],
+            [[features.text], ["User: what is malaria"]],
+        )
+
+    def test_classifier_sees_the_context(self):
+        context = "User: what are the symptoms of diabetes"
+        features = QueryFeatures("what are the symptoms of diabetes", context)
+        self.assertEqual(classify_question(features), classify_question(context))
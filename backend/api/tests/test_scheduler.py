@@ -0,0 +1,91 @@
+from datetime import timedelta
+from unittest import mock
+
+from apscheduler.triggers.interval import IntervalTrigger
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from api.model.schedulerlease import SchedulerLease
+from api.scheduler import LeaderScheduler, Lease, should_autostart
+
+
+class ShouldAutostartTests(SimpleTestCase):
+    def check(self, argv, environ=None):
+        with mock.patch("sys.argv", argv), mock.patch.dict("os.environ", environ or {}, clear=False):
+            return should_autostart()
+
+    @override_settings(SCHEDULER_AUTOSTART=True)
+    def test_only_web_servers_join(self):
+        for argv in (["/usr/bin/gunicorn", "backend.wsgi"], ["uvicorn", "backend.asgi:application"],
+                     ["/venv/lib/gunicorn/__main__.py", "backend.wsgi"],
+                     ["manage.py", "runserver", "--noreload"]):
+            with self.subTest(argv=argv):
+                self.assertTrue(self.check(argv))
+        for argv in (["/venv/bin/celery", "-A", "backend", "worker"], ["celery", "-A", "backend", "beat"],
+                     ["-c"], [""], ["/venv/bin/pytest"], ["manage.py", "test"], ["manage.py", "shell"],
+                     ["manage.py", "runserver"]):
+            with self.subTest(argv=argv):
+                self.assertFalse(self.check(argv))
+
+    @override_settings(SCHEDULER_AUTOSTART=True)
+    def test_runserver_joins_from_the_reloaded_child(self):
+        self.assertTrue(self.check(["manage.py", "runserver"], {"RUN_MAIN": "true"}))
+
+    @override_settings(SCHEDULER_AUTOSTART=False)
+    def test_off_by_default(self):
+        self.assertFalse(self.check(["gunicorn", "backend.wsgi"]))
+
+
+class LeaseTests(TestCase):
+    def test_one_holder_at_a_time(self):
+        first, second = Lease(holder="a", ttl=60), Lease(holder="b", ttl=60)
+        self.assertTrue(first.acquire())
+        self.assertFalse(second.acquire())
+        self.assertTrue(first.acquire())  # renewal
+        self.assertTrue(first.held())
+        self.assertFalse(second.held())
+
+    def test_expired_lease_is_taken_over(self):
+        first, second = Lease(holder="a", ttl=60), Lease(holder="b", ttl=60)
+        first.acquire()
+        SchedulerLease.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertTrue(second.acquire())
+        self.assertFalse(first.held())
+
+    def test_release_hands_over_at_once(self):
+        first, second = Lease(holder="a", ttl=60), Lease(holder="b", ttl=60)
+        first.acquire()
+        first.release()
+        self.assertTrue(second.acquire())
+
+
+class LeaderSchedulerTests(TestCase):
+    def scheduler(self, holder, job):
+        return LeaderScheduler(jobs=[(job, IntervalTrigger(hours=1), "job")], lease=Lease(holder=holder, ttl=60))
+
+    def test_only_the_leader_schedules_jobs(self):
+        job = mock.Mock(__name__="job")
+        leader, follower = self.scheduler("a", job), self.scheduler("b", job)
+        self.addCleanup(leader.stop)
+        self.addCleanup(follower.stop)
+        leader.tick()
+        follower.tick()
+        self.assertTrue(leader.is_leader)
+        self.assertFalse(follower.is_leader)
+
+        # The leader's lease lapses: the follower takes over, the old leader stands down
+        SchedulerLease.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        follower.tick()
+        leader.tick()
+        self.assertTrue(follower.is_leader)
+        self.assertFalse(leader.is_leader)
+
+    def test_job_is_skipped_once_the_lease_is_lost(self):
+        job = mock.Mock(__name__="job")
+        scheduler = self.scheduler("a", job)
+        guarded = scheduler._guard(job, "job")
+        scheduler.lease.acquire()
+        guarded()
+        SchedulerLease.objects.update(holder="b")
+        guarded()
+        job.assert_called_once_with()
@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.model.history import History
+from api.model.session import ChatSession
+from api.utils.chat_turn import record_messages
+from .helpers import bearer, make_user
+
+
+class SessionCounterTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.session = ChatSession.objects.create(user=self.user, title="New Chat")
+
+    def test_record_messages_bumps_the_counters(self):
+        at = timezone.now() - timedelta(minutes=5)
+        record_messages(self.session.pk, 2, last_message_at=at)
+        record_messages(self.session.pk, 2, last_message_at=at + timedelta(minutes=1))
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.message_count, 4)
+        self.assertEqual(self.session.last_message_at, at + timedelta(minutes=1))
+        self.assertGreater(self.session.updated_at, at)
+
+    def test_title_comes_from_the_first_user_message(self):
+        History.objects.create(session=self.session, sender="bot", message="Hi!")
+        History.objects.create(session=self.session, sender="user", message="x" * 60)
+        History.objects.create(session=self.session, sender="user", message="later")
+        with self.assertNumQueries(1):
+            self.session.update_title_from_first_message()
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.title, "x" * 50 + "...")
+
+    def test_title_is_kept_without_a_user_message(self):
+        self.session.update_title_from_first_message()
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.title, "New Chat")
+
+    @override_settings(ROOT_URLCONF="api.urls")
+    def test_session_list_reports_the_counters(self):
+        record_messages(self.session.pk, 2)
+        client = APIClient(headers=bearer(self.user))
+        response = client.get(reverse("chat-sessions"))
+        [row] = response.json()["results"]
+        self.assertEqual(row["message_count"], 2)
+        self.assertIsNotNone(row["last_message_at"])
+
+
+class CounterMigrationTests(TransactionTestCase):
+    before = [("api", "0007_chat_indexes")]
+    after = [("api", "0008_session_message_counters")]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_counters_are_backfilled(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        apps = executor.loader.project_state(self.before).apps
+        ChatSession = apps.get_model("api", "ChatSession")
+        History = apps.get_model("api", "History")
+        user_id = make_user().pk
+        busy, empty = ChatSession.objects.create(user_id=user_id), ChatSession.objects.create(user_id=user_id)
+        for message in ("hi", "hello", "bye"):
+            History.objects.create(session=busy, sender="user", message=message)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+        ChatSession = executor.loader.project_state(self.after).apps.get_model("api", "ChatSession")
+        counts = dict(ChatSession.objects.values_list("id", "message_count"))
+        self.assertEqual(counts, {busy.id: 3, empty.id: 0})
+        self.assertEqual(
+            ChatSession.objects.get(pk=busy.id).last_message_at,
+            History.objects.filter(session=busy).latest("timestamp").timestamp,
+        )
+        self.assertIsNone(ChatSession.objects.get(pk=empty.id).last_message_at)
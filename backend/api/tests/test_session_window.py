@@ -0,0 +1,60 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from api.model.session import ChatSession
+from api.utils import session_window
+from api.utils.chat_turn import finish_turn, start_turn
+from .helpers import make_user
+
+
+class SessionWindowTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user()
+        with self.captureOnCommitCallbacks(execute=True):
+            finish_turn(start_turn(self.user, None, "what is malaria"), "A disease.")
+        self.session = ChatSession.objects.get()
+
+    def finish(self, turn, answer):
+        with self.captureOnCommitCallbacks(execute=True):
+            finish_turn(turn, answer)
+
+    def test_disabled_without_a_shared_cache(self):
+        self.assertIsNone(session_window.get_window(self.session.id, self.user.pk))
+        with self.assertNumQueries(1):
+            turn = start_turn(self.user, self.session.id, "how is it treated")
+        self.assertEqual(len(turn.history), 3)
+
+    @mock.patch.object(session_window, "ENABLED", True)
+    def test_warm_window_skips_the_database(self):
+        self.finish(start_turn(self.user, self.session.id, "how is it treated"), "With antimalarials.")
+        with self.assertNumQueries(0):
+            turn = start_turn(self.user, self.session.id, "is it contagious")
+        self.assertEqual(
+            [m["message"] for m in turn.history],
+            ["what is malaria", "A disease.", "how is it treated", "With antimalarials.", "is it contagious"],
+        )
+
+    @mock.patch.object(session_window, "ENABLED", True)
+    def test_concurrent_turns_do_not_overwrite_each_other(self):
+        self.finish(start_turn(self.user, self.session.id, "how is it treated"), "With antimalarials.")
+        first = start_turn(self.user, self.session.id, "is it contagious")
+        second = start_turn(self.user, self.session.id, "what are the symptoms")
+
+        self.finish(first, "No.")
+        self.finish(second, "Fever and chills.")
+
+        # The second turn's window would have lost the first turn, so it was dropped
+        self.assertIsNone(session_window.get_window(self.session.id, self.user.pk))
+        turn = start_turn(self.user, self.session.id, "thanks")
+        self.assertEqual(
+            {m["message"] for m in turn.history},
+            {"is it contagious", "No.", "what are the symptoms", "Fever and chills.", "With antimalarials.", "thanks"},
+        )
+
+    @mock.patch.object(session_window, "ENABLED", True)
+    def test_window_belongs_to_its_user(self):
+        self.finish(start_turn(self.user, self.session.id, "how is it treated"), "With antimalarials.")
+        self.assertIsNone(session_window.get_window(self.session.id, make_user().pk))
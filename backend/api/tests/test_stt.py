@@ -0,0 +1,110 @@
+import threading
+import time
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from api.utils import stt
+from api.utils.stt import (
+    EnginePool,
+    NoSpeech,
+    STTBusy,
+    STTEngine,
+    STTTimeout,
+    STTUnavailable,
+    StubEngine,
+)
+
+
+class EngineTests(SimpleTestCase):
+    def test_engine_is_abstract(self):
+        with self.assertRaises(TypeError):
+            STTEngine()
+
+    def test_stub_engine(self):
+        engine = StubEngine("hello")
+        self.assertEqual(engine.transcribe(np.ones(160, dtype=np.int16)), "hello")
+        self.assertEqual(engine.version, "stub")
+        with self.assertRaises(NoSpeech):
+            engine.transcribe(np.zeros(160, dtype=np.int16))
+
+
+class EchoEngine(STTEngine):
+    """Returns the first sample as text; 0 means silence. Records the thread that built it."""
+    name = "echo"
+    built = []
+
+    def __init__(self):
+        self.built.append(threading.current_thread().name)
+
+    def transcribe(self, pcm):
+        if not pcm[0]:
+            raise NoSpeech()
+        time.sleep(float(pcm[1]) / 1000)
+        return str(pcm[0])
+
+
+class BrokenEngine(STTEngine):
+    name = "broken"
+
+    def __init__(self):
+        raise STTUnavailable("model missing")
+
+    def transcribe(self, pcm):
+        raise AssertionError("never built")
+
+
+def clip(value, delay_ms=0):
+    return np.array([value, delay_ms] + [1] * 10, dtype=np.int16)
+
+
+class EnginePoolTests(SimpleTestCase):
+    def setUp(self):
+        EchoEngine.built = []
+        patcher = mock.patch.dict(stt.ENGINES, {"echo": EchoEngine, "broken": BrokenEngine})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        pools = mock.patch.dict(stt._pools, clear=True)
+        pools.start()
+        self.addCleanup(pools.stop)
+        self.addCleanup(lambda: [pool._executor.shutdown() for pool in stt._pools.values()])
+
+    def test_each_worker_builds_its_engine_once(self):
+        pool = EnginePool(EchoEngine, workers=2)
+        self.addCleanup(pool._executor.shutdown)
+        futures = [pool.submit(clip(n, 5)) for n in range(1, 9)]
+        self.assertEqual([f.result()[0] for f in futures], [str(n) for n in range(1, 9)])
+        self.assertLessEqual(len(EchoEngine.built), 2)
+        self.assertEqual(len(set(EchoEngine.built)), len(EchoEngine.built))
+
+    def test_full_queue_is_busy(self):
+        pool = EnginePool(EchoEngine, workers=1, max_pending=1)
+        self.addCleanup(pool._executor.shutdown)
+        pool.submit(clip(1, 300))
+        with self.assertRaises(STTBusy):
+            pool.submit(clip(2), queue_timeout=0.01)
+
+    def test_slow_engine_times_out(self):
+        pool = EnginePool(EchoEngine, workers=1)
+        self.addCleanup(pool._executor.shutdown)
+        with self.assertRaises(STTTimeout):
+            pool.transcribe(clip(1, 300), timeout=0.05)
+
+    def test_segments_are_joined_in_order_without_silent_ones(self):
+        pool = EnginePool(EchoEngine, workers=3)
+        self.addCleanup(pool._executor.shutdown)
+        # Later segments finish first; the text keeps the spoken order
+        segments = [clip(1, 60), clip(0), clip(2, 30), clip(3)]
+        self.assertEqual(pool.transcribe_segments(segments), ("1 2 3", "echo"))
+        with self.assertRaises(NoSpeech):
+            pool.transcribe_segments([clip(0), clip(0)])
+
+    def test_unavailable_engine_hands_over_to_the_next(self):
+        result = stt.transcribe(clip(7), engines=["broken", "echo"], segment=False)
+        self.assertEqual((result.text, result.engine), ("7", "echo"))
+        with self.assertRaises(STTUnavailable):
+            stt.transcribe(clip(7), engines=["broken", "missing"], segment=False)
+
+    def test_engine_versions_follow_the_chain(self):
+        self.assertEqual(stt.engine_versions(["echo", "missing", "stub"]), ["echo", "stub"])
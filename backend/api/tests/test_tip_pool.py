@@ -0,0 +1,73 @@
+import datetime
+from unittest import mock
+
+from django.test import TestCase
+
+from api.model.dailytip import DailyTip
+from api.model.healthtip import HealthTip
+from api.utils.tip_pool import assign_daily_tips, prefetch_tips, upsert_tips
+from api.utils.tips import TipData
+
+DAY = datetime.date(2026, 3, 1)
+
+
+def make_tips(n, source="cdc"):
+    return [HealthTip.objects.create(source=source, external_id=str(i), body=f"Tip {i}.") for i in range(n)]
+
+
+class AssignDailyTipsTests(TestCase):
+    def test_fills_the_day_once(self):
+        make_tips(5)
+        first = assign_daily_tips(DAY)
+        self.assertEqual(len(first), 3)
+        self.assertEqual(assign_daily_tips(DAY), first)
+        self.assertEqual(list(DailyTip.objects.filter(date=DAY).order_by("slot").values_list("slot", flat=True)),
+                         [0, 1, 2])
+        self.assertEqual(HealthTip.objects.filter(last_used=DAY).count(), 3)
+
+    def test_tops_up_free_slots(self):
+        tips = make_tips(5)
+        DailyTip.objects.create(tip=tips[4], date=DAY, slot=1)
+        HealthTip.objects.filter(pk=tips[4].pk).update(last_used=DAY)
+        result = assign_daily_tips(DAY)
+        self.assertEqual(result[1], tips[4])
+        self.assertEqual(sorted(DailyTip.objects.filter(date=DAY).values_list("slot", flat=True)), [0, 1, 2])
+
+    def test_recently_used_tips_are_not_repeated(self):
+        tips = make_tips(4)
+        HealthTip.objects.filter(pk__in=[t.pk for t in tips[:2]]).update(last_used=DAY - datetime.timedelta(days=1))
+        self.assertEqual(assign_daily_tips(DAY), tips[2:])
+
+    def test_losing_a_concurrent_assignment_keeps_the_winners_tips(self):
+        tips = make_tips(6)
+        real_bulk_create = DailyTip.objects.bulk_create
+
+        def race(objs, **kwargs):
+            # Another request assigned the day between our read and our insert
+            DailyTip.objects.create(tip=tips[5], date=DAY, slot=0)
+            HealthTip.objects.filter(pk=tips[5].pk).update(last_used=DAY)
+            return real_bulk_create(objs, **kwargs)
+
+        with mock.patch.object(DailyTip.objects, "bulk_create", side_effect=race):
+            result = assign_daily_tips(DAY)
+        self.assertEqual(result, [tips[5], tips[1], tips[2]])
+        self.assertEqual(DailyTip.objects.filter(date=DAY).count(), 3)
+        # tips[0] lost slot 0, so it stays in the pool
+        self.assertIsNone(HealthTip.objects.get(pk=tips[0].pk).last_used)
+
+
+class PrefetchTipsTests(TestCase):
+    def test_upsert_refreshes_known_tips(self):
+        upsert_tips([TipData("cdc", "1", "Old", "Old.")])
+        upsert_tips([TipData("cdc", "1", "New", "New."), TipData("cdc", "2", "", "Other.")])
+        self.assertEqual(HealthTip.objects.count(), 2)
+        self.assertEqual(HealthTip.objects.get(external_id="1").body, "New.")
+
+    def test_fetches_only_what_the_window_needs(self):
+        make_tips(4)
+        fetched = [TipData("cdc", f"new-{i}", "", f"New {i}.") for i in range(2)]
+        with mock.patch("api.utils.tip_pool.fetch_tips", return_value=fetched) as fetch:
+            stats = prefetch_tips(days=2, start=DAY)
+        fetch.assert_called_once_with(count=2)
+        self.assertEqual(stats["fetched"], 2)
+        self.assertEqual(DailyTip.objects.filter(date__in=[DAY, DAY + datetime.timedelta(days=1)]).count(), 6)
@@ -0,0 +1,134 @@
+import asyncio
+import time
+from unittest import mock
+
+import httpx
+from django.test import SimpleTestCase
+
+from api.utils import tips
+from api.utils.tips import CircuitBreaker, fetch_tips_async
+
+TOPICS = {"Result": {"Items": [{"TopicId": "1"}, {"Id": "2"}, {"Title": "no id"}]}}
+DETAILS = {
+    "1": {"Result": {"Title": "Sleep", "Summary": "Sleep 7 hours. Every night."}},
+    "2": {"Result": {"Title": "Water", "Summary": "Drink water."}},
+}
+CDC = {"results": [{"id": 10, "title": "Wash hands", "description": "Wash your hands. Often."},
+                   {"id": 11, "title": "Vaccinate", "description": ""}]}
+SLIP = {"slip": {"slip_id": 7, "advice": "Take a walk."}}
+
+
+def respond(request: httpx.Request) -> httpx.Response:
+    path = request.url.path
+    if path.endswith("/itemlist.json"):
+        return httpx.Response(200, json=TOPICS)
+    if path.endswith("/topicsearch.json"):
+        return httpx.Response(200, json=DETAILS[request.url.params["TopicId"]])
+    if path.endswith("/resources/media"):
+        return httpx.Response(200, json=CDC)
+    if path.endswith("/advice"):
+        return httpx.Response(200, json=SLIP)
+    return httpx.Response(404)
+
+
+def failing(source):
+    """``respond``, except that ``source``'s host returns 503."""
+    host = httpx.URL(tips.SOURCE_URLS[source]).host
+
+    def handler(request):
+        return httpx.Response(503) if request.url.host == host else respond(request)
+    return handler
+
+
+def fetch(handler, count=3, deadline=5):
+    return asyncio.run(fetch_tips_async(count, deadline, transport=httpx.MockTransport(handler)))
+
+
+class FetchTipsTests(SimpleTestCase):
+    def setUp(self):
+        breakers = {name: CircuitBreaker(name, failures=2, reset_after=60) for name in tips.SOURCES}
+        patcher = mock.patch.object(tips, "breakers", breakers)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_merged_in_priority_order(self):
+        # count exceeds the topics with an id; the sample is taken from those
+        result = fetch(respond, count=5)
+        self.assertEqual([t.source for t in result], ["myhealthfinder"] * 2 + ["cdc"] * 2 + ["adviceslip"])
+        self.assertEqual({t.body for t in result[:2]}, {"Sleep 7 hours.", "Drink water."})
+        self.assertEqual(result[2].body, "Wash your hands.")
+        self.assertEqual(result[3].body, "Vaccinate.")
+
+    def test_count_keeps_the_highest_priority_tips(self):
+        result = fetch(respond, count=3)
+        self.assertEqual([t.source for t in result], ["myhealthfinder", "myhealthfinder", "cdc"])
+
+    def test_duplicates_are_dropped(self):
+        with mock.patch.dict(CDC, results=[CDC["results"][0]] * 3):
+            result = fetch(failing("myhealthfinder"), count=5)
+        self.assertEqual([(t.source, t.external_id) for t in result], [("cdc", "10"), ("adviceslip", "7")])
+
+    def test_failed_source_is_skipped(self):
+        result = fetch(failing("cdc"), count=5)
+        self.assertNotIn("cdc", {t.source for t in result})
+        self.assertEqual(tips.breakers["cdc"].failures, 1)
+
+    def test_slow_source_misses_the_deadline(self):
+        slow_host = httpx.URL(tips.SOURCE_URLS["myhealthfinder"]).host
+
+        async def handler(request):
+            if request.url.host == slow_host:
+                await asyncio.sleep(5)
+            return respond(request)
+
+        started = time.monotonic()
+        result = fetch(handler, count=5, deadline=0.2)
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual([t.source for t in result], ["cdc", "cdc", "adviceslip"])
+        self.assertEqual(tips.breakers["myhealthfinder"].failures, 1)
+
+    def test_breaker_opens_and_resets(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.host)
+            return failing("adviceslip")(request)
+
+        slip_host = httpx.URL(tips.SOURCE_URLS["adviceslip"]).host
+        fetch(handler)
+        fetch(handler)
+        self.assertEqual(tips.breakers["adviceslip"].state, "open")
+
+        calls.clear()
+        fetch(handler)
+        self.assertNotIn(slip_host, calls)
+
+        # Past the reset window the source gets one trial request
+        tips.breakers["adviceslip"].opened_at -= 61
+        self.assertEqual(tips.breakers["adviceslip"].state, "half-open")
+        result = fetch(respond, count=5)
+        self.assertIn("adviceslip", {t.source for t in result})
+        self.assertEqual(tips.breakers["adviceslip"].state, "closed")
+
+    def test_half_open_failure_reopens_at_once(self):
+        breaker = tips.breakers["cdc"]
+        breaker.failures, breaker.opened_at = 2, 0.0
+        self.assertEqual(breaker.state, "half-open")
+        fetch(failing("cdc"))
+        self.assertEqual(breaker.state, "open")
+
+    def test_tips_without_an_id_are_keyed_by_their_text(self):
+        results = [{"title": "Wash hands", "description": "Wash your hands."},
+                   {"title": "Sleep", "description": "Sleep well."}]
+        with mock.patch.dict(CDC, results=results), mock.patch.dict(SLIP, slip={"advice": "Take a walk."}):
+            result = fetch(failing("myhealthfinder"), count=5)
+        ids = [t.external_id for t in result]
+        self.assertEqual(len(set(ids)), 3)
+        self.assertTrue(all(i.startswith("sha1:") for i in ids))
+        self.assertEqual(fetch(failing("myhealthfinder"), count=5)[0].external_id, "10")
+
+    def test_all_sources_open(self):
+        for breaker in tips.breakers.values():
+            breaker.record_failure()
+            breaker.record_failure()
+        self.assertEqual(fetch(respond), [])
@@ -0,0 +1,45 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from api.utils.audio import SAMPLE_RATE
+from api.utils.vad import speech_segments
+
+
+def tone(seconds, amplitude=8000):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.int16)
+
+
+def silence(seconds, amplitude=30, seed=0):
+    noise = np.random.default_rng(seed).normal(0, amplitude, int(seconds * SAMPLE_RATE))
+    return noise.astype(np.int16)
+
+
+class SpeechSegmentsTests(SimpleTestCase):
+    def test_silence_has_no_speech(self):
+        self.assertEqual(speech_segments(silence(2)), [])
+        self.assertEqual(speech_segments(np.zeros(0, dtype=np.int16)), [])
+
+    def test_separate_utterances_become_separate_segments(self):
+        pcm = np.concatenate([silence(1), tone(1), silence(1, seed=1), tone(1), silence(1, seed=2)])
+        segments = speech_segments(pcm)
+        self.assertEqual(len(segments), 2)
+        for (start, end), expected in zip(segments, (1.0, 3.0)):
+            self.assertAlmostEqual(start / SAMPLE_RATE, expected - 0.15, delta=0.05)
+            self.assertAlmostEqual(end / SAMPLE_RATE, expected + 1.15, delta=0.05)
+
+    def test_short_pauses_are_bridged_and_blips_dropped(self):
+        pcm = np.concatenate([silence(1), tone(1), silence(0.1, seed=1), tone(1), silence(1, seed=2),
+                              tone(0.06), silence(1, seed=3)])
+        self.assertEqual(len(speech_segments(pcm)), 1)
+
+    def test_long_speech_is_cut_below_the_limit(self):
+        pcm = np.concatenate([silence(0.5), tone(5), silence(0.5, seed=1)])
+        segments = speech_segments(pcm, max_segment_s=2)
+        self.assertGreater(len(segments), 1)
+        self.assertTrue(all(end - start <= 2 * SAMPLE_RATE for start, end in segments))
+        self.assertEqual([s for s, _ in segments[1:]], [e for _, e in segments[:-1]])
+
+    def test_speech_running_to_the_end_keeps_the_tail(self):
+        pcm = np.concatenate([silence(1), tone(1), tone(0.01)])
+        self.assertEqual(speech_segments(pcm)[-1][1], len(pcm))
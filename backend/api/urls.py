@@ -3,9 +3,12 @@ from .views import *
 
 urlpatterns = [
     path('chatbot/', ChatbotAPIView.as_view(), name='chatbot'),
+    path('chatbot/async/', AsyncChatbotView.as_view(), name='chatbot-async'),
+    path('chatbot/stream/', ChatbotStreamView.as_view(), name='chatbot-stream'),
     path('chat-sessions/', ChatSessionListAPIView.as_view(), name='chat-sessions'),
     path('chat-sessions/<int:session_id>/', ChatHistoryAPIView.as_view(), name='chat-session-messages'),
     path('chat-sessions/<int:session_id>/delete/', ChatSessionDeleteAPIView.as_view(), name='delete-chat-session'),
     path("chat/audio/", ChatbotAudioAPIView.as_view(), name="chat-audio"),
+    path("chat/audio/jobs/<uuid:job_id>/", AudioJobStatusAPIView.as_view(), name="chat-audio-job"),
     path("daily-tip/", DailyTipView.as_view(), name="daily-tip"),
 ] 
\ No newline at end of file
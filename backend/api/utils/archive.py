@@ -0,0 +1,148 @@
+# api/utils/archive.py
+"""Tiered retention for chat history.
+
+Sessions idle for ``CHAT_ARCHIVE_AFTER_DAYS`` have their messages serialized
+into a single gzip-compressed JSON blob (``ArchivedSession``) and removed from
+``History``; the session row stays, marked ``is_active=False``. Opening or
+continuing an archived session rehydrates it back into ``History`` with the
+original ids and timestamps, so cursors and ordering are unchanged. It is
+recorded in ``rehydrated_at`` (not ``updated_at``, which orders the session
+list), and the session is not archived again until it has been idle for
+another ``CHAT_ARCHIVE_AFTER_DAYS``.
+"""
+import gzip
+import json
+import logging
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from api.model.answer import AnswerCatalog
+from api.model.archive import ArchivedSession
+from api.model.history import History
+from api.model.session import ChatSession
+from .session_window import invalidate_window
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_AFTER_DAYS = getattr(settings, "CHAT_ARCHIVE_AFTER_DAYS", 90)
+BATCH_SIZE = getattr(settings, "CHAT_ARCHIVE_BATCH_SIZE", 50)
+
+
+def _pack(messages: list[dict]) -> bytes:
+    return gzip.compress(json.dumps(messages, separators=(",", ":")).encode("utf-8"))
+
+
+def _unpack(blob) -> list[dict]:
+    return json.loads(gzip.decompress(bytes(blob)).decode("utf-8"))
+
+
+def _serialize(message: History) -> dict:
+    return {
+        "id": message.id,
+        "sender": message.sender,
+        # Catalog answers are resolved so the archive is self-contained; the
+        # reference is kept so rehydration stores them by reference again
+        "message": message.body,
+        "answer_id": message.answer_id,
+        "audio": message.audio.name or "",
+        "timestamp": message.timestamp.isoformat(),
+        "created_at": message.created_at.isoformat(),
+    }
+
+
+def archive_session(session_id, idle_before=None) -> int:
+    """Move one session's messages into its archive blob; returns the number archived.
+
+    The session row is locked for the duration, which also blocks new messages
+    being written to it (their FK check needs a key-share lock on the row).
+    """
+    with transaction.atomic():
+        locked = ChatSession.objects.select_for_update().filter(pk=session_id, is_active=True)
+        if idle_before is not None:
+            # Re-check under the lock: the session may have been used since it was selected
+            locked = locked.filter(_idle(idle_before))
+        session = locked.first()
+        if session is None:
+            return 0
+
+        messages = list(
+            History.objects.filter(session=session).select_related("answer").order_by("timestamp", "id")
+        )
+        if messages:
+            ArchivedSession.objects.create(
+                session=session, blob=_pack([_serialize(m) for m in messages]),
+                message_count=len(messages),
+            )
+            History.objects.filter(id__in=[m.id for m in messages]).delete()
+        # Not via save(): archiving must not bump updated_at
+        ChatSession.objects.filter(pk=session.pk).update(is_active=False)
+        transaction.on_commit(lambda: invalidate_window(session.pk))
+    return len(messages)
+
+
+def _idle(cutoff) -> Q:
+    """Sessions neither updated nor rehydrated since ``cutoff``."""
+    return Q(updated_at__lt=cutoff) & (Q(rehydrated_at__isnull=True) | Q(rehydrated_at__lt=cutoff))
+
+
+def archive_inactive_sessions(days: int | None = None, batch_size: int | None = None,
+                              limit: int | None = None) -> tuple[int, int]:
+    """Archive sessions idle for ``days``, one transaction per session, in batches of ids.
+
+    Returns ``(sessions, messages)`` archived.
+    """
+    days = ARCHIVE_AFTER_DAYS if days is None else days
+    batch_size = batch_size or BATCH_SIZE
+    cutoff = timezone.now() - timedelta(days=days)
+    candidates = ChatSession.objects.filter(_idle(cutoff), is_active=True).order_by("id")
+
+    sessions = messages = 0
+    last_id = 0
+    while limit is None or sessions < limit:
+        batch = list(candidates.filter(id__gt=last_id).values_list("id", flat=True)[:batch_size])
+        if not batch:
+            break
+        for session_id in batch:
+            messages += archive_session(session_id, idle_before=cutoff)
+            sessions += 1
+            if limit is not None and sessions >= limit:
+                break
+        last_id = batch[-1]
+        logger.info("history archival: %d sessions, %d messages so far", sessions, messages)
+    return sessions, messages
+
+
+def rehydrate_session(session: ChatSession) -> int:
+    """Restore an archived session's messages into ``History``; returns the number restored."""
+    with transaction.atomic():
+        archive = ArchivedSession.objects.select_for_update().filter(session=session).first()
+        restored = 0
+        if archive is not None:
+            rows = _unpack(archive.blob)
+            # Catalog entries are keyed by content, so any that went missing are recreated as-is
+            AnswerCatalog.objects.bulk_create([
+                AnswerCatalog(id=row["answer_id"], body=row["message"]) for row in rows if row.get("answer_id")
+            ], ignore_conflicts=True, batch_size=500)
+            messages = History.objects.bulk_create([
+                History(id=row["id"], session=session, sender=row["sender"],
+                        message="" if row.get("answer_id") else row["message"],
+                        answer_id=row.get("answer_id"), audio=row["audio"] or None)
+                for row in rows
+            ], batch_size=500)
+            # auto_now_add overwrote the timestamps on insert; put the originals back
+            for message, row in zip(messages, rows):
+                message.timestamp = datetime.fromisoformat(row["timestamp"])
+                message.created_at = datetime.fromisoformat(row["created_at"])
+            History.objects.bulk_update(messages, ["timestamp", "created_at"], batch_size=500)
+            archive.delete()
+            restored = len(rows)
+        # Opening the session holds off the next archival run, but updated_at (the
+        # session list's keyset order) only moves when a message is sent
+        now = timezone.now()
+        ChatSession.objects.filter(pk=session.pk).update(is_active=True, rehydrated_at=now)
+        session.is_active, session.rehydrated_at = True, now
+    return restored
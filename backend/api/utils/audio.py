@@ -0,0 +1,186 @@
+# api/utils/audio.py
+"""In-memory audio decoding for voice messages.
+
+The upload is streamed into an ``ffmpeg`` subprocess over stdin and comes back
+on stdout as 16 kHz mono signed 16-bit PCM, collected straight into a NumPy
+buffer - no temp files and a single decode. Upload size and decoded duration
+limits are enforced while streaming, so oversized input is rejected as soon as
+it crosses a limit instead of after it has been fully read.
+"""
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import threading
+
+import numpy as np
+import speech_recognition as sr
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import MemoryFileUploadHandler
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2  # bytes, s16le
+MAX_UPLOAD_BYTES = getattr(settings, "AUDIO_MAX_UPLOAD_BYTES", 10 * 1024 * 1024)
+MAX_SECONDS = getattr(settings, "AUDIO_MAX_SECONDS", 60)
+DECODE_TIMEOUT = getattr(settings, "AUDIO_DECODE_TIMEOUT", 30)
+READ_SIZE = 64 * 1024
+STDERR_TAIL = 4096  # bytes of ffmpeg diagnostics kept for the error message
+
+# Container hints for formats ffmpeg cannot always probe from a pipe
+INPUT_FORMATS = {"opus": "ogg", "oga": "ogg", "ogg": "ogg", "webm": "webm", "wav": "wav", "mp3": "mp3"}
+
+
+class AudioRejected(Exception):
+    """The upload exceeds a size or duration limit."""
+
+
+class AudioDecodeError(Exception):
+    """ffmpeg is missing or could not decode the upload."""
+
+
+class AudioUploadHandler(MemoryFileUploadHandler):
+    """Keeps voice uploads up to ``AUDIO_MAX_UPLOAD_BYTES`` in memory for the ffmpeg pipe.
+
+    Installed by the audio view only, so the global
+    ``FILE_UPLOAD_MAX_MEMORY_SIZE`` still applies to every other upload.
+    """
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        self.activated = content_length <= MAX_UPLOAD_BYTES
+
+
+def _ffmpeg_command(ext: str | None) -> list[str]:
+    binary = getattr(settings, "FFMPEG_BINARY", None) or shutil.which("ffmpeg")
+    if not binary:
+        raise AudioDecodeError("ffmpeg is not installed")
+    cmd = [binary, "-nostdin", "-hide_banner", "-loglevel", "error"]
+    if ext in INPUT_FORMATS:
+        cmd += ["-f", INPUT_FORMATS[ext]]
+    return cmd + ["-i", "pipe:0", "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1"]
+
+
+def decode_upload(upload, max_bytes: int | None = None, max_seconds: float | None = None) -> np.ndarray:
+    """Decode an uploaded file to 16 kHz mono int16 PCM.
+
+    Raises ``AudioRejected`` when the upload or its decoded audio is over the
+    limit and ``AudioDecodeError`` when ffmpeg fails.
+    """
+    max_bytes = MAX_UPLOAD_BYTES if max_bytes is None else max_bytes
+    max_seconds = MAX_SECONDS if max_seconds is None else max_seconds
+    if upload.size is not None and upload.size > max_bytes:
+        raise AudioRejected(f"Audio upload is larger than {max_bytes} bytes")
+
+    ext = upload.name.rsplit(".", 1)[-1].lower() if "." in (upload.name or "") else None
+    proc = subprocess.Popen(
+        _ffmpeg_command(ext), stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+    rejected = []
+    stderr = bytearray()
+
+    def drain():
+        # ffmpeg blocks once the stderr pipe is full, so it is read as it comes
+        for line in proc.stderr:
+            stderr.extend(line)
+            del stderr[:-STDERR_TAIL]
+
+    def feed():
+        # Runs alongside the stdout reader so neither pipe can fill up and deadlock
+        sent = 0
+        try:
+            for chunk in upload.chunks():
+                sent += len(chunk)
+                if sent > max_bytes:
+                    rejected.append(f"Audio upload is larger than {max_bytes} bytes")
+                    proc.kill()
+                    return
+                proc.stdin.write(chunk)
+        except (BrokenPipeError, ValueError):
+            pass  # ffmpeg exited early; its return code reports why
+        finally:
+            try:
+                proc.stdin.close()
+            except (BrokenPipeError, OSError):
+                pass
+
+    writer = threading.Thread(target=feed, daemon=True)
+    writer.start()
+    reader = threading.Thread(target=drain, daemon=True)
+    reader.start()
+    timer = threading.Timer(DECODE_TIMEOUT, proc.kill)
+    timer.start()
+
+    max_pcm_bytes = int(max_seconds * SAMPLE_RATE) * SAMPLE_WIDTH
+    buffer = bytearray()
+    try:
+        while True:
+            chunk = proc.stdout.read(READ_SIZE)
+            if not chunk:
+                break
+            buffer += chunk
+            if len(buffer) > max_pcm_bytes:
+                rejected.append(f"Audio is longer than {max_seconds:g} seconds")
+                proc.kill()
+                break
+        proc.wait()
+    finally:
+        timer.cancel()
+        writer.join()
+        reader.join()
+        proc.stdout.close()
+        proc.stderr.close()
+
+    if rejected:
+        raise AudioRejected(rejected[0])
+    if proc.returncode != 0:
+        raise AudioDecodeError(stderr.decode("utf-8", "replace").strip() or "ffmpeg failed to decode audio")
+    # Drop a trailing odd byte, if any, before viewing as int16
+    usable = len(buffer) - len(buffer) % SAMPLE_WIDTH
+    return np.frombuffer(bytes(buffer[:usable]), dtype=np.int16)
+
+
+def to_audio_data(pcm: np.ndarray) -> sr.AudioData:
+    """Wrap PCM for SpeechRecognition recognizers."""
+    return sr.AudioData(pcm.tobytes(), SAMPLE_RATE, SAMPLE_WIDTH)
+
+
+def to_float32(pcm: np.ndarray) -> np.ndarray:
+    """PCM as float32 in [-1, 1], the input format whisper expects."""
+    return pcm.astype(np.float32) / 32768.0
+
+
+# ---- Content-addressed storage ----
+# Uploads are stored as chat_audio/<aa>/<sha256>.<ext>, so identical clips share
+# one file and the name alone identifies the content (and its cached transcript).
+AUDIO_DIR = "chat_audio"
+DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def hash_upload(upload) -> str:
+    digest = hashlib.sha256()
+    for chunk in upload.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def audio_name(digest: str, filename: str) -> str:
+    ext = os.path.splitext(filename or "")[1].lower()
+    return f"{AUDIO_DIR}/{digest[:2]}/{digest}{ext}"
+
+
+def store_audio(upload, digest: str | None = None) -> str:
+    """Save ``upload`` under its content hash unless that file already exists; returns the name."""
+    name = audio_name(digest or hash_upload(upload), upload.name)
+    if not default_storage.exists(name):
+        name = default_storage.save(name, upload)
+    return name
+
+
+def audio_digest(field_file) -> str:
+    """Content hash of a stored audio file (read from the name when content-addressed)."""
+    stem = os.path.splitext(os.path.basename(field_file.name))[0]
+    if DIGEST_RE.match(stem):
+        return stem
+    with field_file.open("rb") as f:
+        return hash_upload(f)
@@ -0,0 +1,104 @@
+# api/utils/chat.py
+"""CPU-bound part of a chat turn, shared by the sync, async and streaming views."""
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from django.conf import settings
+
+from .utils import classify_question, QueryFeatures
+from .utils_followup import build_context
+from nlp.service.pipeline import PipelineResult
+from nlp.service.services import answer_question
+
+RECENT_MESSAGES = 6
+UNANSWERED_REPLY = "I’m not sure yet 🤔, but I’ll learn from this question!"
+
+
+@dataclass
+class TurnAnswer:
+    context_text: str
+    label: str
+    features: QueryFeatures
+    result: PipelineResult | None = None
+
+    @property
+    def answered(self) -> bool:
+        return self.result is not None and self.result.answered
+
+    @property
+    def catalog(self) -> bool:
+        """Whether the answer is a dataset text that can be stored by reference."""
+        return self.answered and self.result.catalog
+
+    @property
+    def answer(self) -> str:
+        return self.result.answer if self.answered else UNANSWERED_REPLY
+
+
+def classify_turn(question: str, history: list[dict]) -> TurnAnswer:
+    """Context building → classification; cheap enough to report before retrieval."""
+    context_text = build_context(history, question, max_messages=RECENT_MESSAGES)
+
+    # Features are vectorized once and shared by the classifier and retrieval
+    features = QueryFeatures(question, context_text)
+    label = classify_question(features)
+    return TurnAnswer(context_text=context_text, label=label, features=features)
+
+
+def retrieve_answer(turn: TurnAnswer, question: str, history: list[dict]) -> TurnAnswer:
+    """Staged retrieval for a classified turn."""
+    turn.result = answer_question(
+        question, label=turn.label, history=history, context=turn.context_text,
+        features=turn.features,
+    )
+    return turn
+
+
+def answer_turn(question: str, history: list[dict]) -> TurnAnswer:
+    """Context building → classification → staged retrieval for one turn."""
+    return retrieve_answer(classify_turn(question, history), question, history)
+
+
+# ---- Bounded offloading for async views ----
+# Retrieval (SVM, SBERT, FAISS) runs in a small thread pool so the event loop
+# never blocks on it. Threads share the already-loaded models; numpy, FAISS and
+# torch release the GIL for the heavy parts.
+_executor = ThreadPoolExecutor(
+    max_workers=settings.CHAT_RETRIEVAL_WORKERS, thread_name_prefix="chat-retrieval"
+)
+_pending: dict[asyncio.AbstractEventLoop, asyncio.Semaphore] = {}
+
+
+class RetrievalBusy(Exception):
+    """Raised when the retrieval pool's queue stayed full past the timeout."""
+
+
+def _pending_slots() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    if loop not in _pending:
+        _pending[loop] = asyncio.Semaphore(settings.CHAT_RETRIEVAL_MAX_PENDING)
+    return _pending[loop]
+
+
+async def run_in_retrieval_pool(func, *args):
+    """Run ``func(*args)`` in the retrieval pool, bounding how much work may queue up."""
+    slots = _pending_slots()
+    try:
+        await asyncio.wait_for(slots.acquire(), timeout=settings.CHAT_RETRIEVAL_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise RetrievalBusy()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor, func, *args)
+    finally:
+        slots.release()
+
+
+async def answer_turn_async(question: str, history: list[dict]) -> TurnAnswer:
+    return await run_in_retrieval_pool(answer_turn, question, history)
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
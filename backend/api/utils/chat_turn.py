@@ -0,0 +1,131 @@
+# api/utils/chat_turn.py
+"""Chat-turn persistence: one read to start a turn, one transaction to finish it.
+
+``start_turn`` fetches the session together with its recent messages and keeps
+the new user message in memory. ``finish_turn`` writes the user and bot
+messages with a single ``bulk_create`` (dataset answers are stored as a
+reference into the answer catalog), records the miss (if any) and bumps
+the session's ``updated_at`` and message counters in the same transaction.
+Recent messages come from the per-session window cache when it is enabled and warm.
+"""
+from dataclasses import dataclass
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import F
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+
+from api.model.answer import AnswerCatalog
+from api.model.history import History
+from api.model.session import ChatSession
+from api.model.unanswered import Unanswered
+from .archive import rehydrate_session
+from .chat import RECENT_MESSAGES
+from .session_window import get_window, set_window, window_tail
+
+
+@dataclass
+class ChatTurn:
+    user: object
+    session: ChatSession          # unsaved for a brand-new conversation
+    user_message: History         # unsaved until finish_turn()
+    history: list[dict]           # recent messages, oldest first, incl. the new one
+    window_tail: object = None    # newest cached-window timestamp the turn started from
+
+
+def _title_for(question: str) -> str:
+    return question[:50] + ("..." if len(question) > 50 else "")
+
+
+def _session_from_window(session_id, user, window) -> ChatSession:
+    """Rebuild a persisted session instance from its cached window, without a query."""
+    session = ChatSession(id=int(session_id), user=user, title=window["title"])
+    session._state.adding = False
+    return session
+
+
+def _load_recent(user, session_id) -> tuple[ChatSession, list[dict], object]:
+    """Session, its last messages (one query) and the cached window's tail, window cache first."""
+    window = get_window(session_id, user.pk)
+    if window is not None:
+        return _session_from_window(session_id, user, window), list(window["messages"]), window_tail(window)
+
+    recent_qs = (
+        History.objects.filter(session_id=session_id, session__user=user)
+        .select_related("session", "answer")
+        .order_by("-timestamp", "-id")[:RECENT_MESSAGES - 1]
+    )
+    recent = list(recent_qs)
+    if recent:
+        session = recent[0].session
+    else:
+        session = get_object_or_404(ChatSession, id=session_id, user=user)
+        if not session.is_active:
+            # Continuing an archived conversation brings its messages back first
+            rehydrate_session(session)
+            recent = list(recent_qs.all())
+    history = [
+        {"sender": m.sender, "message": m.body, "timestamp": m.timestamp}
+        for m in reversed(recent)
+    ]
+    return session, history, None
+
+
+def start_turn(user, session_id, question: str) -> ChatTurn:
+    tail = None
+    if session_id:
+        session, history, tail = _load_recent(user, session_id)
+        history = history[-(RECENT_MESSAGES - 1):]
+    else:
+        session = ChatSession(user=user, title=_title_for(question))
+        history = []
+
+    user_message = History(session=session, sender="user", message=question)
+    history.append({"sender": "user", "message": question, "timestamp": timezone.now()})
+    return ChatTurn(user=user, session=session, user_message=user_message, history=history, window_tail=tail)
+
+
+def record_messages(session_id, count: int, last_message_at=None):
+    """Bump the session's denormalized counters for ``count`` new messages."""
+    now = timezone.now()
+    ChatSession.objects.filter(pk=session_id).update(
+        message_count=F("message_count") + count,
+        last_message_at=last_message_at or now,
+        updated_at=now,
+    )
+
+
+def finish_turn(turn: ChatTurn, answer: str, answered: bool = True, catalog: bool = False) -> History:
+    """Persist the turn atomically and return the bot message."""
+    session = turn.session
+    with transaction.atomic():
+        is_new = session.pk is None
+        if is_new:
+            session.message_count = 2
+            session.last_message_at = timezone.now()
+            session.save()
+        # Re-bind in case the session was saved after the message was built
+        turn.user_message.session = session
+        if catalog:
+            bot_message = History(session=session, sender="bot", answer=AnswerCatalog.objects.intern(answer))
+        else:
+            bot_message = History(session=session, sender="bot", message=answer)
+        History.objects.bulk_create([turn.user_message, bot_message])
+
+        if not answered:
+            Unanswered.objects.create(user=turn.user, question=turn.user_message.message)
+
+        if not is_new:
+            record_messages(session.pk, 2, last_message_at=bot_message.timestamp)
+
+        # Keep the window in step with what was just written
+        messages = turn.history + [
+            {"sender": "bot", "message": answer, "timestamp": bot_message.timestamp}
+        ]
+        transaction.on_commit(lambda: set_window(session, messages, expected_tail=turn.window_tail))
+    return bot_message
+
+
+astart_turn = sync_to_async(start_turn)
+afinish_turn = sync_to_async(finish_turn)
@@ -0,0 +1,178 @@
+# api/utils/clustering.py
+"""Incremental clustering of unanswered questions.
+
+New (unclustered) questions are embedded in batches with the chat embedder
+(``nlp.utils.embedder``) and compared against the cluster centroids held in a
+FAISS inner-product index; embeddings and centroids are unit length, so the
+score is the cosine similarity. A question joins the nearest cluster when the
+similarity is at least ``UNANSWERED_CLUSTER_SIMILARITY`` (the centroid moves
+to the new running mean), otherwise it starts a new cluster that later
+questions in the same batch can join. Each batch is saved in one transaction.
+
+A run works from centroids loaded at its start, so two runs at once would
+overwrite each other's updates. ``cluster_unanswered`` therefore holds a lease
+(``SchedulerLease`` row ``cluster-unanswered``) for the whole run, renewed
+after every batch, whether it is started by the Celery task or by
+``manage.py cluster_unanswered``; a second run raises ``ClusteringBusy``.
+"""
+import itertools
+import logging
+from contextlib import contextmanager
+
+import faiss
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from api.model.unanswered import Unanswered
+from api.model.unansweredcluster import UnansweredCluster
+from api.scheduler import Lease
+
+logger = logging.getLogger(__name__)
+
+SIMILARITY = getattr(settings, "UNANSWERED_CLUSTER_SIMILARITY", 0.8)
+BATCH_SIZE = getattr(settings, "UNANSWERED_CLUSTER_BATCH_SIZE", 256)
+# Index ids for clusters not inserted yet (FAISS reserves -1 for "no result")
+TEMP_ID_BASE = 1 << 62
+LOCK_NAME = "cluster-unanswered"
+# Renewed after every batch; a run that dies frees the lock after this long
+LOCK_TTL = getattr(settings, "UNANSWERED_CLUSTER_LOCK_TTL", 10 * 60)
+
+
+class ClusteringBusy(Exception):
+    """Another process is clustering right now."""
+
+
+@contextmanager
+def clustering_lock(ttl: float = LOCK_TTL):
+    """Hold the clustering lease for the block; raises ``ClusteringBusy`` if it is taken."""
+    lease = Lease(name=LOCK_NAME, ttl=ttl)
+    if not lease.acquire():
+        raise ClusteringBusy("unanswered questions are already being clustered")
+    try:
+        yield lease
+    finally:
+        lease.release()
+
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+class CentroidIndex:
+    """Cluster centroids in a FAISS index keyed by cluster id, with running sizes for the mean updates."""
+
+    def __init__(self, dim: int):
+        self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+        self.centroids: dict[int, np.ndarray] = {}
+        self.sizes: dict[int, int] = {}
+
+    def add(self, cluster_id: int, centroid: np.ndarray, size: int):
+        self.index.add_with_ids(centroid.reshape(1, -1), np.array([cluster_id], dtype=np.int64))
+        self.centroids[cluster_id] = centroid
+        self.sizes[cluster_id] = size
+
+    def nearest(self, vector: np.ndarray) -> tuple[int | None, float]:
+        if not self.index.ntotal:
+            return None, 0.0
+        scores, ids = self.index.search(vector.reshape(1, -1), 1)
+        return (int(ids[0][0]), float(scores[0][0])) if ids[0][0] >= 0 else (None, 0.0)
+
+    def absorb(self, cluster_id: int, vector: np.ndarray):
+        size = self.sizes[cluster_id]
+        centroid = _unit((self.centroids[cluster_id] * size + vector).reshape(1, -1))[0]
+        self.index.remove_ids(np.array([cluster_id], dtype=np.int64))
+        self.add(cluster_id, centroid, size + 1)
+
+
+def load_index(dim: int) -> CentroidIndex:
+    index = CentroidIndex(dim)
+    for cluster_id, centroid, size in UnansweredCluster.objects.values_list("id", "centroid", "size").iterator():
+        index.add(cluster_id, np.frombuffer(bytes(centroid), dtype=np.float32).copy(), size)
+    return index
+
+
+def cluster_batch(questions: list[tuple], vectors: np.ndarray, index: CentroidIndex,
+                  threshold: float = SIMILARITY) -> dict:
+    """Assign embedded ``(id, text, created_at)`` questions to clusters and save the result."""
+    new_ids = itertools.count(TEMP_ID_BASE)
+    labels, members, last_seen = {}, {}, {}
+    for (question_id, text, created_at), vector in zip(questions, vectors):
+        cluster_id, score = index.nearest(vector)
+        if cluster_id is not None and score >= threshold:
+            index.absorb(cluster_id, vector)
+        else:
+            cluster_id = next(new_ids)
+            index.add(cluster_id, vector, 1)
+            labels[cluster_id] = text
+        members.setdefault(cluster_id, []).append(question_id)
+        last_seen[cluster_id] = max(last_seen.get(cluster_id, created_at), created_at)
+
+    created = {
+        temp_id: UnansweredCluster(
+            label=labels[temp_id], size=index.sizes[temp_id],
+            centroid=index.centroids[temp_id].tobytes(), last_seen_at=last_seen[temp_id],
+        )
+        for temp_id in members if temp_id >= TEMP_ID_BASE
+    }
+    with transaction.atomic():
+        UnansweredCluster.objects.bulk_create(created.values())
+
+        existing = list(UnansweredCluster.objects.filter(id__in=[i for i in members if i < TEMP_ID_BASE]))
+        for cluster in existing:
+            cluster.size = index.sizes[cluster.id]
+            cluster.centroid = index.centroids[cluster.id].tobytes()
+            cluster.last_seen_at = max(cluster.last_seen_at, last_seen[cluster.id])
+        UnansweredCluster.objects.bulk_update(existing, ["size", "centroid", "last_seen_at"])
+
+        for cluster_id, question_ids in members.items():
+            real_id = created[cluster_id].id if cluster_id in created else cluster_id
+            Unanswered.objects.filter(id__in=question_ids).update(cluster_id=real_id)
+
+    # Later batches find the new clusters under their real ids
+    for temp_id, cluster in created.items():
+        index.index.remove_ids(np.array([temp_id], dtype=np.int64))
+        index.add(cluster.id, index.centroids.pop(temp_id), index.sizes.pop(temp_id))
+    return {"questions": len(questions), "new_clusters": len(created), "updated_clusters": len(existing)}
+
+
+def cluster_unanswered(batch_size: int = BATCH_SIZE, threshold: float = SIMILARITY, limit: int | None = None,
+                       progress=None, rebuild: bool = False) -> dict:
+    """Cluster every question not yet assigned to a cluster, oldest first.
+
+    With ``rebuild``, all clusters are dropped first and every stored question is clustered again.
+    """
+    from nlp.utils.embedder import embed_text  # loads the sentence-transformer model
+
+    with clustering_lock() as lease:
+        if rebuild:
+            with transaction.atomic():
+                Unanswered.objects.exclude(cluster=None).update(cluster=None)
+                UnansweredCluster.objects.all().delete()
+
+        pending = (
+            Unanswered.objects.filter(cluster__isnull=True).order_by("id")
+            .values_list("id", "question", "created_at")
+        )
+        totals = {"questions": 0, "new_clusters": 0, "updated_clusters": 0}
+        index = None
+        while limit is None or totals["questions"] < limit:
+            size = batch_size if limit is None else min(batch_size, limit - totals["questions"])
+            questions = list(pending[:size])
+            if not questions:
+                break
+            vectors = _unit(embed_text([text for _, text, _ in questions]))
+            if index is None:
+                index = load_index(vectors.shape[1])
+            if not lease.acquire():
+                # Expired and taken over while embedding; the other run has newer centroids
+                raise ClusteringBusy("clustering lock lost")
+            stats = cluster_batch(questions, vectors, index, threshold)
+            for key in totals:
+                totals[key] += stats[key]
+            logger.info("unanswered clustering: %(questions)d questions, %(new_clusters)d new clusters", totals)
+            if progress:
+                progress(totals)
+    return totals
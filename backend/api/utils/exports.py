@@ -0,0 +1,184 @@
+# api/utils/exports.py
+"""Streaming export and batched cleanup of ``Unanswered`` questions.
+
+Answered questions are read through a server-side cursor in chunks of
+``UNANSWERED_EXPORT_CHUNK_SIZE`` rows and each chunk is appended to every
+requested output before the next is fetched, so memory stays flat however
+large the backlog is. Outputs are written to ``*.part`` files and renamed when
+complete, so a failed (and retried) export never leaves a truncated file.
+
+Formats: ``csv`` (Question, Answer; always written), ``jsonl`` (gzip) and
+``parquet`` (zstd, one row group per chunk; needs ``pyarrow``).
+"""
+import abc
+import csv
+import gzip
+import importlib.util
+import json
+import logging
+import os
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+
+from api.model.unanswered import Unanswered
+
+logger = logging.getLogger(__name__)
+
+EXPORT_DIR = os.path.join(settings.BASE_DIR, "exports")
+FORMATS = [f.strip() for f in getattr(settings, "UNANSWERED_EXPORT_FORMATS", "csv").split(",") if f.strip()]
+CHUNK_SIZE = getattr(settings, "UNANSWERED_EXPORT_CHUNK_SIZE", 2000)
+RETENTION_DAYS = getattr(settings, "UNANSWERED_RETENTION_DAYS", 7)
+DELETE_BATCH_SIZE = getattr(settings, "UNANSWERED_DELETE_BATCH_SIZE", 1000)
+
+COLUMNS = ("id", "question", "answer", "created_at")
+
+
+# ---- Sinks: each appends chunks of ``COLUMNS`` tuples to one file ----
+class Sink(abc.ABC):
+    suffix = ""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.part = path + ".part"
+
+    @abc.abstractmethod
+    def write(self, rows: list[tuple]):
+        """Append one chunk of rows to the ``.part`` file."""
+
+    @abc.abstractmethod
+    def _close(self):
+        """Flush and close the ``.part`` file."""
+
+    def close(self):
+        self._close()
+        os.replace(self.part, self.path)
+
+    def abort(self):
+        self._close()
+        os.remove(self.part)
+
+
+class CSVSink(Sink):
+    suffix = ".csv"
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.file = open(self.part, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(["Question", "Answer"])
+
+    def write(self, rows):
+        self.writer.writerows((question, answer) for _id, question, answer, _created in rows)
+
+    def _close(self):
+        self.file.close()
+
+
+class JSONLSink(Sink):
+    suffix = ".jsonl.gz"
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.file = gzip.open(self.part, "wt", encoding="utf-8")
+
+    def write(self, rows):
+        for id_, question, answer, created in rows:
+            self.file.write(json.dumps(
+                {"id": id_, "question": question, "answer": answer, "created_at": created.isoformat()},
+                ensure_ascii=False,
+            ) + "\n")
+
+    def _close(self):
+        self.file.close()
+
+
+class ParquetSink(Sink):
+    suffix = ".parquet"
+
+    def __init__(self, path):
+        if not importlib.util.find_spec("pyarrow"):
+            raise ImproperlyConfigured("Parquet export needs 'pyarrow'")
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        super().__init__(path)
+        self.pa = pa
+        self.schema = pa.schema([
+            ("id", pa.int64()), ("question", pa.string()), ("answer", pa.string()),
+            ("created_at", pa.timestamp("us", tz="UTC")),
+        ])
+        self.writer = pq.ParquetWriter(self.part, self.schema, compression="zstd")
+
+    def write(self, rows):
+        columns = list(zip(*rows))
+        self.writer.write_table(self.pa.Table.from_arrays(
+            [self.pa.array(column, type=field.type) for column, field in zip(columns, self.schema)],
+            schema=self.schema,
+        ))
+
+    def _close(self):
+        self.writer.close()
+
+
+SINKS = {"csv": CSVSink, "jsonl": JSONLSink, "parquet": ParquetSink}
+
+
+def _log_progress(stage: str, done: int):
+    logger.info("unanswered %s: %d rows", stage, done)
+
+
+def export_answered(directory: str = EXPORT_DIR, formats: list[str] | None = None,
+                    chunk_size: int = CHUNK_SIZE, progress=_log_progress) -> tuple[list[str], int]:
+    """Stream answered questions into one file per format; returns the paths and row count.
+
+    ``progress(stage, rows_so_far)`` is called after every chunk.
+    """
+    formats = ["csv"] + [f for f in (formats or FORMATS) if f != "csv"]
+    unknown = set(formats) - set(SINKS)
+    if unknown:
+        raise ValueError(f"Unknown export format(s): {', '.join(sorted(unknown))}")
+
+    os.makedirs(directory, exist_ok=True)
+    stamp = timezone.localdate().isoformat()
+    sinks = []
+    try:
+        for fmt in formats:
+            sinks.append(SINKS[fmt](os.path.join(directory, f"unanswered_export_{stamp}{SINKS[fmt].suffix}")))
+
+        # Follows the partial answered-questions index; a server-side cursor where the database has one
+        rows = (
+            Unanswered.objects.answered().order_by("created_at", "id")
+            .values_list(*COLUMNS).iterator(chunk_size=chunk_size)
+        )
+        total = 0
+        while chunk := list(islice(rows, chunk_size)):
+            for sink in sinks:
+                sink.write(chunk)
+            total += len(chunk)
+            progress("exported", total)
+    except BaseException:
+        for sink in sinks:
+            sink.abort()
+        raise
+    for sink in sinks:
+        sink.close()
+    return [sink.path for sink in sinks], total
+
+
+def purge_unanswered(days: int = RETENTION_DAYS, batch_size: int = DELETE_BATCH_SIZE,
+                     progress=_log_progress) -> int:
+    """Delete questions older than ``days`` in batches of ``batch_size``; returns the number deleted.
+
+    Each batch is its own short DELETE, so locks are held briefly and the
+    transaction log stays small.
+    """
+    cutoff = timezone.now() - timedelta(days=days)
+    old = Unanswered.objects.filter(created_at__lt=cutoff).order_by().values_list("id", flat=True)
+    deleted = 0
+    while ids := list(old[:batch_size]):
+        deleted += Unanswered.objects.filter(id__in=ids).delete()[0]
+        progress("deleted", deleted)
+    return deleted
@@ -0,0 +1,70 @@
+# api/utils/session_window.py
+"""Per-session conversation window kept in the Django cache.
+
+Holds the last ``RECENT_MESSAGES`` messages of a session (plus a few derived
+context fields) so an active conversation does not re-query its history on
+every turn. The window is rewritten after each persisted turn and rebuilt from
+the database on a miss.
+
+Windows are only kept when ``CHAT_WINDOW_CACHE`` is on, which needs a cache
+shared by every worker (Redis): with the per-process default each worker
+would serve its own, stale copy, so every lookup is a miss instead. A turn
+that finishes after another turn of the same session updated the window
+drops it rather than overwriting it with a history missing that turn.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .chat import RECENT_MESSAGES
+
+ENABLED = getattr(settings, "CHAT_WINDOW_CACHE", False)
+WINDOW_TTL = getattr(settings, "CHAT_WINDOW_TTL", 30 * 60)
+
+
+def _key(session_id) -> str:
+    return f"chat:window:{session_id}"
+
+
+def get_window(session_id, user_id) -> dict | None:
+    """Cached window for ``session_id`` if it belongs to ``user_id``."""
+    if not ENABLED:
+        return None
+    window = cache.get(_key(session_id))
+    if window is None or window["user_id"] != user_id:
+        return None
+    return window
+
+
+def window_tail(window: dict | None):
+    """Timestamp of the newest message in ``window`` (None for no window)."""
+    return window["messages"][-1]["timestamp"] if window and window["messages"] else None
+
+
+def set_window(session, messages: list[dict], expected_tail=None) -> dict | None:
+    """Store the window after a turn that started from a window ending at ``expected_tail``.
+
+    When the cached window has moved on since (a concurrent turn in the same
+    session), it is dropped instead and the next turn rebuilds it.
+    """
+    if not ENABLED:
+        return None
+    current = cache.get(_key(session.pk))
+    if current is not None and window_tail(current) != expected_tail:
+        invalidate_window(session.pk)
+        return None
+    messages = messages[-RECENT_MESSAGES:]
+    window = {
+        "user_id": session.user_id,
+        "title": session.title,
+        "messages": messages,
+        # Derived context features reused by follow-up handling
+        "last_user_message": next(
+            (m["message"] for m in reversed(messages) if m["sender"] == "user"), None
+        ),
+    }
+    cache.set(_key(session.pk), window, WINDOW_TTL)
+    return window
+
+
+def invalidate_window(session_id):
+    cache.delete(_key(session_id))
@@ -0,0 +1,270 @@
+# api/utils/stt.py
+"""Pluggable speech-to-text engines behind bounded worker pools.
+
+Engines take 16 kHz mono int16 PCM (see ``api.utils.audio``) and return text.
+Each engine name gets its own pool of worker threads; every worker builds its
+engine once (so a local model is loaded once per worker, not per request) and
+keeps it for the life of the process. Callers wait at most
+``STT_QUEUE_TIMEOUT`` seconds for one of ``STT_MAX_PENDING`` slots and
+``STT_TIMEOUT`` seconds for the transcript.
+
+``STT_ENGINES`` is an ordered fallback chain, e.g. ``"google,whisper"``; an
+engine that is unavailable (network down, package missing) hands over to the
+next one. ``"stub"`` returns ``STT_STUB_TEXT`` and is meant for tests.
+
+Long recordings are split on silence (``api.utils.vad``) and the speech
+segments are spread across the pool's workers.
+"""
+import abc
+import importlib.util
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass
+
+import numpy as np
+import speech_recognition as sr
+from django.conf import settings
+
+from .audio import to_audio_data, to_float32
+from .vad import speech_segments
+
+logger = logging.getLogger(__name__)
+
+ENGINE_CHAIN = [name.strip() for name in getattr(settings, "STT_ENGINES", "google,whisper").split(",") if name.strip()]
+WORKERS = getattr(settings, "STT_WORKERS", 2)
+MAX_PENDING = getattr(settings, "STT_MAX_PENDING", 8)
+QUEUE_TIMEOUT = getattr(settings, "STT_QUEUE_TIMEOUT", 10)
+TIMEOUT = getattr(settings, "STT_TIMEOUT", 60)
+VAD_ENABLED = getattr(settings, "AUDIO_VAD", True)
+
+
+class STTError(Exception):
+    """Base class for transcription failures."""
+
+
+class NoSpeech(STTError):
+    """The engine could not make out any speech."""
+
+
+class STTUnavailable(STTError):
+    """The engine cannot run here (service down, package or model missing)."""
+
+
+class STTBusy(STTError):
+    """All pending slots stayed taken past the queue timeout."""
+
+
+class STTTimeout(STTError):
+    """The engine did not finish within ``STT_TIMEOUT``."""
+
+
+# ---- Engines ----
+class STTEngine(abc.ABC):
+    name = ""
+
+    @classmethod
+    def engine_version(cls) -> str:
+        """Identifies the engine and model; transcripts from different versions may differ."""
+        return cls.name
+
+    @property
+    def version(self) -> str:
+        return self.engine_version()
+
+    @abc.abstractmethod
+    def transcribe(self, pcm: np.ndarray) -> str:
+        """Text spoken in ``pcm``; raises ``NoSpeech`` or ``STTUnavailable``."""
+
+
+class GoogleEngine(STTEngine):
+    name = "google"
+
+    def __init__(self):
+        self.recognizer = sr.Recognizer()
+
+    def transcribe(self, pcm):
+        try:
+            return self.recognizer.recognize_google(to_audio_data(pcm))
+        except sr.UnknownValueError:
+            raise NoSpeech()
+        except sr.RequestError as e:
+            raise STTUnavailable(f"Google STT request failed: {e}")
+
+
+class WhisperEngine(STTEngine):
+    """Local, offline whisper: faster-whisper (CPU, int8) when installed, else openai-whisper."""
+    name = "whisper"
+
+    @staticmethod
+    def installed_backend() -> str | None:
+        if importlib.util.find_spec("faster_whisper"):
+            return "faster-whisper"
+        if importlib.util.find_spec("whisper"):
+            return "openai-whisper"
+        return None
+
+    @classmethod
+    def engine_version(cls):
+        return f"{cls.name}:{cls.installed_backend()}:{getattr(settings, 'STT_WHISPER_MODEL', 'base')}"
+
+    def __init__(self):
+        self.model_size = getattr(settings, "STT_WHISPER_MODEL", "base")
+        self.backend = self.installed_backend()
+        if self.backend == "faster-whisper":
+            from faster_whisper import WhisperModel
+            self.model = WhisperModel(self.model_size, device="cpu", compute_type="int8", cpu_threads=1)
+        elif self.backend == "openai-whisper":
+            import whisper
+            self.model = whisper.load_model(self.model_size, device="cpu")
+        else:
+            raise STTUnavailable("Neither 'faster-whisper' nor 'openai-whisper' is installed")
+
+    def transcribe(self, pcm):
+        audio = to_float32(pcm)
+        if self.backend == "faster-whisper":
+            segments, _info = self.model.transcribe(audio, beam_size=1)
+            text = " ".join(segment.text.strip() for segment in segments)
+        else:
+            text = self.model.transcribe(audio, fp16=False)["text"]
+        text = text.strip()
+        if not text:
+            raise NoSpeech()
+        return text
+
+
+class StubEngine(STTEngine):
+    """Deterministic engine for tests: returns ``STT_STUB_TEXT`` for any non-silent audio."""
+    name = "stub"
+
+    def __init__(self, text: str | None = None):
+        self.text = text if text is not None else getattr(settings, "STT_STUB_TEXT", "what is malaria")
+
+    def transcribe(self, pcm):
+        if not len(pcm) or not np.any(pcm):
+            raise NoSpeech()
+        return self.text
+
+
+ENGINES = {engine.name: engine for engine in (GoogleEngine, WhisperEngine, StubEngine)}
+
+
+# ---- Pools ----
+class EnginePool:
+    """A fixed set of worker threads, each holding its own engine instance."""
+
+    def __init__(self, engine_cls, workers: int = WORKERS, max_pending: int = MAX_PENDING):
+        self.engine_cls = engine_cls
+        self._local = threading.local()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix=f"stt-{engine_cls.name}",
+        )
+
+    def _engine(self) -> STTEngine:
+        # Built on first use in each worker thread, then reused
+        if not hasattr(self._local, "engine"):
+            logger.info("loading STT engine %s", self.engine_cls.name)
+            self._local.engine = self.engine_cls()
+        return self._local.engine
+
+    def _run(self, pcm):
+        engine = self._engine()
+        return engine.transcribe(pcm), engine.version
+
+    def submit(self, pcm, queue_timeout: float = QUEUE_TIMEOUT):
+        """Queue ``pcm`` for transcription and return the future."""
+        if not self._slots.acquire(timeout=queue_timeout):
+            raise STTBusy()
+        future = self._executor.submit(self._run, pcm)
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def transcribe(self, pcm, timeout: float = TIMEOUT, queue_timeout: float = QUEUE_TIMEOUT) -> tuple[str, str]:
+        future = self.submit(pcm, queue_timeout=queue_timeout)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            # The worker finishes in the background and then frees its slot
+            raise STTTimeout()
+
+    def transcribe_segments(self, segments: list[np.ndarray], timeout: float = TIMEOUT,
+                            queue_timeout: float = QUEUE_TIMEOUT) -> tuple[str, str]:
+        """Transcribe segments in parallel across the workers and join the texts in order.
+
+        Segments with no recognizable speech are skipped; ``timeout`` covers the whole set.
+        """
+        deadline = time.monotonic() + timeout
+        futures, texts, version = [], [], self.engine_cls.name
+        try:
+            for segment in segments:
+                futures.append(self.submit(segment, queue_timeout=queue_timeout))
+            for future in futures:
+                try:
+                    text, version = future.result(timeout=max(deadline - time.monotonic(), 0))
+                except NoSpeech:
+                    continue
+                texts.append(text)
+        except FutureTimeout:
+            raise STTTimeout()
+        finally:
+            for future in futures:
+                future.cancel()
+        if not texts:
+            raise NoSpeech()
+        return " ".join(texts), version
+
+
+_pools: dict[str, EnginePool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(name: str) -> EnginePool:
+    with _pools_lock:
+        if name not in _pools:
+            if name not in ENGINES:
+                raise STTUnavailable(f"Unknown STT engine: {name}")
+            _pools[name] = EnginePool(ENGINES[name])
+        return _pools[name]
+
+
+def engine_versions(engines: list[str] | None = None) -> list[str]:
+    """Versions of the engines in the chain, in preference order."""
+    return [ENGINES[name].engine_version() for name in (engines or ENGINE_CHAIN) if name in ENGINES]
+
+
+@dataclass
+class Transcript:
+    text: str
+    engine: str  # version of the engine that produced the text
+
+
+def transcribe(pcm: np.ndarray, engines: list[str] | None = None, segment: bool | None = None) -> Transcript:
+    """Transcribe with the first available engine in the chain.
+
+    With ``segment`` (default ``AUDIO_VAD``), silence is dropped and speech
+    segments are transcribed in parallel, then stitched in order.
+    """
+    chain = engines or ENGINE_CHAIN
+    segment = VAD_ENABLED if segment is None else segment
+    if segment:
+        segments = [pcm[start:end] for start, end in speech_segments(pcm)]
+        if not segments:
+            raise NoSpeech()
+
+    unavailable = None
+    for name in chain:
+        try:
+            pool = get_pool(name)
+            if not segment:
+                text, version = pool.transcribe(pcm)
+            elif len(segments) == 1:
+                text, version = pool.transcribe(segments[0])
+            else:
+                text, version = pool.transcribe_segments(segments)
+            return Transcript(text=text, engine=version)
+        except STTUnavailable as e:
+            logger.warning("STT engine %s unavailable: %s", name, e)
+            unavailable = e
+    raise unavailable or STTUnavailable("No STT engine configured")
@@ -0,0 +1,55 @@
+# api/utils/taskruns.py
+"""Idempotency keys for Celery tasks.
+
+Celery delivers at least once: with ``acks_late`` a task is redelivered if its
+worker dies, and a scheduler that loses its lease mid-dispatch may send a
+periodic job twice. The scheduler fixes each run's key when it dispatches it
+(see ``api.tasks.run_key``), so a redelivery is recognised however late it
+arrives. ``task_run`` claims a ``TaskRun`` row for the key; a
+key that is done, or running and not yet stale, is not run again. Failed runs
+(and runs whose worker vanished for longer than ``stale_after``) can be
+claimed again, so retries work.
+"""
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from api.model.taskrun import TaskRun
+
+
+def claim(key: str, task: str, stale_after: float) -> bool:
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            TaskRun.objects.create(key=key, task=task)
+        return True
+    except IntegrityError:
+        pass
+    reclaimable = Q(status=TaskRun.FAILED) | Q(
+        status=TaskRun.RUNNING, updated_at__lt=now - timedelta(seconds=stale_after),
+    )
+    return bool(TaskRun.objects.filter(Q(key=key) & reclaimable).update(
+        status=TaskRun.RUNNING, attempts=F('attempts') + 1, result='', updated_at=now,
+    ))
+
+
+def finish(key: str, status: str, result: str = ''):
+    TaskRun.objects.filter(key=key).update(status=status, result=result[:2000], updated_at=timezone.now())
+
+
+@contextmanager
+def task_run(key: str, task: str, stale_after: float = 3600):
+    """Yields whether this call owns the run; records the outcome when the block exits."""
+    if not claim(key, task, stale_after):
+        yield False
+        return
+    try:
+        yield True
+    except BaseException as e:
+        # Includes Celery's Retry, so the retried delivery can claim the key again
+        finish(key, TaskRun.FAILED, repr(e))
+        raise
+    finish(key, TaskRun.DONE)
@@ -0,0 +1,76 @@
+# api/utils/tip_payload.py
+"""Precomputed ``DailyTipView`` payloads.
+
+The day's tips are serialized once into JSON bytes plus an ETag and kept in
+the cache under ``tips:daily:<date>``, so serving the landing page costs no
+queries and no serialization. Whatever changes the day's tips drops the key:
+``assign_daily_tips`` and ``upsert_tips`` (see ``api.utils.tip_pool``) and
+saves or deletes of ``HealthTip``/``DailyTip`` rows (admin edits). The next
+request rebuilds the payload, assigning the day's tips from the prefetched
+pool if the scheduler has not done so yet.
+
+Invalidation reaches other processes (e.g. the Celery worker's changes
+reaching the web servers) only through a shared cache; with the per-process
+default, ``DAILY_TIP_CACHE_TTL`` bounds how long a stale payload is served.
+"""
+import datetime
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.renderers import JSONRenderer
+
+from api.model.dailytip import DailyTip
+from api.model.healthtip import HealthTip
+from api.serializer import DailyTipSerializer
+from .tip_pool import assign_daily_tips
+
+CACHE_TTL = getattr(settings, "DAILY_TIP_CACHE_TTL", 24 * 60 * 60)
+
+
+def _key(day: datetime.date) -> str:
+    return f"tips:daily:{day.isoformat()}"
+
+
+def invalidate_daily_payload(day: datetime.date | None = None):
+    """Drop the cached payload for ``day`` (default today) once the current transaction commits."""
+    key = _key(day or datetime.date.today())
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+@receiver([post_save, post_delete], sender=HealthTip)
+@receiver([post_save, post_delete], sender=DailyTip)
+def _tip_changed(sender, instance, **kwargs):
+    # A DailyTip names its day; an edited HealthTip matters for today's payload, the one served
+    invalidate_daily_payload(getattr(instance, "date", None))
+
+
+def build_daily_payload(day: datetime.date) -> dict:
+    if not DailyTip.objects.filter(date=day).exists():
+        # Nothing scheduled yet: draw from the prefetched pool (database only)
+        assign_daily_tips(day)
+    daily_tips = list(DailyTip.objects.filter(date=day).select_related("tip").order_by("slot")[:3])
+    if not daily_tips:
+        # fallback to most recent 3
+        daily_tips = list(DailyTip.objects.select_related("tip").order_by("-date", "slot")[:3])
+    body = JSONRenderer().render(DailyTipSerializer(daily_tips, many=True).data)
+    return {"body": body, "etag": f'"{hashlib.sha1(body).hexdigest()}"'}
+
+
+def get_daily_payload(day: datetime.date | None = None) -> dict:
+    day = day or datetime.date.today()
+    payload = cache.get(_key(day))
+    if payload is None:
+        payload = refresh_daily_payload(day)
+    return payload
+
+
+def refresh_daily_payload(day: datetime.date | None = None) -> dict:
+    """Rebuild and cache the payload for ``day``; warms the cache after tips for that day change."""
+    day = day or datetime.date.today()
+    payload = build_daily_payload(day)
+    cache.set(_key(day), payload, CACHE_TTL)
+    return payload
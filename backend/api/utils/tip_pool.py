@@ -0,0 +1,101 @@
+# api/utils/tip_pool.py
+"""Rolling pool of prefetched health tips.
+
+``prefetch_tips`` runs from the scheduler: it tops the pool up with one batched
+fetch (see ``api.utils.tips``), upserts ``HealthTip`` on ``(source,
+external_id)`` so a topic is stored once however often it is fetched, and
+assigns tips to the coming ``TIP_PREFETCH_DAYS`` days. ``assign_daily_tips``
+only touches the database, so it is also safe to call at request time.
+"""
+import logging
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+
+from api.model.dailytip import DailyTip
+from api.model.healthtip import HealthTip
+from .tips import fetch_tips
+
+logger = logging.getLogger(__name__)
+
+TIPS_PER_DAY = 3
+PREFETCH_DAYS = getattr(settings, "TIP_PREFETCH_DAYS", 7)
+REPEAT_AFTER_DAYS = getattr(settings, "TIP_REPEAT_AFTER_DAYS", 60)
+
+
+def _invalidate_payload(day: date | None = None):
+    # Imported here: tip_payload builds on this module
+    from .tip_payload import invalidate_daily_payload
+    invalidate_daily_payload(day)
+
+
+def _available(day: date):
+    """Tips that may be shown on ``day``: never shown, or not within the repeat window."""
+    cutoff = day - timedelta(days=REPEAT_AFTER_DAYS)
+    return HealthTip.objects.filter(Q(last_used__isnull=True) | Q(last_used__lt=cutoff))
+
+
+def assign_daily_tips(day: date, per_day: int = TIPS_PER_DAY) -> list[HealthTip]:
+    """Make sure ``day`` has ``per_day`` tips, drawing from the pool (no network).
+
+    Tips fill numbered slots; the unique ``(date, slot)`` constraint makes a
+    concurrent assignment for the same day lose quietly instead of adding a
+    second set of tips.
+    """
+    def assigned():
+        return list(DailyTip.objects.filter(date=day).select_related("tip").order_by("slot")[:per_day])
+
+    with transaction.atomic():
+        daily = assigned()
+        taken = {d.slot for d in daily}
+        free = [slot for slot in range(per_day) if slot not in taken][:per_day - len(daily)]
+        if not free:
+            return [d.tip for d in daily]
+        chosen = list(
+            _available(day).select_for_update(skip_locked=True)
+            .order_by(F("last_used").asc(nulls_first=True), "fetched_at", "id")[:len(free)]
+        )
+        if chosen:
+            DailyTip.objects.bulk_create(
+                [DailyTip(tip=tip, date=day, slot=slot) for tip, slot in zip(chosen, free)],
+                ignore_conflicts=True,
+            )
+            daily = assigned()
+            _invalidate_payload(day)
+            # Only the tips that won their slot count as used
+            placed = {d.tip_id for d in daily} & {t.pk for t in chosen}
+            HealthTip.objects.filter(pk__in=placed).update(last_used=day)
+    return [d.tip for d in daily]
+
+
+def upsert_tips(fetched) -> int:
+    """Insert new tips and refresh the text of known ones in a single statement."""
+    if not fetched:
+        return 0
+    HealthTip.objects.bulk_create(
+        [HealthTip(source=t.source, external_id=t.external_id, title=t.title, body=t.body) for t in fetched],
+        update_conflicts=True,
+        unique_fields=["source", "external_id"],
+        update_fields=["title", "body", "updated_at"],
+    )
+    # Refreshed text may belong to a tip shown today
+    _invalidate_payload()
+    return len(fetched)
+
+
+def prefetch_tips(days: int = PREFETCH_DAYS, start: date | None = None) -> dict:
+    """Top up the pool for the next ``days`` days and assign their tips."""
+    start = start or date.today()
+    window = [start + timedelta(days=i) for i in range(days)]
+
+    assigned = DailyTip.objects.filter(date__in=window).count()
+    needed = days * TIPS_PER_DAY - assigned - _available(start).count()
+    fetched = upsert_tips(fetch_tips(count=needed)) if needed > 0 else 0
+
+    for day in window:
+        if len(assign_daily_tips(day)) < TIPS_PER_DAY:
+            logger.warning("tip pool ran dry at %s", day)
+            break
+    return {"needed": max(needed, 0), "fetched": fetched, "days": days}
@@ -0,0 +1,187 @@
+# api/utils/tips.py
+"""Concurrent health-tip fetching.
+
+All sources are queried at once over one shared ``httpx.AsyncClient`` (pooled
+connections, per-request timeouts) under an overall deadline. Each source sits
+behind a circuit breaker: after ``TIP_BREAKER_FAILURES`` consecutive failures
+it is skipped for ``TIP_BREAKER_RESET`` seconds, then given one trial request.
+Results are merged in source priority order. Source URLs come from settings so
+the fetcher can be pointed at a local stub server.
+"""
+import asyncio
+import hashlib
+import logging
+import random
+import time
+from dataclasses import dataclass
+
+import httpx
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SOURCE_URLS = {
+    "myhealthfinder": "https://odphp.health.gov/myhealthfinder/api/v4",
+    "cdc": "https://tools.cdc.gov/api/v2",
+    "adviceslip": "https://api.adviceslip.com",
+    **getattr(settings, "TIP_SOURCE_URLS", {}),
+}
+REQUEST_TIMEOUT = getattr(settings, "TIP_REQUEST_TIMEOUT", 5)
+DEADLINE = getattr(settings, "TIP_FETCH_DEADLINE", 8)
+BREAKER_FAILURES = getattr(settings, "TIP_BREAKER_FAILURES", 3)
+BREAKER_RESET = getattr(settings, "TIP_BREAKER_RESET", 300)
+
+
+@dataclass
+class TipData:
+    source: str
+    external_id: str
+    title: str
+    body: str
+
+
+def one_liner(text: str) -> str:
+    return text.split(".")[0].strip() + "."
+
+
+def external_id(value, body: str) -> str:
+    """The source's id for a tip, or a digest of its text when the source sent none."""
+    if value is None or value == "":
+        return "sha1:" + hashlib.sha1(body.encode()).hexdigest()
+    return str(value)
+
+
+class CircuitBreaker:
+    """Closed → open after ``failures`` consecutive errors; half-open after ``reset_after`` seconds."""
+
+    def __init__(self, name: str, failures: int = BREAKER_FAILURES, reset_after: float = BREAKER_RESET):
+        self.name = name
+        self.max_failures = failures
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_after:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        return self.state != "open"
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half-open" or self.failures >= self.max_failures:
+            self.opened_at = time.monotonic()
+            logger.warning("tip source %s: circuit open after %d failures", self.name, self.failures)
+
+
+# ---- Sources: each returns up to ``count`` tips ----
+async def myhealthfinder(client: httpx.AsyncClient, count: int) -> list[TipData]:
+    base = SOURCE_URLS["myhealthfinder"]
+    response = await client.get(f"{base}/itemlist.json", params={"Type": "topic"})
+    response.raise_for_status()
+    topics = response.json().get("Result", {}).get("Items", [])
+    ids = [i for i in (t.get("TopicId") or t.get("Id") for t in topics) if i]
+    ids = random.sample(ids, min(count, len(ids)))
+
+    async def detail(topic_id):
+        r = await client.get(f"{base}/topicsearch.json", params={"TopicId": topic_id})
+        r.raise_for_status()
+        return topic_id, r.json().get("Result", {})
+
+    tips = []
+    for result in await asyncio.gather(*(detail(i) for i in ids), return_exceptions=True):
+        if isinstance(result, Exception):
+            continue
+        topic_id, detail_json = result
+        summary = detail_json.get("Summary", "")
+        if summary:
+            tips.append(TipData("myhealthfinder", str(topic_id), detail_json.get("Title", ""), one_liner(summary)))
+    if ids and not tips:
+        raise ValueError("no topic details could be fetched")
+    return tips
+
+
+async def cdc(client: httpx.AsyncClient, count: int) -> list[TipData]:
+    response = await client.get(
+        f"{SOURCE_URLS['cdc']}/resources/media", params={"topicid": 21, "max": count}
+    )
+    response.raise_for_status()
+    data = response.json()
+    tips = []
+    for item in (data.get("results") or data.get("Results") or [])[:count]:
+        title = item.get("title") or "CDC Health Tip"
+        body = one_liner(item.get("description") or title)
+        tips.append(TipData("cdc", external_id(item.get("id"), body), title, body))
+    return tips
+
+
+async def adviceslip(client: httpx.AsyncClient, count: int) -> list[TipData]:
+    # The API serves one slip per request (cached for 2 s), so ``count`` is ignored
+    response = await client.get(f"{SOURCE_URLS['adviceslip']}/advice")
+    response.raise_for_status()
+    slip = response.json().get("slip", {})
+    advice = slip.get("advice")
+    return [TipData("adviceslip", external_id(slip.get("slip_id"), advice), "", advice)] if advice else []
+
+
+SOURCES = {"myhealthfinder": myhealthfinder, "cdc": cdc, "adviceslip": adviceslip}  # priority order
+breakers = {name: CircuitBreaker(name) for name in SOURCES}
+
+
+async def _guarded(name, client, count) -> list[TipData]:
+    breaker = breakers[name]
+    try:
+        tips = await SOURCES[name](client, count)
+    except (httpx.HTTPError, ValueError) as e:
+        breaker.record_failure()
+        logger.warning("tip source %s failed: %s", name, e)
+        return []
+    breaker.record_success()
+    return tips
+
+
+async def fetch_tips_async(count: int = 3, deadline: float = DEADLINE,
+                           transport: httpx.AsyncBaseTransport | None = None) -> list[TipData]:
+    """Up to ``count`` distinct tips from all sources with an open circuit, within ``deadline`` seconds."""
+    names = [name for name in SOURCES if breakers[name].allow()]
+    if not names:
+        logger.warning("all tip sources are open-circuited")
+        return []
+
+    async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT, transport=transport,
+                                 limits=httpx.Limits(max_connections=10)) as client:
+        tasks = {name: asyncio.create_task(_guarded(name, client, count)) for name in names}
+        done, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+        for task in pending:
+            task.cancel()
+        for name, task in tasks.items():
+            if task in pending:
+                # Missing the deadline counts against the source
+                breakers[name].record_failure()
+                logger.warning("tip source %s missed the %ss deadline", name, deadline)
+
+    tips, seen = [], set()
+    for name in names:  # priority order
+        task = tasks[name]
+        if task not in done:
+            continue
+        for tip in task.result():
+            key = (tip.source, tip.external_id)
+            if key not in seen and len(tips) < count:
+                seen.add(key)
+                tips.append(tip)
+    return tips
+
+
+def fetch_tips(count: int = 3, deadline: float = DEADLINE) -> list[TipData]:
+    """Synchronous entry point for the scheduler, management commands and tasks."""
+    return asyncio.run(fetch_tips_async(count, deadline))
@@ -1,104 +1,96 @@
 import joblib
+import logging
 import os
-import random
-import requests
+import re
 from datetime import date
-from api.model.healthtip import HealthTip
 from api.model.dailytip import DailyTip
+from .tip_pool import TIPS_PER_DAY, assign_daily_tips, prefetch_tips
+from .tip_payload import refresh_daily_payload
+
+logger = logging.getLogger(__name__)
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 base_dir = os.path.dirname(current_dir)
 
+# Loaded once per process and shared with api.qa_lookup
 svm = joblib.load(os.path.join(base_dir, "svm_model.pkl"))
 vectorizer = joblib.load(os.path.join(base_dir, "tfidf_vectorizer.pkl"))
 
-def classify_question(question: str) -> str:
-    vec = vectorizer.transform([question])
-    prediction = svm.predict(vec)[0]
+TOKEN_RE = re.compile(r"\b[a-zA-Z]{4,}\b")
+
+
+class QueryFeatures:
+    """Per-request text features, tokenized and TF-IDF vectorized at most once.
+
+    The same object is handed to the classifier and to every TF-IDF retrieval
+    tier so a chat turn never transforms the same text twice. As before, the
+    classifier sees the conversation context and retrieval sees the context
+    followed by the user's query.
+    """
+
+    def __init__(self, query: str, context: str | None = None):
+        self.query = query
+        self.context = context
+        self.text = self._compose(query, context)
+        self._vector = None
+        self._label_vector = None
+        self._tokens = None
+
+    @staticmethod
+    def _compose(query: str, context: str | None) -> str:
+        return (context + "\nUser: " + query) if context else query
+
+    @property
+    def vector(self):
+        """Retrieval vector of the context followed by the query."""
+        if self._vector is None:
+            self._vector = vectorizer.transform([self.text])
+        return self._vector
+
+    @property
+    def label_vector(self):
+        """Classifier vector of the context (or of the query when there is none)."""
+        if self._label_vector is None:
+            if self.context:
+                self._label_vector = vectorizer.transform([self.context])
+            else:
+                self._label_vector = self.vector
+        return self._label_vector
+
+    @property
+    def tokens(self) -> set[str]:
+        """Keyword tokens of the raw query, used for re-ranking overlap."""
+        if self._tokens is None:
+            self._tokens = set(TOKEN_RE.findall(self.query.lower()))
+        return self._tokens
+
+
+def classify_question(question: "str | QueryFeatures") -> str:
+    features = question if isinstance(question, QueryFeatures) else QueryFeatures(question)
+    prediction = svm.predict(features.label_vector)[0]
     return prediction
 
 def fetch_daily_health_tip(force_refresh=True):
+    """Top up the tip pool for the coming week and return today's tips.
+
+    Without ``force_refresh`` no source is contacted when today already has its tips.
+    """
     today = date.today()
 
-    if force_refresh:
-        # Delete today's tips first
-        DailyTip.objects.filter(date=today).delete()
-        HealthTip.objects.filter(dailytip__date=today).delete()
-
-    # If not forcing and already have 3 tips, skip
-    if not force_refresh and DailyTip.objects.filter(date=today).count() >= 3:
-        print("Daily tips already saved for today.")
-        return
-
-    tips_collected = []
-
-    def save_tip(source, external_id, title, body):
-        tip = HealthTip.objects.create(
-            source=source,
-            external_id=external_id,
-            title=title,
-            body=body
-        )
-        DailyTip.objects.create(tip=tip, date=today)
-        tips_collected.append(tip)
-        return tip
-
-    while len(tips_collected) < 3:
-        # 1️⃣ MyHealthfinder
-        try:
-            topics = requests.get(
-                "https://odphp.health.gov/myhealthfinder/api/v4/itemlist.json?Type=topic",
-                timeout=10
-            ).json().get("Result", {}).get("Items", [])
-
-            if topics:
-                chosen = random.choice(topics)
-                topic_id = chosen.get("TopicId") or chosen.get("Id")
-
-                if topic_id:
-                    detail = requests.get(
-                        f"https://odphp.health.gov/myhealthfinder/api/v4/topicsearch.json?TopicId={topic_id}",
-                        timeout=10
-                    ).json().get("Result", {})
-
-                    summary = detail.get("Summary", "")
-                    if summary:
-                        one_liner = summary.split(".")[0].strip() + "."
-                        save_tip("myhealthfinder", str(topic_id), detail.get("Title", ""), one_liner)
-                        continue
-        except Exception as e:
-            print(f"MyHealthfinder failed: {e}")
-
-        # 2️⃣ CDC
-        try:
-            cdc = requests.get(
-                "https://tools.cdc.gov/api/v2/resources/media?topicid=21&max=1",
-                timeout=10
-            ).json()
-
-            results = cdc.get("results") or cdc.get("Results") or []
-            if results:
-                first = results[0]
-                title = first.get("title") or "CDC Health Tip"
-                description = first.get("description") or title
-                one_liner = description.split(".")[0].strip() + "."
-                save_tip("cdc", str(first.get("id")), title, one_liner)
-                continue
-        except Exception as e:
-            print(f"CDC API failed: {e}")
-
-        # 3️⃣ AdviceSlip fallback
-        try:
-            slip = requests.get("https://api.adviceslip.com/advice", timeout=5).json().get("slip", {})
-            advice = slip.get("advice")
-            if advice:
-                save_tip("adviceslip", str(slip.get("slip_id")), "", advice)
-                continue
-        except Exception as e:
-            print(f"AdviceSlip failed: {e}")
-
-        if not tips_collected:
-            break
-
-    print(f"✅ Collected {len(tips_collected)} tips for {today}")
-    return [tip.body for tip in tips_collected]
\ No newline at end of file
+    if not force_refresh and DailyTip.objects.filter(date=today).count() >= TIPS_PER_DAY:
+        logger.info("daily tips already saved for %s", today)
+    else:
+        # One batched fetch for the whole window, upserted on (source, external_id)
+        stats = prefetch_tips(start=today)
+        logger.info("tip pool: fetched %d tips for the next %d days", stats["fetched"], stats["days"])
+
+    tips_collected = assign_daily_tips(today)
+    if not tips_collected:
+        logger.warning("no tips available for %s", today)
+        return []
+
+    # Precompute what DailyTipView serves for today
+    refresh_daily_payload(today)
+
+    logger.info("%d tips for %s", len(tips_collected), today)
+    return [tip.body for tip in tips_collected]
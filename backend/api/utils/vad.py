@@ -0,0 +1,73 @@
+# api/utils/vad.py
+"""Energy-based voice activity detection for 16 kHz mono int16 PCM.
+
+Frames are 30 ms. A frame counts as speech when its RMS level is at least
+``margin_db`` above the recording's noise floor (a low percentile of frame
+levels, capped relative to the loud frames) and above an absolute floor, so
+both quiet and noisy recordings work without tuning. Speech runs are padded, pauses shorter than ``min_silence_ms``
+are bridged, blips shorter than ``min_speech_ms`` are dropped, and segments
+longer than ``max_segment_s`` are cut at their quietest frame.
+"""
+import numpy as np
+from django.conf import settings
+
+from .audio import SAMPLE_RATE
+
+FRAME_MS = 30
+FRAME = SAMPLE_RATE * FRAME_MS // 1000
+MAX_SEGMENT_SECONDS = getattr(settings, "AUDIO_MAX_SEGMENT_SECONDS", 15)
+
+
+def frame_levels(pcm: np.ndarray) -> np.ndarray:
+    """RMS level of each full frame, in dBFS."""
+    n = len(pcm) // FRAME
+    if not n:
+        return np.empty(0)
+    frames = pcm[:n * FRAME].astype(np.float32).reshape(n, FRAME) / 32768.0
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+
+def speech_segments(pcm: np.ndarray, margin_db: float = 10.0, floor_db: float = -50.0,
+                    pad_ms: int = 150, min_silence_ms: int = 300, min_speech_ms: int = 200,
+                    max_segment_s: float | None = None) -> list[tuple[int, int]]:
+    """``(start, end)`` sample ranges containing speech, in order."""
+    max_segment_s = MAX_SEGMENT_SECONDS if max_segment_s is None else max_segment_s
+    levels = frame_levels(pcm)
+    if not len(levels):
+        return []
+    noise, peak = np.percentile(levels, [10, 95])
+    # Capped below the peak so recordings with few pauses still register as speech
+    threshold = max(min(noise + margin_db, peak - margin_db), floor_db)
+    speech = levels >= threshold
+
+    # Runs of speech frames as [start, end) frame indices
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], speech.astype(np.int8), [0]))))
+    runs = [[int(s), int(e)] for s, e in zip(edges[::2], edges[1::2])]
+
+    pad, min_gap, min_len = (ms // FRAME_MS for ms in (pad_ms, min_silence_ms, min_speech_ms))
+    merged: list[list[int]] = []
+    for start, end in runs:
+        if merged and start - merged[-1][1] <= min_gap:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    merged = [
+        [max(start - pad, 0), min(end + pad, len(levels))]
+        for start, end in merged if end - start >= min_len
+    ]
+
+    max_frames = int(max_segment_s * 1000 // FRAME_MS)
+    segments = []
+    for start, end in merged:
+        while end - start > max_frames:
+            # Cut in the quietest frame of the back half of the window
+            window = levels[start + max_frames // 2:start + max_frames]
+            cut = start + max_frames // 2 + int(np.argmin(window))
+            segments.append((start, cut))
+            start = cut
+        segments.append((start, end))
+
+    last = len(pcm)
+    return [(s * FRAME, last if e == len(levels) else e * FRAME) for s, e in segments]
+
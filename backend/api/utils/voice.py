@@ -0,0 +1,84 @@
+# api/utils/voice.py
+"""Voice turns: transcript → answer, shared by the audio view and the audio job worker.
+
+The user's ``History`` row (holding the uploaded audio) is written first; once
+the transcript is known it becomes the row's message, and the turn is answered
+and persisted like a typed one. Transcripts are cached per audio content hash
+and engine version, so a repeated clip is never transcribed twice.
+"""
+from django.db import transaction
+
+from api.model.answer import AnswerCatalog
+from api.model.history import History
+from api.model.transcript import AudioTranscript
+from api.model.unanswered import Unanswered
+from .chat import RECENT_MESSAGES, answer_turn
+from .chat_turn import record_messages
+from .session_window import invalidate_window
+from .stt import NoSpeech, STTBusy, STTError, STTTimeout, STTUnavailable, engine_versions, transcribe
+
+# (HTTP status, message) reported for each transcription failure
+STT_ERRORS = {
+    NoSpeech: (400, "Could not understand audio"),
+    STTBusy: (503, "Transcription is busy, please retry"),
+    STTTimeout: (504, "Transcription timed out"),
+    STTUnavailable: (503, "STT service unavailable"),
+}
+
+
+def stt_error(error: STTError) -> tuple[int, str]:
+    status, message = STT_ERRORS.get(type(error), (500, "Transcription failed"))
+    return status, f"{message}: {error}" if str(error) else message
+
+
+def cached_transcript(digest: str) -> str | None:
+    """Transcript of the clip with this hash from any engine in the current chain."""
+    versions = engine_versions()
+    cached = dict(
+        AudioTranscript.objects.filter(sha256=digest, engine__in=versions).values_list("engine", "text")
+    )
+    return next((cached[v] for v in versions if v in cached), None)
+
+
+def transcribe_cached(digest: str, pcm) -> str:
+    """Transcribe ``pcm`` and remember the result under its content hash; raises ``STTError``."""
+    result = transcribe(pcm)
+    AudioTranscript.objects.bulk_create(
+        [AudioTranscript(sha256=digest, engine=result.engine, text=result.text)], ignore_conflicts=True
+    )
+    return result.text
+
+
+def answer_voice_message(user_message: History, transcript: str) -> dict:
+    """Store ``transcript`` as ``user_message``'s text and answer it."""
+    session = user_message.session
+
+    recent = list(
+        session.messages.exclude(pk=user_message.pk).select_related("answer")
+        .order_by("-timestamp", "-id")[:RECENT_MESSAGES - 1]
+    )
+    history = [{"sender": m.sender, "message": m.body} for m in reversed(recent)]
+    history.append({"sender": "user", "message": transcript})
+    turn = answer_turn(transcript, history)
+
+    with transaction.atomic():
+        user_message.message = transcript
+        user_message.save(update_fields=["message", "updated_at"])
+        if turn.catalog:
+            bot_message = History.objects.create(
+                session=session, sender="bot", answer=AnswerCatalog.objects.intern(turn.answer)
+            )
+        else:
+            bot_message = History.objects.create(session=session, sender="bot", message=turn.answer)
+        if not turn.answered:
+            Unanswered.objects.create(user_id=session.user_id, question=transcript)
+        # The user message was counted when it was stored
+        record_messages(session.id, 1, last_message_at=bot_message.timestamp)
+        transaction.on_commit(lambda: invalidate_window(session.id))
+
+    return {
+        "session_id": session.id,
+        "transcript": transcript,
+        "label": turn.label,
+        "answer": turn.answer,
+    }
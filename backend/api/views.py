@@ -1,24 +1,55 @@
-import os
-import datetime
+import asyncio
+import json
+import logging
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.shortcuts import get_object_or_404
 from .model.session import ChatSession
+from .pagination import keyset_page
 from .model.history import History
-from .utils.utils import classify_question
-from .utils.utils_followup import build_context
-from .qa_lookup import get_answer
-import tempfile
-from pydub import AudioSegment
-import speech_recognition as sr
+from .model.answer import AnswerCatalog
 from rest_framework.parsers import MultiPartParser, FormParser
-from .utils.utils_followup import build_context   
-from .model.dailytip import DailyTip
-from .serializer import DailyTipSerializer
+from .utils.tip_payload import get_daily_payload
 from .utils.smalltalk import check_smalltalk
-from .model.unanswered import Unanswered
-from nlp.service.services import get_answer
+from .utils.chat import (
+    RetrievalBusy,
+    answer_turn,
+    answer_turn_async,
+    classify_turn,
+    retrieve_answer,
+    run_in_retrieval_pool,
+    sse_event,
+)
+from .utils.chat_turn import afinish_turn, astart_turn, finish_turn, record_messages, start_turn
+from .utils.session_window import invalidate_window
+from .utils.archive import rehydrate_session
+from .utils.audio import (
+    AudioDecodeError,
+    AudioRejected,
+    AudioUploadHandler,
+    decode_upload,
+    hash_upload,
+    store_audio,
+)
+from .utils.stt import STTError
+from .utils.voice import answer_voice_message, cached_transcript, stt_error, transcribe_cached
+from .model.audiojob import AudioJob
+from .tasks import enqueue_audio_job
+
+logger = logging.getLogger(__name__)
 
 
 class ChatbotAPIView(APIView):
@@ -37,59 +68,186 @@ class ChatbotAPIView(APIView):
         if not user_question:
             return Response({"error": "No question provided"}, status=400)
 
-        # 🔹 Chat session handling
-        if session_id:
-            session = get_object_or_404(ChatSession, id=session_id, user=user)
-        else:
-            title = user_question[:50] + ("..." if len(user_question) > 50 else "")
-            session = ChatSession.objects.create(user=user, title=title)
+        # 🔹 Session + recent messages in one query; the user message stays in memory
+        chat_turn = start_turn(user, session_id, user_question)
 
-        # Save user message
-        History.objects.create(session=session, sender="user", message=user_question)
+        # 🔹 Context → classification → staged answer pipeline
+        turn = answer_turn(user_question, chat_turn.history)
 
-        # 🔹 Collect last N messages
-        N = 6
-        recent_qs = session.messages.order_by("-timestamp")[:N]
-        recent = list(reversed(list(recent_qs)))
-        history = [{"sender": m.sender, "message": m.message, "timestamp": m.timestamp} for m in recent]
+        # 🔹 Both messages (+ unanswered on a miss) in a single transaction
+        finish_turn(chat_turn, turn.answer, answered=turn.answered, catalog=turn.catalog)
 
-        # 🔹 Context building
-        context_text = build_context(history, user_question, max_messages=N)
+        return Response({
+            "session_id": chat_turn.session.id,
+            "user_question": user_question,
+            "context_used": turn.context_text,
+            "label": turn.label,
+            "answer": turn.answer
+        })
 
-        # 🔹 Classification (still useful metadata)
-        label = classify_question(context_text)
 
-        # 🔹 Unified answer pipeline with FAISS + threshold
-        answer = get_answer(user_question, label=label, context=context_text, history=history)
+async def _authenticate_jwt(request):
+    """JWT auth for plain async views. Returns ``(user, None)`` or ``(None, error_response)``."""
+    try:
+        auth = await sync_to_async(JWTAuthentication().authenticate)(request)
+    except (AuthenticationFailed, InvalidToken) as e:
+        return None, JsonResponse({"detail": str(e)}, status=401)
+    if auth is None:
+        return None, JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+    return auth[0], None
 
-        # If retrieval confidence too low → save unanswered + fallback
-        if not answer or answer.strip().lower() in ["i don't know", "not sure", "unknown"]:
-            Unanswered.objects.create(user=user, question=user_question)
-            answer = "I’m not sure yet 🤔, but I’ll learn from this question!"
 
-        # Save bot response
-        History.objects.create(session=session, sender="bot", message=answer)
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncChatbotView(View):
+    """Async variant of ChatbotAPIView for ASGI deployments.
 
-        return Response({
-            "session_id": session.id,
+    ORM access uses Django's async query API and retrieval is offloaded to the
+    bounded pool in ``api.utils.chat``, so a worker is only occupied while it
+    is actually computing. DRF views are sync-only, hence the plain Django
+    view with JWT authentication done by hand.
+    """
+
+    async def post(self, request):
+        user, error = await _authenticate_jwt(request)
+        if error:
+            return error
+
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return JsonResponse({"error": "Invalid JSON body"}, status=400)
+        user_question = (data.get("question") or "").strip()
+        session_id = data.get("session_id")
+
+        # 🔹 Smalltalk check first
+        smalltalk = check_smalltalk(user_question)
+        if smalltalk:
+            return JsonResponse({"answer": smalltalk}, status=200)
+
+        if not user_question:
+            return JsonResponse({"error": "No question provided"}, status=400)
+
+        chat_turn = await astart_turn(user, session_id, user_question)
+
+        try:
+            turn = await answer_turn_async(user_question, chat_turn.history)
+        except RetrievalBusy:
+            return JsonResponse({"error": "Server busy, please retry"}, status=503)
+
+        await afinish_turn(chat_turn, turn.answer, answered=turn.answered, catalog=turn.catalog)
+
+        return JsonResponse({
+            "session_id": chat_turn.session.id,
             "user_question": user_question,
-            "context_used": context_text,
-            "label": label,
-            "answer": answer
+            "context_used": turn.context_text,
+            "label": turn.label,
+            "answer": turn.answer
         })
 
+# Turns still running after their client went away; holding them keeps the tasks alive
+_running_turns = set()
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class ChatbotStreamView(View):
+    """Server-Sent Events variant of the chat endpoint.
+
+    Emits ``meta`` (session id + label) as soon as the question is classified,
+    ``answer`` as soon as retrieval finishes, then persists the turn and closes
+    with ``done``. Clients render progressively instead of waiting for the
+    whole turn to be written and serialized.
+
+    The turn runs in its own task and the stream only relays its events, so a
+    client disconnecting mid-stream cancels the relay but not the turn: it is
+    still answered and persisted. Progressive delivery needs an ASGI server;
+    under WSGI Django buffers the whole stream, so clients there should use
+    the JSON endpoint.
+    """
+
+    async def post(self, request):
+        user, error = await _authenticate_jwt(request)
+        if error:
+            return error
+
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return JsonResponse({"error": "Invalid JSON body"}, status=400)
+        user_question = (data.get("question") or "").strip()
+        session_id = data.get("session_id")
+
+        if not user_question:
+            return JsonResponse({"error": "No question provided"}, status=400)
+
+        # 🔹 Smalltalk short-circuit, same as the JSON endpoint
+        smalltalk = check_smalltalk(user_question)
+        if smalltalk:
+            events = self._smalltalk_events(smalltalk)
+        else:
+            chat_turn = await astart_turn(user, session_id, user_question)
+            events = self._events(chat_turn, user_question)
+
+        response = StreamingHttpResponse(events, content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"  # disable proxy buffering (nginx)
+        return response
+
+    async def _smalltalk_events(self, reply):
+        yield sse_event("answer", {"answer": reply})
+        yield sse_event("done", {})
+
+    async def _events(self, chat_turn, user_question):
+        queue = asyncio.Queue()
+
+        def emit(event, data):
+            queue.put_nowait((event, data))
+
+        task = asyncio.ensure_future(self._run_turn(chat_turn, user_question, emit))
+        _running_turns.add(task)
+        task.add_done_callback(_running_turns.discard)
+
+        while True:
+            event, data = await queue.get()
+            yield sse_event(event, data)
+            if event in ("done", "error"):
+                return
+
+    async def _run_turn(self, chat_turn, user_question, emit):
+        """Classify, answer and persist one turn, reporting progress through ``emit(event, data)``."""
+        try:
+            # A new conversation needs its id before the first event goes out
+            if chat_turn.session.pk is None:
+                await chat_turn.session.asave()
+
+            turn = await run_in_retrieval_pool(classify_turn, user_question, chat_turn.history)
+            emit("meta", {"session_id": chat_turn.session.id, "label": turn.label})
+
+            turn = await run_in_retrieval_pool(retrieve_answer, turn, user_question, chat_turn.history)
+            emit("answer", {"answer": turn.answer})
+
+            await afinish_turn(chat_turn, turn.answer, answered=turn.answered, catalog=turn.catalog)
+            emit("done", {"context_used": turn.context_text})
+        except RetrievalBusy:
+            emit("error", {"error": "Server busy, please retry"})
+        except Exception:
+            logger.exception("streamed chat turn failed")
+            emit("error", {"error": "Failed to answer the question"})
+
+
 class DailyTipView(APIView):
+    """Serves the day's precomputed tip payload; supports conditional GET via ETag."""
     permission_classes = [AllowAny]
-    def get(self, request):
-        today = datetime.date.today()
-        daily_tips = DailyTip.objects.filter(date=today).select_related("tip")[:3]
+    authentication_classes = []  # public; skip the JWT user lookup
 
-        if not daily_tips.exists():
-            # fallback to most recent 3
-            daily_tips = DailyTip.objects.select_related("tip").order_by("-date")[:3]
-
-        serializer = DailyTipSerializer(daily_tips, many=True)
-        return Response(serializer.data)
+    def get(self, request):
+        payload = get_daily_payload()
+        # Handles weak validators, lists of tags and "*" in If-None-Match
+        response = get_conditional_response(request, etag=payload["etag"])
+        if response is None:
+            response = HttpResponse(payload["body"], content_type="application/json")
+        response["ETag"] = payload["etag"]
+        response["Cache-Control"] = f"public, max-age={settings.DAILY_TIP_MAX_AGE}"
+        return response
 
 
 
@@ -98,6 +256,8 @@ class ChatbotAudioAPIView(APIView):
     parser_classes = [MultiPartParser, FormParser]
 
     def post(self, request):
+        # Before the body is parsed: voice notes up to the limit stay in memory
+        request.upload_handlers.insert(0, AudioUploadHandler(request))
         user = request.user
         session_id = request.data.get("session_id")
         audio_file = request.FILES.get("audio")
@@ -105,125 +265,111 @@ class ChatbotAudioAPIView(APIView):
         if not audio_file:
             return Response({"error": "No audio file uploaded"}, status=400)
 
+        run_async = str(request.data.get("async", settings.AUDIO_ASYNC)).lower() in ("1", "true", "yes")
+        if audio_file.size > settings.AUDIO_MAX_UPLOAD_BYTES:
+            return Response({"error": f"Audio upload is larger than {settings.AUDIO_MAX_UPLOAD_BYTES} bytes"},
+                            status=413)
+        digest = hash_upload(audio_file)
+        # A clip heard before skips decoding and transcription entirely
+        transcript = None if run_async else cached_transcript(digest)
+        pcm = None
+        if not run_async and transcript is None:
+            # Decode in memory (16 kHz mono PCM) before anything is written
+            try:
+                pcm = decode_upload(audio_file)
+            except AudioRejected as e:
+                return Response({"error": str(e)}, status=413)
+            except AudioDecodeError as e:
+                return Response({"error": f"Could not decode audio: {e}"}, status=400)
+
         # Find or create session
         if session_id:
             session = get_object_or_404(ChatSession, id=session_id, user=user)
+            if not session.is_active:
+                rehydrate_session(session)
         else:
             session = ChatSession.objects.create(user=user, title="New Chat")
 
-        # Save audio file in History if field exists
-        saved_history = None
-        if hasattr(History, "audio"):
-            saved_history = History.objects.create(
-                session=session, sender="user", audio=audio_file
-            )
-
-        try:
-            # Save uploaded file to temp
-            ext = audio_file.name.split(".")[-1].lower()
-            with tempfile.NamedTemporaryFile(delete=False, suffix=f".{ext}") as tmp_in:
-                for chunk in audio_file.chunks():
-                    tmp_in.write(chunk)
-                tmp_in_path = tmp_in.name
-
-            # Convert to wav (mono 16kHz)
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_out:
-                if ext == "opus":
-                    audio_segment = AudioSegment.from_file(tmp_in_path, format="ogg")
-                else:
-                    audio_segment = AudioSegment.from_file(tmp_in_path, format=ext)
-
-                audio_segment = audio_segment.set_frame_rate(16000).set_channels(1)
-                audio_segment.export(tmp_out.name, format="wav")
-                tmp_wav_path = tmp_out.name
-
-            # Run transcription
-            recognizer = sr.Recognizer()
-            with sr.AudioFile(tmp_wav_path) as source:
-                audio_data = recognizer.record(source)
-
-            try:
-                transcript = recognizer.recognize_google(audio_data)
-            except sr.UnknownValueError:
-                return Response({"error": "Could not understand audio"}, status=400)
-            except sr.RequestError:
-                try:
-                    import whisper
-                except ImportError:
-                    return Response(
-                        {"error": "STT service unavailable and 'openai-whisper' is not installed"},
-                        status=500,
-                    )
-                model = whisper.load_model("base")
-                result = model.transcribe(tmp_wav_path)
-                transcript = result["text"]
-
-            # Save transcript to history
-            if saved_history:
-                saved_history.message = transcript
-                saved_history.save()
-            else:
-                History.objects.create(session=session, sender="user", message=transcript)
-
-            # Build context
-            N = 6
-            recent_qs = session.messages.order_by("-timestamp")[:N]
-            recent = list(reversed(list(recent_qs)))
-            history = [{"sender": m.sender, "message": m.message} for m in recent]
-
-            try:
-                context_text = build_context(history, transcript, max_messages=N)
-            except Exception:
-                last_user = next(
-                    (m["message"] for m in reversed(history) if m["sender"] == "user"),
-                    None,
-                )
-                context_text = f"{last_user} → {transcript}" if last_user else transcript
-
-            label = classify_question(context_text)
-            try:
-                answer = get_answer(transcript, label, context=context_text, history=history)
-            except TypeError:
-                answer = get_answer(transcript, label)
-
-            History.objects.create(session=session, sender="bot", message=answer)
-
+        # The user message keeps the uploaded audio (stored once per content hash);
+        # its text is the transcript
+        user_message = History.objects.create(
+            session=session, sender="user", audio=store_audio(audio_file, digest)
+        )
+        # Counted now: the row stays even if transcription or the job fails
+        record_messages(session.id, 1, last_message_at=user_message.timestamp)
+
+        if run_async:
+            job = AudioJob.objects.create(user=user, session=session, message=user_message)
+            transaction.on_commit(lambda: enqueue_audio_job(job))
+            if job.status == AudioJob.FAILED:
+                # Queued straight away outside a transaction, and the broker refused it
+                return Response({"job_id": str(job.id), "error": job.error}, status=job.error_status)
             return Response(
                 {
+                    "job_id": str(job.id),
                     "session_id": session.id,
-                    "transcript": transcript,
-                    "label": label,
-                    "answer": answer,
+                    "status": job.status,
+                    "status_url": reverse("chat-audio-job", args=[job.id]),
                 },
-                status=200,
+                status=202,
             )
 
+        try:
+            if transcript is None:
+                transcript = transcribe_cached(digest, pcm)
+            return Response(answer_voice_message(user_message, transcript), status=200)
+        except STTError as e:
+            status, message = stt_error(e)
+            return Response({"error": message}, status=status)
         except Exception as e:
             return Response({"error": f"Audio processing failed: {str(e)}"}, status=500)
-        finally:
-            if "tmp_in_path" in locals() and os.path.exists(tmp_in_path):
-                os.remove(tmp_in_path)
-            if "tmp_wav_path" in locals() and os.path.exists(tmp_wav_path):
-                os.remove(tmp_wav_path)
+
+
+class AudioJobStatusAPIView(APIView):
+    """Poll a queued voice message; transcript and answer are set once ``status`` is ``done``."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        job = get_object_or_404(AudioJob, id=job_id, user=request.user)
+        data = {"job_id": str(job.id), "session_id": job.session_id, "status": job.status}
+        if job.status == AudioJob.DONE:
+            data.update(transcript=job.transcript, label=job.label, answer=job.answer)
+        elif job.status == AudioJob.FAILED:
+            data.update(error=job.error, error_status=job.error_status)
+        return Response(data)
 
 class ChatSessionListAPIView(APIView):
     permission_classes = [IsAuthenticated]
     def get(self, request):
-        sessions = ChatSession.objects.filter(user=request.user).values(
-            "id", "title", "created_at"
+        sessions = ChatSession.objects.filter(user=request.user)
+        page = keyset_page(
+            sessions, request.query_params, "updated_at", default_limit=30,
+            values=("id", "title", "created_at", "updated_at", "message_count", "last_message_at"),
         )
-        return Response(list(sessions))
+        return Response(page)
 
 class ChatHistoryAPIView(APIView):
     permission_classes = [IsAuthenticated]
     def get(self, request, session_id):
         session = get_object_or_404(ChatSession, id=session_id, user=request.user)
-        messages = session.messages.values("sender", "message", "timestamp")
-        return Response(list(messages))
+        if not session.is_active:
+            rehydrate_session(session)
+        page = keyset_page(
+            session.messages.all(), request.query_params, "timestamp", newest_first=False,
+            values=("id", "sender", "message", "timestamp", "answer_id"),
+        )
+        # Side-load catalog answers for the whole page in one query
+        bodies = AnswerCatalog.objects.bodies(row["answer_id"] for row in page["results"])
+        for row in page["results"]:
+            answer_id = row.pop("answer_id")
+            if answer_id:
+                row["message"] = bodies.get(answer_id, "")
+        return Response(page)
 
 class ChatSessionDeleteAPIView(APIView):
     permission_classes = [IsAuthenticated]
     def delete(self, request, session_id):
         session = get_object_or_404(ChatSession, id=session_id, user=request.user)
         session.delete()
+        invalidate_window(session_id)
         return Response({"message": "Session deleted successfully"}, status=204)
@@ -2,5 +2,9 @@ from django.contrib import admin
 from .models import User, ResetPassword
 
 # Register your models here.
-admin.site.register(User)
+@admin.register(User)
+class UserAdmin(admin.ModelAdmin):
+    list_display = ('email', 'first_name', 'last_name', 'is_active')
+    search_fields = ('email', 'first_name', 'last_name')  # also backs the user autocomplete in api admin
+
 admin.site.register(ResetPassword)
\ No newline at end of file
@@ -5,6 +5,11 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Serve with an ASGI worker so the async chat endpoint can overlap DB waits and
+slow clients, e.g.:
+
+    gunicorn backend.asgi:application -k uvicorn.workers.UvicornWorker
 """
 
 import os
@@ -14,7 +14,6 @@ from pathlib import Path
 import os
 import dotenv
 from dotenv import load_dotenv
-from celery.schedules import crontab
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 # Load environment variables from .env file if it exists
@@ -240,9 +239,136 @@ CRONJOBS = [
     ('0 8 * * *', 'django.core.management.call_command', ['fetch_daily_tip']),
 ]
 
-CELERY_BEAT_SCHEDULE = {
-    "export-unanswered-daily": {
-        "task": "api.tasks.export_unanswered_to_csv",
-        "schedule": crontab(hour=2, minute=0),  
-    },
-}
\ No newline at end of file
+# Cache: Redis when REDIS_URL is set (shared by all workers), otherwise a
+# per-process in-memory cache for local development.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Recent-message windows live in the cache only when it is shared by all
+# workers (Redis); with the per-process cache every turn reads the database,
+# since one worker's window would be stale for the others.
+CHAT_WINDOW_CACHE = os.environ.get('CHAT_WINDOW_CACHE', str(bool(os.environ.get('REDIS_URL')))) == 'True'
+# Seconds an idle conversation keeps its recent-message window in the cache
+CHAT_WINDOW_TTL = int(os.environ.get('CHAT_WINDOW_TTL', str(30 * 60)))
+
+# Answer pipeline: stop at the first answer this confident (the dataset fuzzy
+# match and any stage without its own accept threshold), and skip stages whose declared cost no longer
+# fits in the per-request budget (None = no budget)
+ANSWER_ACCEPT_CONFIDENCE = float(os.environ.get('ANSWER_ACCEPT_CONFIDENCE', '0.8'))
+ANSWER_BUDGET_MS = float(os.environ['ANSWER_BUDGET_MS']) if os.environ.get('ANSWER_BUDGET_MS') else None
+
+# Async chat view: retrieval runs in a bounded thread pool. Requests wait up to
+# CHAT_RETRIEVAL_QUEUE_TIMEOUT seconds for one of the pending slots before a 503.
+CHAT_RETRIEVAL_WORKERS = int(os.environ.get('CHAT_RETRIEVAL_WORKERS', '4'))
+CHAT_RETRIEVAL_MAX_PENDING = int(os.environ.get('CHAT_RETRIEVAL_MAX_PENDING', '32'))
+CHAT_RETRIEVAL_QUEUE_TIMEOUT = float(os.environ.get('CHAT_RETRIEVAL_QUEUE_TIMEOUT', '10'))
+
+# History archival: sessions idle for CHAT_ARCHIVE_AFTER_DAYS have their messages
+# moved into one compressed blob, CHAT_ARCHIVE_BATCH_SIZE sessions per transaction
+CHAT_ARCHIVE_AFTER_DAYS = int(os.environ.get('CHAT_ARCHIVE_AFTER_DAYS', '90'))
+CHAT_ARCHIVE_BATCH_SIZE = int(os.environ.get('CHAT_ARCHIVE_BATCH_SIZE', '50'))
+
+# Voice messages are decoded in memory by an ffmpeg pipe; on the audio endpoint
+# uploads up to the limit stay in memory instead of being spooled to a temp
+# file (other uploads keep Django's default FILE_UPLOAD_MAX_MEMORY_SIZE)
+AUDIO_MAX_UPLOAD_BYTES = int(os.environ.get('AUDIO_MAX_UPLOAD_BYTES', str(10 * 1024 * 1024)))
+AUDIO_MAX_SECONDS = float(os.environ.get('AUDIO_MAX_SECONDS', '60'))
+AUDIO_DECODE_TIMEOUT = float(os.environ.get('AUDIO_DECODE_TIMEOUT', '30'))
+
+# Speech-to-text: engines are tried in order (google, whisper, stub). Each has
+# STT_WORKERS threads with one engine/model apiece, at most STT_MAX_PENDING
+# queued requests, and STT_TIMEOUT seconds to produce a transcript.
+STT_ENGINES = os.environ.get('STT_ENGINES', 'google,whisper')
+STT_WHISPER_MODEL = os.environ.get('STT_WHISPER_MODEL', 'base')
+STT_WORKERS = int(os.environ.get('STT_WORKERS', '2'))
+STT_MAX_PENDING = int(os.environ.get('STT_MAX_PENDING', '8'))
+STT_QUEUE_TIMEOUT = float(os.environ.get('STT_QUEUE_TIMEOUT', '10'))
+STT_TIMEOUT = float(os.environ.get('STT_TIMEOUT', '60'))
+# Drop silence and transcribe speech segments (at most N seconds each) in parallel
+AUDIO_VAD = os.environ.get('AUDIO_VAD', 'True') == 'True'
+AUDIO_MAX_SEGMENT_SECONDS = float(os.environ.get('AUDIO_MAX_SEGMENT_SECONDS', '15'))
+
+# Voice messages: process in the request (default) or hand off to a Celery job
+# and answer 202 with a job id. Clients can also pass ``async=1`` per request.
+AUDIO_ASYNC = os.environ.get('AUDIO_ASYNC', 'False') == 'True'
+
+# Health tips: sources are fetched concurrently; each request times out after
+# TIP_REQUEST_TIMEOUT s and the whole fetch after TIP_FETCH_DEADLINE s. A source
+# failing TIP_BREAKER_FAILURES times in a row is skipped for TIP_BREAKER_RESET s.
+TIP_REQUEST_TIMEOUT = float(os.environ.get('TIP_REQUEST_TIMEOUT', '5'))
+TIP_FETCH_DEADLINE = float(os.environ.get('TIP_FETCH_DEADLINE', '8'))
+TIP_BREAKER_FAILURES = int(os.environ.get('TIP_BREAKER_FAILURES', '3'))
+TIP_BREAKER_RESET = float(os.environ.get('TIP_BREAKER_RESET', '300'))
+# Tips are prefetched into a pool covering TIP_PREFETCH_DAYS days ahead; a tip
+# is not shown again until TIP_REPEAT_AFTER_DAYS days after it was last used
+TIP_PREFETCH_DAYS = int(os.environ.get('TIP_PREFETCH_DAYS', '7'))
+TIP_REPEAT_AFTER_DAYS = int(os.environ.get('TIP_REPEAT_AFTER_DAYS', '60'))
+# Browser/CDN max-age for the daily tip endpoint; the precomputed payload itself
+# stays cached for DAILY_TIP_CACHE_TTL seconds or until new tips are saved. Only
+# a shared cache (Redis) sees invalidations from other processes, so without one
+# the payload is kept briefly.
+DAILY_TIP_MAX_AGE = int(os.environ.get('DAILY_TIP_MAX_AGE', '300'))
+DAILY_TIP_CACHE_TTL = int(os.environ.get(
+    'DAILY_TIP_CACHE_TTL', str(24 * 60 * 60 if os.environ.get('REDIS_URL') else 5 * 60)
+))
+
+# Weekly export of answered questions: streamed in chunks into exports/ as CSV
+# plus any of 'jsonl' (gzip) and 'parquet' (needs pyarrow); then questions older
+# than UNANSWERED_RETENTION_DAYS are deleted UNANSWERED_DELETE_BATCH_SIZE at a time
+UNANSWERED_EXPORT_FORMATS = os.environ.get('UNANSWERED_EXPORT_FORMATS', 'csv')
+UNANSWERED_EXPORT_CHUNK_SIZE = int(os.environ.get('UNANSWERED_EXPORT_CHUNK_SIZE', '2000'))
+UNANSWERED_RETENTION_DAYS = int(os.environ.get('UNANSWERED_RETENTION_DAYS', '7'))
+UNANSWERED_DELETE_BATCH_SIZE = int(os.environ.get('UNANSWERED_DELETE_BATCH_SIZE', '1000'))
+
+# Hourly job grouping new unanswered questions: a question joins the nearest
+# cluster when the cosine similarity of its embedding to the cluster centroid
+# is at least UNANSWERED_CLUSTER_SIMILARITY, else it starts a new cluster
+UNANSWERED_CLUSTER_SIMILARITY = float(os.environ.get('UNANSWERED_CLUSTER_SIMILARITY', '0.8'))
+UNANSWERED_CLUSTER_BATCH_SIZE = int(os.environ.get('UNANSWERED_CLUSTER_BATCH_SIZE', '256'))
+# One clustering run at a time (task or command); the lock is renewed per batch
+# and freed after this many seconds if its holder dies
+UNANSWERED_CLUSTER_LOCK_TTL = int(os.environ.get('UNANSWERED_CLUSTER_LOCK_TTL', str(10 * 60)))
+
+# Periodic jobs run in whichever process holds the scheduler lease, normally a
+# dedicated ``manage.py run_scheduler`` (see supervisord.conf). The holder
+# renews it every SCHEDULER_HEARTBEAT s; if it stops, another process takes over
+# after SCHEDULER_LEASE_TTL s. SCHEDULER_AUTOSTART=True also lets web server
+# processes (gunicorn, uvicorn, daphne, runserver) join the election.
+SCHEDULER_AUTOSTART = os.environ.get('SCHEDULER_AUTOSTART', 'False') == 'True'
+SCHEDULER_LEASE_TTL = int(os.environ.get('SCHEDULER_LEASE_TTL', '60'))
+SCHEDULER_HEARTBEAT = int(os.environ.get('SCHEDULER_HEARTBEAT', '15'))
+
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
+# Run tasks inline on the in-memory transport (no broker needed) for tests and
+# local development; errors propagate to the caller
+CELERY_TASK_ALWAYS_EAGER = os.environ.get('CELERY_TASK_ALWAYS_EAGER', 'False') == 'True'
+if CELERY_TASK_ALWAYS_EAGER:
+    CELERY_BROKER_URL = 'memory://'
+    CELERY_RESULT_BACKEND = 'cache+memory://'
+    CELERY_TASK_EAGER_PROPAGATES = True
+
+# Slow periodic work gets its own queues so it never holds up voice-message jobs
+# on the default queue, e.g. ``celery -A backend worker -Q tips,exports,maintenance``
+# and ``celery -A backend worker -Q index --concurrency 1`` for index rebuilds.
+CELERY_TASK_ROUTES = {
+    'api.tasks.send_health_tips': {'queue': 'tips'},
+    'api.tasks.export_unanswered': {'queue': 'exports'},
+    'api.tasks.archive_history': {'queue': 'maintenance'},
+    'api.tasks.cluster_unanswered_questions': {'queue': 'index'},
+    'nlp.tasks.rebuild_faiss_index': {'queue': 'index'},
+}
+# Long tasks: take one message at a time so a redelivery after a crash stays small
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
@@ -0,0 +1,100 @@
+# nlp/service/pipeline.py
+"""Staged answer pipeline.
+
+Each stage declares an expected cost and reports a confidence for the answer
+it finds. Confidences are only comparable within a stage (a difflib ratio,
+a FAISS inner product and a TF-IDF cosine live on different scales), so each
+stage may declare its own ``accept_confidence``; the runner walks the stages
+in order, stops as soon as an answer reaches its stage's accept threshold
+(the pipeline-wide one when the stage declares none) and skips stages whose
+declared cost no longer fits in the request's latency budget. Per-stage timings come back with the
+result so callers can log or expose them.
+"""
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+
+@dataclass
+class AnswerRequest:
+    query: str                     # normalized / rewritten query
+    raw_query: str
+    label: str | None = None
+    context: str | None = None
+    history: list | None = None
+    features: Any = None           # api.utils.utils.QueryFeatures, when available
+
+
+@dataclass
+class StageResult:
+    answer: str | None
+    confidence: float = 0.0
+
+
+@dataclass
+class Stage:
+    name: str
+    run: Callable[[AnswerRequest], StageResult | None]
+    cost_ms: float = 0.0           # expected cost, used for budgeting
+    min_confidence: float = 0.0    # answers below this are discarded
+    accept_confidence: float | None = None  # stop here at/above this (default: the pipeline's)
+    catalog: bool = True           # answers are fixed dataset texts (stored by reference)
+
+
+@dataclass
+class PipelineResult:
+    answer: str | None = None
+    confidence: float = 0.0
+    stage: str | None = None
+    catalog: bool = False
+    timings: list[dict] = field(default_factory=list)
+
+    @property
+    def answered(self) -> bool:
+        return self.answer is not None
+
+    @property
+    def total_ms(self) -> float:
+        return sum(t["ms"] for t in self.timings)
+
+
+class AnswerPipeline:
+    def __init__(self, stages: list[Stage], accept_confidence: float = 0.8,
+                 budget_ms: float | None = None):
+        self.stages = list(stages)
+        self.accept_confidence = accept_confidence
+        self.budget_ms = budget_ms
+
+    def run(self, request: AnswerRequest, budget_ms: float | None = None) -> PipelineResult:
+        budget_ms = self.budget_ms if budget_ms is None else budget_ms
+        result = PipelineResult()
+        start = time.perf_counter()
+
+        for stage in self.stages:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if budget_ms is not None and elapsed_ms + stage.cost_ms > budget_ms:
+                result.timings.append({"stage": stage.name, "status": "skipped", "ms": 0.0})
+                continue
+
+            t0 = time.perf_counter()
+            found = stage.run(request)
+            ms = (time.perf_counter() - t0) * 1000
+
+            if not found or not found.answer or found.confidence < stage.min_confidence:
+                result.timings.append({"stage": stage.name, "status": "miss", "ms": ms})
+                continue
+
+            result.timings.append({
+                "stage": stage.name, "status": "hit", "ms": ms, "confidence": found.confidence,
+            })
+            accept = self.accept_confidence if stage.accept_confidence is None else stage.accept_confidence
+            # Only an accepted answer may replace an earlier stage's: the scales differ
+            if result.answer is None or found.confidence >= accept:
+                result.answer = found.answer
+                result.confidence = found.confidence
+                result.stage = stage.name
+                result.catalog = stage.catalog
+            if found.confidence >= accept:
+                break
+
+        return result
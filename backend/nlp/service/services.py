@@ -1,40 +1,90 @@
 # nlp/services/unified_service.py
+import logging
+from django.conf import settings
 from nlp.utils.utils import (
     normalize_intent_phrases,
     canonicalize_condition_terms,
     improve_query_with_context,
     rewrite_followup_query,
-    smart_dataset_lookup,
+    exact_dataset_lookup,
+    fuzzy_dataset_lookup,
 )
-from nlp.utils.retriever import FaissRetriever
+from nlp.service.pipeline import AnswerPipeline, AnswerRequest, PipelineResult, Stage, StageResult
 from api.utils.smalltalk import check_smalltalk
 
+logger = logging.getLogger(__name__)
+
 retriever = None
 FAISS_SCORE_THRESHOLD = 0.6  # configurable
+ACCEPT_CONFIDENCE = getattr(settings, "ANSWER_ACCEPT_CONFIDENCE", 0.8)
+BUDGET_MS = getattr(settings, "ANSWER_BUDGET_MS", None)
+FALLBACK_ANSWER = "Sorry, I don’t know the answer to that."
 
 def init_retriever():
     global retriever
     if retriever is None:
+        from nlp.utils.retriever import FaissRetriever
         retriever = FaissRetriever()
     return retriever
 
-def get_answer(user_query: str, label: str | None = None, history=None) -> str:
-    retriever = init_retriever()
+# ---- Stages ----
+def dataset_exact_stage(request: AnswerRequest) -> StageResult:
+    return StageResult(*exact_dataset_lookup(request.query, request.label))
+
+def dataset_fuzzy_stage(request: AnswerRequest) -> StageResult:
+    return StageResult(*fuzzy_dataset_lookup(request.query, request.label))
+
+def faiss_stage(request: AnswerRequest) -> StageResult | None:
+    results = init_retriever().search(request.query, top_k=3)
+    if not results:
+        return None
+    return StageResult(results[0]["answer"], results[0]["score"])
+
+def smalltalk_stage(request: AnswerRequest) -> StageResult | None:
+    reply = check_smalltalk(request.query)
+    # Lowest confidence: only used when nothing in the dataset matched
+    return StageResult(reply, 0.1) if reply else None
 
+def default_stages() -> list[Stage]:
+    # The first stage with a match answers: exact → fuzzy (ratio ≥ 0.8, accepted
+    # at the pipeline's ANSWER_ACCEPT_CONFIDENCE) → FAISS (score ≥ 0.6) → smalltalk
+    return [
+        Stage("dataset_exact", dataset_exact_stage, cost_ms=2, min_confidence=1.0, accept_confidence=1.0),
+        Stage("dataset_fuzzy", dataset_fuzzy_stage, cost_ms=150, min_confidence=0.8),
+        Stage("faiss", faiss_stage, cost_ms=30, min_confidence=FAISS_SCORE_THRESHOLD,
+              accept_confidence=FAISS_SCORE_THRESHOLD),
+        Stage("smalltalk", smalltalk_stage, cost_ms=0.1, catalog=False),
+    ]
+
+_pipeline = None
+
+def get_pipeline() -> AnswerPipeline:
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = AnswerPipeline(default_stages(), accept_confidence=ACCEPT_CONFIDENCE, budget_ms=BUDGET_MS)
+    return _pipeline
+
+def answer_question(user_query: str, label: str | None = None, history=None, context: str | None = None,
+                    features=None, budget_ms: float | None = None) -> PipelineResult:
+    """Run the staged pipeline and return the answer with confidence and per-stage timings."""
     # 1. Normalize + preprocess
     query = normalize_intent_phrases(canonicalize_condition_terms(user_query))
     query = improve_query_with_context(query, history=history)
     query = rewrite_followup_query(query, history)
 
-    # 2. Direct dataset lookup
-    dataset_answer = smart_dataset_lookup(query, label)
-    if dataset_answer:
-        return dataset_answer
-
-    # 3. FAISS semantic retrieval
-    results = retriever.search(query, top_k=3)
-    if results and results[0]["score"] >= FAISS_SCORE_THRESHOLD:
-        return results[0]["answer"]
+    request = AnswerRequest(
+        query=query, raw_query=user_query, label=label, context=context,
+        history=history, features=features,
+    )
+    result = get_pipeline().run(request, budget_ms=budget_ms)
+    logger.debug(
+        "answer pipeline: stage=%s confidence=%.3f total=%.1fms timings=%s",
+        result.stage, result.confidence, result.total_ms, result.timings,
+    )
+    return result
 
-    # 4. Fallback smalltalk/default
-    return check_smalltalk(query) or "Sorry, I don’t know the answer to that."
+def get_answer(user_query: str, label: str | None = None, history=None, context: str | None = None,
+               features=None) -> str:
+    result = answer_question(user_query, label=label, history=history, context=context, features=features)
+    # Fallback smalltalk/default
+    return result.answer or FALLBACK_ANSWER
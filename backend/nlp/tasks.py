@@ -0,0 +1,22 @@
+import os
+
+from celery import shared_task
+from django.core.management import call_command
+
+from api.utils.taskruns import task_run
+
+
+@shared_task(bind=True, acks_late=True, max_retries=1, default_retry_delay=600,
+             soft_time_limit=3 * 60 * 60, time_limit=3 * 60 * 60 + 300)
+def rebuild_faiss_index(self, idempotency_key=None):
+    """Rebuild the FAISS index from the training CSV (see ``build_embeddings``).
+
+    By default keyed on the dataset's modification time, so an unchanged dataset is not re-embedded.
+    """
+    from .management.commands.build_embeddings import DATA_CSV
+    key = idempotency_key or f"rebuild_faiss_index:{int(os.path.getmtime(DATA_CSV))}"
+    with task_run(key, self.name, stale_after=self.time_limit) as claimed:
+        if not claimed:
+            return f"skipped: {key} already ran"
+        call_command("build_embeddings")
+    return "✅ FAISS index rebuilt"
@@ -1,7 +1,7 @@
 # nlp/utils.py
 import re
 import pandas as pd
-from difflib import get_close_matches
+from difflib import SequenceMatcher, get_close_matches
 
 # Normalize text
 def normalize_query(text: str) -> str:
@@ -61,29 +61,37 @@ def load_dataset():
         _df_cache = df
     return _df_cache
 
-def smart_dataset_lookup(query: str, label: str | None = None) -> str | None:
-    df = load_dataset()
-    q_norm = normalize_query(query)
+def _pick_answer(rows, label: str | None):
+    if label:
+        exact_label = rows[rows["qtype"] == label]
+        if not exact_label.empty:
+            return exact_label.iloc[0]["Answer"]
+    return rows.iloc[0]["Answer"]
 
-    # Exact match
-    exact = df[df["__norm_cached__"] == q_norm]
-    if not exact.empty:
-        if label:
-            exact_label = exact[exact["qtype"] == label]
-            if not exact_label.empty:
-                return exact_label.iloc[0]["Answer"]
-        return exact.iloc[0]["Answer"]
+def exact_dataset_lookup(query: str, label: str | None = None) -> tuple[str | None, float]:
+    """Exact normalized-question match. Returns ``(answer, 1.0)`` or ``(None, 0.0)``."""
+    df = load_dataset()
+    exact = df[df["__norm_cached__"] == normalize_query(query)]
+    if exact.empty:
+        return None, 0.0
+    return _pick_answer(exact, label), 1.0
 
-    # Fuzzy match
-    close_norm = get_close_matches(q_norm, df["__norm_cached__"].tolist(), n=1, cutoff=0.8)
-    if close_norm:
-        candidate_norm = close_norm[0]
-        candidate_row = df[df["__norm_cached__"] == candidate_norm]
-        if not candidate_row.empty:
-            if label:
-                exact_label = candidate_row[candidate_row["qtype"] == label]
-                if not exact_label.empty:
-                    return exact_label.iloc[0]["Answer"]
-            return candidate_row.iloc[0]["Answer"]
+def fuzzy_dataset_lookup(query: str, label: str | None = None, cutoff: float = 0.8) -> tuple[str | None, float]:
+    """Closest normalized question by difflib ratio. Returns ``(answer, ratio)``."""
+    df = load_dataset()
+    q_norm = normalize_query(query)
+    close_norm = get_close_matches(q_norm, df["__norm_cached__"].tolist(), n=1, cutoff=cutoff)
+    if not close_norm:
+        return None, 0.0
+    candidate_norm = close_norm[0]
+    candidate_row = df[df["__norm_cached__"] == candidate_norm]
+    if candidate_row.empty:
+        return None, 0.0
+    return _pick_answer(candidate_row, label), SequenceMatcher(None, q_norm, candidate_norm).ratio()
 
-    return None
+def smart_dataset_lookup(query: str, label: str | None = None) -> str | None:
+    answer, _ = exact_dataset_lookup(query, label)
+    if answer:
+        return answer
+    answer, _ = fuzzy_dataset_lookup(query, label)
+    return answer
@@ -0,0 +1,101 @@
+"""
+Benchmark whole-recording vs VAD-segmented parallel transcription on the
+sample voice notes in chat_audio/.
+
+Needs ffmpeg on PATH. Run from the backend directory:
+
+    python scripts/bench_vad.py --engine whisper --workers 4
+
+Without a local model, ``--engine stub --rtf 0.3`` simulates an engine that
+takes 0.3 s per second of audio, which is enough to compare the two modes.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.files import File  # noqa: E402
+
+from api.utils import stt  # noqa: E402
+from api.utils.audio import SAMPLE_RATE, decode_upload  # noqa: E402
+from api.utils.vad import speech_segments  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare whole vs VAD-segmented transcription latency")
+    parser.add_argument("--audio-dir", default=str(BASE_DIR / "chat_audio"))
+    parser.add_argument("--engine", default="stub", choices=sorted(stt.ENGINES))
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rtf", type=float, default=0.0,
+                        help="simulated seconds of work per second of audio (stub engine only)")
+    parser.add_argument("--repeat", type=int, default=3)
+    return parser.parse_args()
+
+
+def simulated(engine_cls, rtf):
+    class Simulated(engine_cls):
+        def transcribe(self, pcm):
+            time.sleep(len(pcm) / SAMPLE_RATE * rtf)
+            return super().transcribe(pcm)
+    Simulated.name = engine_cls.name
+    return Simulated
+
+
+def timed(pcm, pool, segments, repeat):
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            if segments is None:
+                pool.transcribe(pcm)
+            else:
+                pool.transcribe_segments([pcm[s:e] for s, e in segments])
+        except stt.NoSpeech:
+            pass
+        runs.append((time.perf_counter() - start) * 1000)
+    return statistics.median(runs)
+
+
+def main():
+    args = parse_args()
+    engine_cls = stt.ENGINES[args.engine]
+    if args.rtf:
+        engine_cls = simulated(engine_cls, args.rtf)
+    pool = stt.EnginePool(engine_cls, workers=args.workers, max_pending=args.workers * 4)
+
+    files = sorted(p for p in Path(args.audio_dir).iterdir() if p.suffix in (".opus", ".webm", ".wav", ".ogg"))
+    if not files:
+        sys.exit(f"No audio files in {args.audio_dir}")
+
+    print(f"{'file':<28}{'audio s':>9}{'speech s':>10}{'segs':>6}{'whole ms':>11}{'vad ms':>9}{'speedup':>9}")
+    totals = [0.0, 0.0]
+    for path in files:
+        with path.open("rb") as f:
+            pcm = decode_upload(File(f, name=path.name), max_bytes=50 * 1024 * 1024, max_seconds=600)
+        segments = speech_segments(pcm)
+        speech = sum(e - s for s, e in segments) / SAMPLE_RATE
+
+        whole = timed(pcm, pool, None, args.repeat)
+        vad = timed(pcm, pool, segments, args.repeat) if segments else 0.0
+        totals[0] += whole
+        totals[1] += vad
+        speedup = f"{whole / vad:.2f}x" if vad else "-"
+        print(f"{path.name:<28}{len(pcm) / SAMPLE_RATE:>9.2f}{speech:>10.2f}{len(segments):>6}"
+              f"{whole:>11.1f}{vad:>9.1f}{speedup:>9}")
+
+    print(f"\ntotal: whole {totals[0]:.1f} ms, vad {totals[1]:.1f} ms"
+          + (f" ({totals[0] / totals[1]:.2f}x)" if totals[1] else ""))
+
+
+if __name__ == "__main__":
+    main()
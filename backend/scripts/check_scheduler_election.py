@@ -0,0 +1,105 @@
+"""
+Start several scheduler processes against the same database and check that
+exactly one holds the lease at a time and that another takes over when the
+leader is killed.
+
+Run from the backend directory (SQLite works; each process uses its own
+connection):
+
+    python scripts/check_scheduler_election.py --processes 4 --ttl 3
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+os.environ["SCHEDULER_AUTOSTART"] = "False"  # this process only watches
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.utils import timezone  # noqa: E402
+
+from api.model.schedulerlease import SchedulerLease  # noqa: E402
+from api.scheduler import LEASE_NAME  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Check scheduler leader election across processes")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--ttl", type=int, default=3, help="lease TTL in seconds")
+    parser.add_argument("--failovers", type=int, default=2)
+    return parser.parse_args()
+
+
+def current_holder():
+    lease = SchedulerLease.objects.filter(name=LEASE_NAME, expires_at__gt=timezone.now()).first()
+    return lease.holder if lease else None
+
+
+def wait_for_holder(exclude, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        holder = current_holder()
+        if holder and holder != exclude:
+            return holder
+        time.sleep(0.2)
+    return None
+
+
+def main():
+    args = parse_args()
+    env = {
+        **os.environ,
+        "SCHEDULER_LEASE_TTL": str(args.ttl),
+        "SCHEDULER_HEARTBEAT": str(max(args.ttl // 3, 1)),
+    }
+    procs = {}
+    for i in range(args.processes):
+        name = f"worker-{i}"
+        procs[name] = subprocess.Popen(
+            [sys.executable, "manage.py", "run_scheduler", "--skip-checks", "--holder", name],
+            cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL,
+        )
+
+    ok = True
+    try:
+        leader = wait_for_holder(None, timeout=args.ttl * 3)
+        print(f"leader: {leader}")
+        ok = leader is not None
+        for _ in range(args.failovers if ok else 0):
+            # Watch for a while: the lease must not move while the leader is alive
+            stable_until = time.monotonic() + args.ttl * 2
+            while time.monotonic() < stable_until:
+                if current_holder() != leader:
+                    print(f"lease moved away from a live leader: {current_holder()}")
+                    ok = False
+                time.sleep(0.2)
+
+            started = time.monotonic()
+            procs.pop(leader).send_signal(signal.SIGKILL)  # no clean release: others must wait out the TTL
+            new_leader = wait_for_holder(leader, timeout=args.ttl * 3)
+            print(f"killed {leader}; {new_leader} took over after {time.monotonic() - started:.1f}s")
+            if new_leader is None:
+                ok = False
+                break
+            leader = new_leader
+    finally:
+        for proc in procs.values():
+            proc.send_signal(signal.SIGTERM)
+        for proc in procs.values():
+            proc.wait(timeout=30)
+
+    print(f"released on shutdown: {current_holder() is None}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Load test comparing the sync (WSGI/DRF) and async (ASGI) chat endpoints.
+
+Run the server under ASGI so both endpoints are served by the same process:
+
+    gunicorn backend.asgi:application -k uvicorn.workers.UvicornWorker -w 2
+
+then:
+
+    python scripts/load_test_chat.py --token <JWT access token> \
+        --concurrency 1 8 32 --requests 200
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+QUESTIONS = [
+    "What causes malaria?",
+    "What are the symptoms of diabetes?",
+    "How can I prevent high blood pressure?",
+    "What is the treatment for tuberculosis?",
+    "Is asthma hereditary?",
+]
+
+ENDPOINTS = {
+    "sync": "/api/chatbot/",
+    "async": "/api/chatbot/async/",
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare sync vs async chat endpoint concurrency")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--token", required=True, help="JWT access token")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=100, help="requests per endpoint per concurrency level")
+    parser.add_argument("--endpoints", nargs="+", choices=sorted(ENDPOINTS), default=["sync", "async"])
+    parser.add_argument("--timeout", type=float, default=60.0)
+    return parser.parse_args()
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+async def run_level(client, path, concurrency, total):
+    latencies, errors = [], 0
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(QUESTIONS[i % len(QUESTIONS)])
+
+    async def worker():
+        nonlocal errors
+        while True:
+            try:
+                question = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            t0 = time.perf_counter()
+            try:
+                resp = await client.post(path, json={"question": question})
+                if resp.status_code != 200:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "rps": total / elapsed if elapsed else 0.0,
+        "p50": statistics.median(latencies) if latencies else 0.0,
+        "p95": percentile(latencies, 95),
+        "errors": errors,
+    }
+
+
+async def main():
+    args = parse_args()
+    headers = {"Authorization": f"Bearer {args.token}"}
+    limits = httpx.Limits(max_connections=max(args.concurrency))
+
+    print(f"{'endpoint':<8} {'conc':>5} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'errors':>7}")
+    async with httpx.AsyncClient(base_url=args.base_url, headers=headers,
+                                 timeout=args.timeout, limits=limits) as client:
+        for concurrency in args.concurrency:
+            for name in args.endpoints:
+                stats = await run_level(client, ENDPOINTS[name], concurrency, args.requests)
+                print(f"{name:<8} {concurrency:>5} {stats['rps']:>8.1f} {stats['p50']:>9.1f} "
+                      f"{stats['p95']:>9.1f} {stats['errors']:>7}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
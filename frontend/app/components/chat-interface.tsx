@@ -10,6 +10,7 @@ import { Send, Mic, Paperclip, Activity, ChevronDown, MessageSquare, User, LogOu
 import { Separator } from "@/components/ui/separator"
 import TypingIndicator from "./typing-indicator"
 import { chatAPI, isAuthenticated } from "@/app/utils/auth"
+import { API_CONFIG } from "@/app/config/api"
 import AudioRecord from "./audio-record"
 
 interface ChatInterfaceProps {
@@ -32,6 +33,7 @@ interface ChatSession {
 }
 
 interface ChatMessage {
+  id: number
   sender: string
   message: string
   timestamp: string
@@ -52,6 +54,9 @@ export default function ChatInterface({ user, onSignOut, onNavigate }: ChatInter
   const [chatSessions, setChatSessions] = useState<ChatSession[]>([])
   const [currentSessionId, setCurrentSessionId] = useState<string | null>(null)
   const [isLoadingSessions, setIsLoadingSessions] = useState(true)
+  // Cursors for the next older page (null once everything is loaded)
+  const [olderSessionsCursor, setOlderSessionsCursor] = useState<string | null>(null)
+  const [olderMessagesCursor, setOlderMessagesCursor] = useState<string | null>(null)
   const [showAudioInput, setShowAudioInput] = useState(false)
   const [sidebarOpen, setSidebarOpen] = useState(false)
   const SESSION_STORAGE_KEY = "current_chat_session_id"
@@ -60,9 +65,11 @@ export default function ChatInterface({ user, onSignOut, onNavigate }: ChatInter
     messagesEndRef.current?.scrollIntoView({ behavior: "smooth" })
   }
 
+  // Only new messages at the end scroll; loading earlier ones keeps the position
+  const lastMessageId = messages[messages.length - 1]?.id
   useEffect(() => {
     scrollToBottom()
-  }, [messages, isTyping])
+  }, [lastMessageId, isTyping])
 
   // Load chat sessions on component mount
   useEffect(() => {
@@ -96,8 +103,9 @@ export default function ChatInterface({ user, onSignOut, onNavigate }: ChatInter
         console.error('User not authenticated')
         return
       }
-      const sessions = await chatAPI.getChatSessions()
-      setChatSessions(sessions)
+      const page = await chatAPI.getChatSessions()
+      setChatSessions(page.results)
+      setOlderSessionsCursor(page.before)
     } catch (error) {
       console.error('Error loading chat sessions:', error)
       if (error instanceof Error && error.message === 'Authentication expired') {
@@ -108,20 +116,37 @@ export default function ChatInterface({ user, onSignOut, onNavigate }: ChatInter
     }
   }
 
+  const loadMoreSessions = async () => {
+    if (!olderSessionsCursor) return
+    try {
+      const page = await chatAPI.getChatSessions(olderSessionsCursor)
+      setChatSessions((prev) => [...prev, ...page.results])
+      setOlderSessionsCursor(page.before)
+    } catch (error) {
+      console.error('Error loading chat sessions:', error)
+      if (error instanceof Error && error.message === 'Authentication expired') {
+        onSignOut() // Redirect to login
+      }
+    }
+  }
+
+  const formatHistory = (history: ChatMessage[]): Message[] =>
+    history.map((msg) => ({
+      id: `history-${msg.id}`,
+      content: msg.message,
+      sender: msg.sender === 'bot' ? 'ai' : msg.sender as 'user' | 'ai',
+      timestamp: new Date(msg.timestamp),
+    }))
+
   const loadChatHistory = async (sessionId: string) => {
     try {
       if (!isAuthenticated()) {
         console.error('User not authenticated')
         return
       }
-      const history = await chatAPI.getChatHistory(sessionId)
-      const formattedMessages: Message[] = history.map((msg: ChatMessage, index: number) => ({
-        id: index.toString(),
-        content: msg.message,
-        sender: msg.sender === 'bot' ? 'ai' : msg.sender as 'user' | 'ai',
-        timestamp: new Date(msg.timestamp),
-      }))
-      setMessages(formattedMessages)
+      const page = await chatAPI.getChatHistory(sessionId)
+      setMessages(formatHistory(page.results))
+      setOlderMessagesCursor(page.before)
       setCurrentSessionId(sessionId)
     } catch (error) {
       console.error('Error loading chat history:', error)
@@ -131,6 +156,20 @@ export default function ChatInterface({ user, onSignOut, onNavigate }: ChatInter
     }
   }
 
+  const loadEarlierMessages = async () => {
+    if (!currentSessionId || !olderMessagesCursor) return
+    try {
+      const page = await chatAPI.getChatHistory(currentSessionId, olderMessagesCursor)
+      setMessages((prev) => [...formatHistory(page.results), ...prev])
+      setOlderMessagesCursor(page.before)
+    } catch (error) {
+      console.error('Error loading chat history:', error)
+      if (error instanceof Error && error.message === 'Authentication expired') {
+        onSignOut() // Redirect to login
+      }
+    }
+  }
+
   const startNewConversation = () => {
     setMessages([
       {
@@ -140,6 +179,7 @@ export default function ChatInterface({ user, onSignOut, onNavigate }: ChatInter
         timestamp: new Date(),
       },
     ])
+    setOlderMessagesCursor(null)
     setCurrentSessionId(null)
   }
 
@@ -186,22 +226,57 @@ export default function ChatInterface({ user, onSignOut, onNavigate }: ChatInter
         throw new Error('User not authenticated')
       }
       
-      // Call the backend API with session support
-      const data = await chatAPI.sendMessage(messageToSend, currentSessionId || undefined)
-      
-      const aiResponse: Message = {
-        id: (Date.now() + 1).toString(),
-        content: data.answer || "I'm sorry, I couldn't process your question at the moment. Please try again.",
-        sender: "ai",
-        timestamp: new Date(),
+      let newSessionId: string | null = null
+
+      if (API_CONFIG.STREAMING) {
+        // Stream the reply: render the answer as soon as it arrives instead of
+        // waiting for the backend to persist the turn
+        let answered = false
+
+        await chatAPI.streamMessage(messageToSend, currentSessionId || undefined, (event, data) => {
+          if (event === "meta" && !currentSessionId && data.session_id) {
+            newSessionId = data.session_id.toString()
+            setCurrentSessionId(newSessionId)
+          } else if (event === "answer") {
+            answered = true
+            const aiResponse: Message = {
+              id: (Date.now() + 1).toString(),
+              content: data.answer || "I'm sorry, I couldn't process your question at the moment. Please try again.",
+              sender: "ai",
+              timestamp: new Date(),
+            }
+            setMessages((prev) => [...prev, aiResponse])
+            setIsTyping(false)
+          } else if (event === "error") {
+            throw new Error(data.error || "Failed to send message")
+          }
+        })
+
+        if (!answered) {
+          throw new Error("Failed to send message")
+        }
+      } else {
+        // Call the backend API with session support
+        const data = await chatAPI.sendMessage(messageToSend, currentSessionId || undefined)
+
+        const aiResponse: Message = {
+          id: (Date.now() + 1).toString(),
+          content: data.answer || "I'm sorry, I couldn't process your question at the moment. Please try again.",
+          sender: "ai",
+          timestamp: new Date(),
+        }
+
+        setMessages((prev) => [...prev, aiResponse])
+
+        // Update current session ID if this was a new conversation
+        if (!currentSessionId && data.session_id) {
+          newSessionId = data.session_id.toString()
+          setCurrentSessionId(newSessionId)
+        }
       }
-      
-      setMessages((prev) => [...prev, aiResponse])
-      
-      // Update current session ID if this was a new conversation
-      if (!currentSessionId && data.session_id) {
-        setCurrentSessionId(data.session_id.toString())
-        // Reload sessions to get the updated list
+
+      // Reload sessions to get the new conversation in the list
+      if (newSessionId) {
         loadChatSessions()
       }
     } catch (error: unknown) {
@@ -348,6 +423,11 @@ export default function ChatInterface({ user, onSignOut, onNavigate }: ChatInter
                 </Card>
               ))
             )}
+            {olderSessionsCursor && (
+              <Button variant="ghost" size="sm" className="w-full text-gray-500" onClick={loadMoreSessions}>
+                Load more
+              </Button>
+            )}
           </div>
         </div>
       </div>
@@ -418,6 +498,13 @@ export default function ChatInterface({ user, onSignOut, onNavigate }: ChatInter
               />
             </div>
           )}
+          {olderMessagesCursor && (
+            <div className="flex justify-center">
+              <Button variant="ghost" size="sm" className="text-gray-500" onClick={loadEarlierMessages}>
+                Load earlier messages
+              </Button>
+            </div>
+          )}
           {messages.map((message) => (
             <div key={message.id} className={`flex ${message.sender === "user" ? "justify-end" : "justify-start"}`}>
               <div className={`flex items-start space-x-2 max-w-[280px] xs:max-w-[320px] sm:max-w-xs md:max-w-sm lg:max-w-md xl:max-w-lg 2xl:max-w-xl`}>
@@ -5,6 +5,11 @@ export const API_CONFIG = {
   //  BASE_URL: process.env.NEXT_PUBLIC_API_URL || "http://127.0.0.1:8000",
 
   
+  // Stream chat replies over Server-Sent Events. Only enable this when the
+  // backend is served by an ASGI server; under WSGI the stream is buffered
+  // until the whole reply is ready, so the plain POST endpoint is the default.
+  STREAMING: process.env.NEXT_PUBLIC_CHAT_STREAMING === "true",
+
   // API Endpoints
   ENDPOINTS: {
     REGISTER: "/auth/register/",
@@ -17,6 +22,7 @@ export const API_CONFIG = {
     PROFILE_UPDATE: "/auth/profile/",
     CHAT: "/api/chat/",
     CHATBOT: "/api/chatbot/",
+    CHATBOT_STREAM: "/api/chatbot/stream/",
     CHAT_SESSIONS: "/api/chat-sessions/",
     CHAT_HISTORY: "/api/chat-sessions/",
     DELETE_CHAT_SESSION: "/api/chat-sessions/",
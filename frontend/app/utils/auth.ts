@@ -21,6 +21,14 @@ export interface RegisterResponse {
   user: User
 }
 
+// Keyset-paginated list: `before` loads older rows, `after` newer ones; each is
+// null when there is nothing further in that direction
+export interface ChatPage {
+  results: any[]
+  before: string | null
+  after: string | null
+}
+
 // API Functions
 export const authAPI = {
   // Register a new user
@@ -255,9 +263,60 @@ export const chatAPI = {
     return response.json()
   },
 
-  // Get list of chat sessions
-  getChatSessions: async (): Promise<any[]> => {
-    const response = await authenticatedFetch(buildUrl(API_CONFIG.ENDPOINTS.CHAT_SESSIONS), {
+  // Stream a chatbot reply as Server-Sent Events: "meta" (session id + label)
+  // arrives first, then "answer" as soon as retrieval finishes, then "done".
+  streamMessage: async (
+    question: string,
+    sessionId: string | undefined,
+    onEvent: (event: string, data: any) => void
+  ): Promise<void> => {
+    const payload: any = { question }
+    if (sessionId) {
+      payload.session_id = sessionId
+    }
+
+    const response = await authenticatedFetch(buildUrl(API_CONFIG.ENDPOINTS.CHATBOT_STREAM), {
+      method: "POST",
+      headers: { Accept: "text/event-stream" },
+      body: JSON.stringify(payload),
+    })
+
+    if (!response.ok || !response.body) {
+      throw new Error("Failed to send message")
+    }
+
+    const reader = response.body.getReader()
+    const decoder = new TextDecoder()
+    let buffer = ""
+
+    while (true) {
+      const { done, value } = await reader.read()
+      if (done) break
+      buffer += decoder.decode(value, { stream: true })
+
+      // Frames are separated by a blank line
+      let boundary = buffer.indexOf("\n\n")
+      while (boundary !== -1) {
+        const frame = buffer.slice(0, boundary)
+        buffer = buffer.slice(boundary + 2)
+        boundary = buffer.indexOf("\n\n")
+
+        let event = "message"
+        let data = ""
+        for (const line of frame.split("\n")) {
+          if (line.startsWith("event:")) event = line.slice(6).trim()
+          else if (line.startsWith("data:")) data += line.slice(5).trim()
+        }
+        onEvent(event, data ? JSON.parse(data) : {})
+      }
+    }
+  },
+
+  // Get one page of chat sessions, newest first. Pass the previous page's
+  // `before` cursor to load older sessions; `before` is null on the last page.
+  getChatSessions: async (before?: string | null): Promise<ChatPage> => {
+    const query = before ? `?before=${encodeURIComponent(before)}` : ""
+    const response = await authenticatedFetch(buildUrl(`${API_CONFIG.ENDPOINTS.CHAT_SESSIONS}${query}`), {
       method: "GET",
     })
 
@@ -268,9 +327,11 @@ export const chatAPI = {
     return response.json()
   },
 
-  // Get chat history for a specific session
-  getChatHistory: async (sessionId: string): Promise<any[]> => {
-    const response = await authenticatedFetch(buildUrl(`${API_CONFIG.ENDPOINTS.CHAT_HISTORY}${sessionId}/`), {
+  // Get one page of a session's messages, oldest first. Without a cursor this
+  // is the latest page; pass its `before` cursor to scroll back further.
+  getChatHistory: async (sessionId: string, before?: string | null): Promise<ChatPage> => {
+    const query = before ? `?before=${encodeURIComponent(before)}` : ""
+    const response = await authenticatedFetch(buildUrl(`${API_CONFIG.ENDPOINTS.CHAT_HISTORY}${sessionId}/${query}`), {
       method: "GET",
     })
 